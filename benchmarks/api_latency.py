@@ -0,0 +1,121 @@
+"""
+Latency of GET /status/{id} with and without large uploads in flight. With
+non-blocking handlers p99 should stay flat while uploads stream in.
+
+Start the API first (e.g. `docker compose up api`), then:
+Usage: python -m benchmarks.api_latency [--api http://localhost:8000]
+           [--upload-mb 500] [--uploads 2] [--seconds 10] [--rate 50]
+           [--mode chunked|multipart]
+"""
+
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import tempfile
+import time
+
+import httpx
+
+CHUNK = 8 * 1024 * 1024
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] * 1000
+
+
+async def poll_status(client, job_id, seconds, rate):
+    """Fires GET /status at `rate` req/s for `seconds`; returns latencies."""
+    latencies = []
+
+    async def one():
+        began = time.perf_counter()
+        res = await client.get(f"/status/{job_id}")
+        res.raise_for_status()
+        latencies.append(time.perf_counter() - began)
+
+    tasks = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        tasks.append(asyncio.create_task(one()))
+        await asyncio.sleep(1 / rate)
+    await asyncio.gather(*tasks)
+    return latencies
+
+
+def upload(api, path, mode):
+    # Own process, so sending the upload doesn't slow down the measuring client
+    with httpx.Client(base_url=api, timeout=None) as client, open(path, "rb") as f:
+        if mode == "multipart":
+            res = client.post("/upload", files={"file": ("bench.mp4", f, "video/mp4")})
+            res.raise_for_status()
+            return
+
+        # Resumable upload API, as used by the dashboard
+        size = os.path.getsize(path)
+        session = client.post(
+            "/uploads", json={"filename": "bench.mp4", "size": size}
+        ).json()
+        offset = 0
+        while chunk := f.read(session["chunk_size"]):
+            res = client.put(
+                f"/uploads/{session['upload_id']}",
+                params={"offset": offset},
+                content=chunk,
+            )
+            res.raise_for_status()
+            offset = res.json()["offset"]
+        client.post(f"/uploads/{session['upload_id']}/finalize").raise_for_status()
+
+
+def _report(phase, latencies):
+    print(
+        f"{phase:>8} {len(latencies):>6} {_percentile(latencies, 0.5):>8.1f} "
+        f"{_percentile(latencies, 0.99):>8.1f} {max(latencies) * 1000:>8.1f}"
+    )
+
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.api, timeout=30.0) as client:
+        res = await client.post(
+            "/upload", files={"file": ("probe.mp4", os.urandom(1024), "video/mp4")}
+        )
+        res.raise_for_status()
+        job_id = res.json()["job_id"]
+
+        with tempfile.NamedTemporaryFile(suffix=".mp4") as big:
+            for _ in range(max(args.upload_mb * 2**20 // CHUNK, 1)):
+                big.write(os.urandom(CHUNK))
+            big.flush()
+
+            print(f"{'phase':>8} {'reqs':>6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+            _report("idle", await poll_status(client, job_id, args.seconds, args.rate))
+
+            uploads = [
+                mp.Process(target=upload, args=(args.api, big.name, args.mode))
+                for _ in range(args.uploads)
+            ]
+            for p in uploads:
+                p.start()
+            loaded = await poll_status(client, job_id, args.seconds, args.rate)
+            _report("uploads", loaded)
+            done = sum(not p.is_alive() for p in uploads)
+            for p in uploads:
+                p.join()
+            print(f"{done}/{args.uploads} uploads finished inside the window")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--api", default="http://localhost:8000")
+    parser.add_argument("--upload-mb", type=int, default=500)
+    parser.add_argument("--uploads", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--rate", type=float, default=50)
+    parser.add_argument("--mode", choices=["chunked", "multipart"], default="chunked")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
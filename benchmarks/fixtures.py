@@ -0,0 +1,100 @@
+"""
+Deterministic synthetic screen recordings for the benchmarks and tests:
+UI-like frames (title bar, sidebar, buttons, a popup that comes and goes)
+rendered with NumPy/OpenCV and encoded by ffmpeg with a beeping tone track.
+The same name/size/seed always gives the same frames and audio.
+"""
+
+import subprocess
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# name -> (seconds, width, height)
+FIXTURES = {
+    "10s-720p": (10, 1280, 720),
+    "60s-720p": (60, 1280, 720),
+    "30s-1080p": (30, 1920, 1080),
+    "300s-480p": (300, 854, 480),
+}
+FPS = 30
+SCENE_SECONDS = 2  # the layout changes this often
+# 1 s beep every 4 s, so VAD and Whisper see speech-like on/off audio
+TONE = "0.3*sin(2*PI*440*t)*lt(mod(t\\,4)\\,1)"
+
+
+def _scene(rng, width: int, height: int) -> np.ndarray:
+    """One static UI layout: chrome, sidebar, buttons, maybe a popup."""
+    frame = np.full((height, width, 3), 240, dtype=np.uint8)
+    bar = height // 12
+    cv2.rectangle(frame, (0, 0), (width, bar), (60, 60, 60), -1)
+    cv2.rectangle(frame, (0, bar), (width // 6, height), (210, 210, 210), -1)
+    for i in range(int(rng.integers(2, 6))):
+        x = int(rng.integers(width // 5, width - 220))
+        y = bar + 40 + i * (height // 8)
+        cv2.rectangle(frame, (x, y), (x + 180, y + 50), (200, 120, 30), -1)
+        cv2.putText(frame, f"Button {i}", (x + 20, y + 33), 0, 0.8, (255, 255, 255), 2)
+    if rng.random() < 0.5:
+        w, h = width // 3, height // 4
+        x, y = (width - w) // 2, (height - h) // 2
+        cv2.rectangle(frame, (x, y), (x + w, y + h), (40, 40, 200), -1)
+        cv2.putText(frame, "Error", (x + 20, y + 50), 0, 1.2, (255, 255, 255), 3)
+    return frame
+
+
+def iter_frames(seconds: int, width: int, height: int, fps: int = FPS, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    scene = None
+    for i in range(seconds * fps):
+        if i % (SCENE_SECONDS * fps) == 0:
+            scene = _scene(rng, width, height)
+        frame = scene.copy()
+        # A moving cursor and a frame counter, so no two frames are identical
+        cursor = (width // 6 + (i * 9) % (width - width // 6), height // 2)
+        cv2.circle(frame, cursor, 8, (0, 0, 0), -1)
+        cv2.putText(frame, f"frame {i}", (20, height - 20), 0, 0.8, (0, 0, 0), 2)
+        yield frame
+
+
+def make_synthetic_clip(
+    path: Path,
+    seconds: int,
+    width: int,
+    height: int,
+    fps: int = FPS,
+    seed: int = 0,
+    audio: bool = True,
+) -> int:
+    """Encodes a synthetic recording to `path` (H.264 + AAC). Returns its frame count."""
+    cmd = [
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}",
+        "-r", str(fps), "-i", "-",
+    ]  # fmt: skip
+    if audio:
+        cmd += ["-f", "lavfi", "-i", f"aevalsrc={TONE}:s=16000:d={seconds}"]
+        cmd += ["-c:a", "aac"]
+    cmd += [
+        "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+        "-g", str(fps * SCENE_SECONDS), "-threads", "1", str(path),
+    ]  # fmt: skip
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    for frame in iter_frames(seconds, width, height, fps, seed):
+        proc.stdin.write(frame.tobytes())
+    proc.stdin.close()
+    if proc.wait() != 0:
+        raise subprocess.CalledProcessError(proc.returncode, "ffmpeg")
+    return seconds * fps
+
+
+def fixture_path(name: str, fixture_dir: Path) -> Path:
+    """The named fixture, generated on first use and reused afterwards."""
+    seconds, width, height = FIXTURES[name]
+    path = Path(fixture_dir) / f"{name}.mp4"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        part = path.with_suffix(".part.mp4")
+        make_synthetic_clip(part, seconds, width, height)
+        part.replace(path)
+    return path
@@ -0,0 +1,88 @@
+"""
+Fusion time for growing numbers of visual detections, index vs linear scan.
+
+Usage: python -m benchmarks.fusion_scale [--max-linear 100000]
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from loguru import logger
+
+from src.engine.fusion import BugLensFusion
+
+SIZES = [10**3, 10**4, 10**5, 10**6]
+FPS = 30
+SPEECH_EVERY = 10.0  # seconds between speech segments
+
+
+def make_signals(n_visuals: int, seed: int = 0):
+    """Synthetic vision logs at FPS and a speech segment every SPEECH_EVERY s."""
+    rng = random.Random(seed)
+    ui_data = [
+        {"time": round(i / FPS, 2), "detections": [{"label": "popup", "conf": 0.9}]}
+        for i in range(n_visuals)
+    ]
+    duration = n_visuals / FPS
+    audio_data = []
+    t = rng.uniform(0, SPEECH_EVERY)
+    while t < duration:
+        length = rng.uniform(1.0, 4.0)
+        audio_data.append({"start": t, "end": t + length, "text": "it broke here"})
+        t += SPEECH_EVERY
+    return ui_data, audio_data
+
+
+def linear_fuse(ui_data, audio_data, window=3.0):
+    """The previous implementation: every speech segment scans every visual."""
+    report = []
+    for speech in audio_data:
+        t_start = max(0, speech["start"] - window)
+        t_end = speech["end"] + window
+        relevant = [f for f in ui_data if t_start <= float(f["time"]) <= t_end]
+        if relevant:
+            report.append(
+                {
+                    "time": int(speech["start"]),
+                    "voice": speech["text"],
+                    "visuals": relevant,
+                }
+            )
+    return {"status": "Complete", "bug_events": report}
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--max-linear",
+        type=int,
+        default=10**5,
+        help="skip the linear scan above this many detections",
+    )
+    args = parser.parse_args()
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    fusion = BugLensFusion(window=3.0, anchor="speech_start")
+    print(f"{'visuals':>9} {'speech':>7} {'index s':>9} {'linear s':>9}")
+    for n in SIZES:
+        ui_data, audio_data = make_signals(n)
+        indexed, result = _timed(fusion.fuse, ui_data, audio_data)
+        linear = "-"
+        if n <= args.max_linear:
+            elapsed, expected = _timed(linear_fuse, ui_data, audio_data)
+            assert expected == result, "index fusion diverged from the linear scan"
+            linear = f"{elapsed:.3f}"
+        print(f"{n:>9} {len(audio_data):>7} {indexed:>9.3f} {linear:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Per-stage benchmark of the processing pipeline on synthetic recordings.
+
+For every fixture (see benchmarks.fixtures) runs vision, audio, fusion and
+transcode (overlay render), each in a fresh process, and reports wall time,
+throughput and peak RSS per stage plus the end-to-end latency. Vision and
+audio run in parallel in the real pipeline, so end-to-end is
+max(vision, audio) + fusion. Results are written as JSON; with --baseline
+they are compared against an earlier run and the exit status is 1 if any
+stage got slower by more than --tolerance.
+
+Usage: python -m benchmarks.pipeline [--fixtures 10s-720p,60s-720p | all]
+           [--stages vision,audio,fusion,transcode] [--output results.json]
+           [--baseline baseline.json] [--tolerance 0.15] [--vision-backend onnx]
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+from benchmarks.fixtures import FIXTURES, fixture_path
+
+STAGES = ["vision", "audio", "fusion", "transcode"]
+
+
+def _peak_rss_mb() -> dict:
+    # ru_maxrss is in KiB on Linux; children covers the ffmpeg subprocesses
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {
+        "peak_rss_mb": round(own / 1024, 1),
+        "ffmpeg_peak_rss_mb": round(children / 1024, 1),
+    }
+
+
+def _run_vision(clip: str, work: Path, options: dict) -> dict:
+    import cv2
+
+    from src.engine.vision import BugLensVision
+
+    frames = int(cv2.VideoCapture(clip).get(cv2.CAP_PROP_FRAME_COUNT))
+    started = time.perf_counter()
+    vision = BugLensVision(options["yolo_model"], backend=options["vision_backend"])
+    loaded = time.perf_counter()
+    ui_logs, _ = vision.detect(clip, str(work / "detections.npz"))
+    seconds = time.perf_counter() - loaded
+    timeline = json.dumps(ui_logs)
+    (work / "vision.json").write_text(timeline)
+    return {
+        "seconds": seconds,
+        "load_seconds": loaded - started,
+        "throughput": frames / seconds,
+        "unit": "frames/s",
+        "tracks": len(ui_logs),
+        "timeline_kb": len(timeline) / 1024,
+    }
+
+
+def _run_audio(clip: str, work: Path, options: dict) -> dict:
+    from src.engine.audio import SAMPLE_RATE, BugLensAudio
+
+    started = time.perf_counter()
+    audio = BugLensAudio(options["whisper_model"])
+    loaded = time.perf_counter()
+    pcm = audio.decode_audio(clip)
+    transcript = list(audio.iter_segments(pcm))
+    seconds = time.perf_counter() - loaded
+    (work / "audio.json").write_text(json.dumps(transcript))
+    return {
+        "seconds": seconds,
+        "load_seconds": loaded - started,
+        "throughput": len(pcm) / SAMPLE_RATE / seconds,
+        "unit": "x realtime",
+    }
+
+
+def _run_fusion(clip: str, work: Path, options: dict) -> dict:
+    from src.engine.fusion import BugLensFusion
+
+    ui_logs = json.loads((work / "vision.json").read_text())
+    transcript = json.loads((work / "audio.json").read_text())
+    started = time.perf_counter()
+    report = BugLensFusion().fuse(ui_logs, transcript)
+    seconds = time.perf_counter() - started
+    return {
+        "seconds": seconds,
+        "throughput": len(ui_logs) / seconds if seconds else 0.0,
+        "unit": "visuals/s",
+        "events": len(report["bug_events"]),
+    }
+
+
+def _run_transcode(clip: str, work: Path, options: dict) -> dict:
+    import cv2
+
+    from src.engine.render import BugLensRenderer
+
+    frames = int(cv2.VideoCapture(clip).get(cv2.CAP_PROP_FRAME_COUNT))
+    started = time.perf_counter()
+    BugLensRenderer().render(
+        clip, str(work / "detections.npz"), str(work / "vision_web.mp4")
+    )
+    seconds = time.perf_counter() - started
+    return {"seconds": seconds, "throughput": frames / seconds, "unit": "frames/s"}
+
+
+RUNNERS = {
+    "vision": _run_vision,
+    "audio": _run_audio,
+    "fusion": _run_fusion,
+    "transcode": _run_transcode,
+}
+
+
+def _measure(stage: str, clip: str, work: str, options: dict) -> dict:
+    """Runs one stage in this (fresh) process; RSS is only this stage's."""
+    from loguru import logger
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    result = RUNNERS[stage](clip, Path(work), options)
+    result.update(_peak_rss_mb())
+    return {k: round(v, 4) if isinstance(v, float) else v for k, v in result.items()}
+
+
+def run_fixture(name: str, stages: list, fixture_dir: Path, options: dict) -> dict:
+    clip = str(fixture_path(name, fixture_dir))
+    results = {}
+    with tempfile.TemporaryDirectory() as work:
+        for stage in stages:
+            # spawn: a clean interpreter, so models and peak RSS don't carry over
+            with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+                results[stage] = pool.submit(
+                    _measure, stage, clip, work, options
+                ).result()
+            print(f"  {name:<10} {stage:<10} {_describe(results[stage])}")
+
+    if {"vision", "audio", "fusion"} <= results.keys():
+        results["end_to_end_seconds"] = round(
+            max(results["vision"]["seconds"], results["audio"]["seconds"])
+            + results["fusion"]["seconds"],
+            3,
+        )
+    return results
+
+
+def _describe(result: dict) -> str:
+    return (
+        f"{result['seconds']:>8.2f}s {result['throughput']:>9.1f} "
+        f"{result['unit']:<11} peak {result['peak_rss_mb']:.0f} MB"
+    )
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """
+    (fixture, stage, baseline s, current s, change) for every stage both runs
+    measured; change is the relative increase in seconds.
+    """
+    rows = []
+    for name, stages in current["fixtures"].items():
+        base_stages = baseline.get("fixtures", {}).get(name, {})
+        for stage, result in stages.items():
+            base = base_stages.get(stage)
+            if base is None:
+                continue
+            now = result if stage == "end_to_end_seconds" else result["seconds"]
+            was = base if stage == "end_to_end_seconds" else base["seconds"]
+            change = (now - was) / was if was else 0.0
+            rows.append((name, stage, was, now, change, change > tolerance))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixtures", default="10s-720p")
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--fixture-dir", default="data/bench")
+    parser.add_argument("--output", default="pipeline_results.json")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--yolo-model", default="yolov8n.pt")
+    parser.add_argument("--vision-backend", default="torch")
+    parser.add_argument("--whisper-model", default="small")
+    args = parser.parse_args()
+
+    names = list(FIXTURES) if args.fixtures == "all" else args.fixtures.split(",")
+    stages = [s for s in STAGES if s in args.stages.split(",")]
+    options = {
+        "yolo_model": args.yolo_model,
+        "vision_backend": args.vision_backend,
+        "whisper_model": args.whisper_model,
+    }
+
+    current = {
+        "meta": {
+            "commit": _git_commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            **options,
+        },
+        "fixtures": {},
+    }
+    print(f"{len(names)} fixture(s), stages: {', '.join(stages)}")
+    for name in names:
+        current["fixtures"][name] = run_fixture(
+            name, stages, Path(args.fixture_dir), options
+        )
+
+    Path(args.output).write_text(json.dumps(current, indent=2))
+    print(f"Results written to {args.output}")
+
+    if not args.baseline:
+        return
+    baseline = json.loads(Path(args.baseline).read_text())
+    rows = compare(current, baseline, args.tolerance)
+    print(f"\nvs {args.baseline} (commit {baseline['meta'].get('commit')}):")
+    print(f"{'fixture':<10} {'stage':<18} {'baseline':>9} {'current':>9} {'change':>8}")
+    for name, stage, was, now, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<10} {stage:<18} {was:>8.2f}s {now:>8.2f}s {change:>+8.1%}{flag}")
+    if any(row[-1] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Vision inference backends side by side: model load time, frames/sec and peak
+RSS of each backend on the same synthetic clip, and how closely their
+detections agree with the first backend listed.
+
+Every backend runs in a fresh process so load time and memory are its own.
+The first ONNX run exports the model (cached afterwards); run twice to see the
+steady-state load time.
+
+Usage: python -m benchmarks.vision_backends [--backends torch,onnx]
+           [--fixture 10s-720p] [--model yolov8n.pt] [--batch-size 8]
+"""
+
+import argparse
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+from benchmarks.fixtures import FIXTURES, fixture_path
+
+
+def _run(backend: str, clip: str, work: str, model: str, batch_size: int) -> dict:
+    from loguru import logger
+
+    from src.engine.detections import load_detections
+    from src.engine.sampling import StrideSampler
+    from src.engine.vision import BugLensVision
+
+    logger.remove()
+    started = time.perf_counter()
+    vision = BugLensVision(model, batch_size=batch_size, backend=backend)
+    loaded = time.perf_counter()
+    boxes = str(Path(work) / f"{backend}.npz")
+    # Every frame goes through the model so only the backend is measured
+    vision.detect(clip, boxes, sampler=StrideSampler(1))
+    seconds = time.perf_counter() - loaded
+
+    detections = load_detections(boxes)
+    return {
+        "load_seconds": loaded - started,
+        "fps": len(detections["sampled_frames"]) / seconds,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "boxes": boxes,
+    }
+
+
+def _box_iou(a, b):
+    x1 = max(a[0], b[0])
+    y1 = max(a[1], b[1])
+    x2 = min(a[2], b[2])
+    y2 = min(a[3], b[3])
+    inter = max(x2 - x1, 0) * max(y2 - y1, 0)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union else 0.0
+
+
+def agreement(reference: str, other: str, min_iou: float = 0.5) -> float:
+    """Share of reference boxes matched by a same-class box with IoU >= min_iou."""
+    from src.engine.detections import load_detections
+
+    ref, oth = load_detections(reference), load_detections(other)
+    if not len(ref["frames"]):
+        return 1.0 if not len(oth["frames"]) else 0.0
+    matched = 0
+    for frame, box, cls in zip(ref["frames"], ref["boxes"], ref["cls"], strict=True):
+        same = (oth["frames"] == frame) & (oth["cls"] == cls)
+        if any(_box_iou(box, candidate) >= min_iou for candidate in oth["boxes"][same]):
+            matched += 1
+    return matched / len(ref["frames"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", default="torch,onnx")
+    parser.add_argument("--fixture", default="10s-720p", choices=list(FIXTURES))
+    parser.add_argument("--fixture-dir", default="data/bench")
+    parser.add_argument("--model", default="yolov8n.pt")
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    clip = str(fixture_path(args.fixture, Path(args.fixture_dir)))
+    backends = args.backends.split(",")
+
+    with tempfile.TemporaryDirectory() as work:
+        results = {}
+        for backend in backends:
+            # spawn: a clean interpreter, so nothing is shared between backends
+            with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+                results[backend] = pool.submit(
+                    _run, backend, clip, work, args.model, args.batch_size
+                ).result()
+
+        reference = results[backends[0]]["boxes"]
+        print(f"{args.fixture}, {args.model}, batch {args.batch_size}")
+        print(
+            f"{'backend':<8} {'load s':>7} {'frames/s':>9} {'peak MB':>8} {'agree':>6}"
+        )
+        for backend, result in results.items():
+            agree = agreement(reference, result["boxes"])
+            print(
+                f"{backend:<8} {result['load_seconds']:>7.2f} {result['fps']:>9.1f} "
+                f"{result['peak_rss_mb']:>8.0f} {agree:>6.1%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Frames/sec of the vision engine for different YOLO batch sizes.
+
+Usage: python -m benchmarks.vision_batch [--seconds 10] [--size 1280x720]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.fixtures import make_synthetic_clip
+from src.engine.sampling import StrideSampler
+from src.engine.vision import BugLensVision
+
+BATCH_SIZES = [1, 4, 8, 16]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=int, default=10)
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--model", default="yolov8n.pt")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.split("x"))
+
+    vision = BugLensVision(args.model)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = Path(tmp) / "synthetic.mp4"
+        n_frames = make_synthetic_clip(clip, args.seconds, width, height, audio=False)
+
+        # Warm-up so the first measured run doesn't include lazy model setup
+        boxes = str(Path(tmp) / "detections.npz")
+        vision.detect(str(clip), boxes, batch_size=1, sampler=StrideSampler(1))
+
+        print(f"{n_frames} frames @ {width}x{height}")
+        print(f"{'batch':>6} {'seconds':>9} {'frames/s':>9}")
+        for batch_size in BATCH_SIZES:
+            started = time.perf_counter()
+            # Every frame goes through YOLO so only batching is measured
+            vision.detect(
+                str(clip), boxes, batch_size=batch_size, sampler=StrideSampler(1)
+            )
+            elapsed = time.perf_counter() - started
+            print(f"{batch_size:>6} {elapsed:>9.2f} {n_frames / elapsed:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+import redis.asyncio as aioredis
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from loguru import logger
+from redis.exceptions import RedisError
+
+from src.utils.progress import PROGRESS_CHANNEL, REDIS_URL
+
+KEEPALIVE_SECONDS = 15
+QUEUE_SIZE = 100  # events buffered per client before the oldest is dropped
+
+router = APIRouter()
+
+
+class ProgressHub:
+    """
+    One Redis pub/sub subscription per API process, fanned out to every
+    connected client, so open dashboards cost one subscriber instead of one
+    each.
+    """
+
+    def __init__(self):
+        self.queues = set()
+        self._task = None
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.queues.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.queues.discard(queue)
+
+    async def _listen(self):
+        while self.queues:
+            try:
+                async with (
+                    aioredis.from_url(REDIS_URL) as client,
+                    client.pubsub() as pubsub,
+                ):
+                    await pubsub.subscribe(PROGRESS_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._broadcast(message["data"].decode())
+                        if not self.queues:
+                            return
+            except RedisError as e:
+                logger.warning(f"Progress feed lost, reconnecting: {e}")
+                await asyncio.sleep(1)
+
+    def _broadcast(self, data: str):
+        for queue in self.queues:
+            if queue.full():
+                queue.get_nowait()  # slow client: drop its oldest event
+            queue.put_nowait(data)
+
+
+hub = ProgressHub()
+
+
+@router.get("/events")
+async def progress_events(request: Request, job_id: str | None = None):
+    """
+    Server-Sent Events stream of job progress (stage, percent, frames, status).
+    Pass `job_id` to only receive one job's events.
+    """
+    queue = hub.subscribe()
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    data = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+                except TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if job_id and json.loads(data)["job_id"] != job_id:
+                    continue
+                yield f"event: progress\ndata: {data}\n\n"
+        finally:
+            hub.unsubscribe(queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,86 @@
+from typing import Annotated
+
+import anyio
+from fastapi import APIRouter, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import BugJob
+from src.database.session import AsyncDB
+from src.worker import job_store
+
+router = APIRouter(prefix="/jobs")
+
+MAX_ROWS = 10_000
+
+
+async def _require_job(job_id: str, db: AsyncSession):
+    if not await db.scalar(select(BugJob.id).where(BugJob.id == job_id)):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+
+async def _read(job_id: str, name: str, **kwargs) -> list:
+    try:
+        return await anyio.to_thread.run_sync(
+            lambda: job_store.read_table(job_id, name, **kwargs)
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=409, detail=f"{name} not ready yet")
+
+
+@router.get("/{job_id}/detections")
+async def job_detections(
+    job_id: str,
+    db: AsyncDB,
+    start: float | None = None,
+    end: float | None = None,
+    label: Annotated[list[str] | None, Query()] = None,
+    min_conf: float = 0.0,
+    limit: Annotated[int, Query(ge=1, le=MAX_ROWS)] = 1000,
+):
+    """
+    Per-frame boxes (time, frame, label, conf, xyxy), optionally limited to a
+    time range (seconds) and to some labels.
+    """
+    await _require_job(job_id, db)
+    filters = [("conf", ">=", min_conf)]
+    if label:
+        filters.append(("label", "in", label))
+    return await _read(
+        job_id, "detections", start=start, end=end, filters=filters, limit=limit
+    )
+
+
+@router.get("/{job_id}/transcript")
+async def job_transcript(
+    job_id: str,
+    db: AsyncDB,
+    start: float | None = None,
+    end: float | None = None,
+):
+    """Transcript segments overlapping the [start, end] range (seconds)."""
+    await _require_job(job_id, db)
+    # A segment overlaps the range if it ends after start and starts before end
+    filters = []
+    if start is not None:
+        filters.append(("end", ">=", start))
+    if end is not None:
+        filters.append(("start", "<=", end))
+    return await _read(job_id, "transcript", filters=filters)
+
+
+@router.get("/{job_id}/events")
+async def job_events(
+    job_id: str,
+    db: AsyncDB,
+    start: float | None = None,
+    end: float | None = None,
+    label: Annotated[list[str] | None, Query()] = None,
+):
+    """Fused bug events in a time range, optionally only those showing a label."""
+    await _require_job(job_id, db)
+    events = await _read(job_id, "events", start=start, end=end)
+    if label:
+        wanted = set(label)
+        events = [e for e in events if wanted.intersection(e["labels"])]
+    return events
@@ -1,101 +1,234 @@
-import shutil
+import hashlib
+import uuid
+from datetime import datetime
 from pathlib import Path
+from typing import Annotated
 
-from fastapi import Depends, FastAPI, File, HTTPException, UploadFile
+import anyio
+from fastapi import FastAPI, File, HTTPException, Query, UploadFile
+from fastapi.responses import PlainTextResponse
 from loguru import logger
-from sqlalchemy.orm import Session
-
-from src.api.schemas import JobStatusResponse
+from sqlalchemy import select
+
+from src.api.events import router as events_router
+from src.api.job_data import router as job_data_router
+from src.api.metrics import RequestMetrics
+from src.api.metrics import router as metrics_router
+from src.api.schemas import JobListResponse, JobStatusResponse
+from src.api.uploads import (
+    CHUNK_SIZE,
+    SESSION_DIR,
+    queue_job,
+    store_upload,
+    stored_hash,
+)
+from src.api.uploads import (
+    router as uploads_router,
+)
 from src.database.models import BugJob
-from src.database.session import get_db, init_db
+from src.database.queries import job_page_async
+from src.database.session import AsyncDB, init_db
 from src.utils.logging_config import setup_logging
-from src.worker.tasks import process_bug_video
+from src.utils.progress import publish_progress_async
+from src.worker import artifacts
+from src.worker.partial import load_partial
+from src.worker.tasks import render_vision_video, start_pipeline
 
 # Initialize logging and database
 setup_logging()
 init_db()
 
 app = FastAPI(title="BugLens API")
-UPLOAD_DIR = Path("/app/data/raw")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+app.include_router(uploads_router)
+app.include_router(events_router)
+app.include_router(job_data_router)
+app.include_router(metrics_router)
+app.add_middleware(RequestMetrics)
 
 
 # upload video
 @app.post("/upload")
-async def upload_video(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_video(
+    file: Annotated[UploadFile, File()],
+    db: AsyncDB,
+    profile: bool = False,
+):
     """
     Receives a video, saves it, and creates a PENDING job in the DB.
+    With ?profile=true every stage of the job is profiled.
     """
-    file_path = UPLOAD_DIR / file.filename
+    part_path = SESSION_DIR / f"{uuid.uuid4()}.part"
 
     try:
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        new_job = BugJob(
-            filename=file.filename,
-            file_path=str(file_path),
-            status="PENDING",
+        # Hash while writing so the worker can reuse cached stage results
+        hasher = hashlib.sha256()
+        async with await anyio.open_file(part_path, "wb") as buffer:
+            while chunk := await file.read(CHUNK_SIZE):
+                # hashlib releases the GIL, so the loop keeps serving requests
+                await anyio.to_thread.run_sync(hasher.update, chunk)
+                await buffer.write(chunk)
+        content_hash = hasher.hexdigest()
+
+        file_path, _ = await anyio.to_thread.run_sync(
+            store_upload, part_path, content_hash, file.filename
+        )
+        new_job = await queue_job(
+            db, file.filename, file_path, content_hash, profile=profile
         )
-
-        db.add(new_job)
-        db.commit()
-        db.refresh(new_job)
-
-        process_bug_video.delay(new_job.id, str(file_path))
-        logger.info(f"Created Job {new_job.id} for file {file.filename}")
 
         return {"job_id": new_job.id, "status": "QUEUED"}
 
     except Exception as e:
-        logger.error(f"Upload failed: {e}")
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+        logger.exception(f"Upload failed: {e}")
+        await anyio.Path(part_path).unlink(missing_ok=True)
+        await db.rollback()
+        raise HTTPException(
+            status_code=500, detail=f"Internal Server Error: {e!s}"
+        ) from e
 
 
 # get job status
 @app.get("/status/{job_id}", response_model=JobStatusResponse)
-async def get_status(job_id: str, db: Session = Depends(get_db)):
+async def get_status(job_id: str, db: AsyncDB):
+    """
+    Check the current status of a bug report. While the job runs, `result`
+    holds the partial bug timeline built so far.
+    """
+    job = await db.get(BugJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    response = JobStatusResponse.model_validate(job)
+    if job.result is None and job.status in ("PENDING", "PROCESSING"):
+        partial = await anyio.to_thread.run_sync(load_partial, job.id)
+        if partial:
+            response.result = partial
+            response.progress = partial["progress"]
+    return response
+
+
+# render the AI Vision overlay on demand
+@app.post("/jobs/{job_id}/vision")
+async def request_vision_video(job_id: str, db: AsyncDB):
     """
-    Check the current status of a bug report.
+    Returns the cached overlay video, or queues its rendering on first request.
     """
-    job = db.query(BugJob).filter(BugJob.id == job_id).first()
+    job = await db.get(BugJob, job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    return job
+    if job.vision_file_path and await anyio.Path(job.vision_file_path).exists():
+        return {"status": "READY", "vision_file_path": job.vision_file_path}
+
+    detections = await anyio.to_thread.run_sync(artifacts.detections_path, job.id)
+    if not await anyio.Path(detections).exists():
+        raise HTTPException(status_code=409, detail="Detections not ready yet")
+
+    await anyio.to_thread.run_sync(render_vision_video.delay, job.id)
+    return {"status": "RENDERING"}
+
+
+# retry a failed job
+@app.post("/jobs/{job_id}/retry")
+async def retry_job(job_id: str, db: AsyncDB):
+    """
+    Re-queues the pipeline. Stages that already finished reuse their outputs.
+    """
+    job = await db.get(BugJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "FAILED":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+
+    job.status = "PENDING"
+    job.error_message = None
+    await db.commit()
+
+    # Uploads are named after their hash; no need to read the video again
+    await anyio.to_thread.run_sync(
+        start_pipeline, job.id, job.file_path, stored_hash(job.file_path)
+    )
+    await publish_progress_async(job.id, "job", status="PENDING")
+    return {"job_id": job.id, "status": "QUEUED"}
+
+
+# opt-in sampling profiler
+@app.post("/jobs/{job_id}/profile")
+async def enable_job_profile(job_id: str, db: AsyncDB):
+    """
+    Profiles the job's stages from now on, e.g. before a retry or a render.
+    """
+    job = await db.get(BugJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    await anyio.to_thread.run_sync(artifacts.enable_profiling, job.id)
+    return {"job_id": job.id, "profiling": True}
+
+
+@app.get("/jobs/{job_id}/profile", response_class=PlainTextResponse)
+async def get_job_profile(job_id: str, db: AsyncDB):
+    """
+    The job's profile as folded stacks, one root frame per stage. Feed it to
+    flamegraph.pl or open it in speedscope.
+    """
+    job = await db.get(BugJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    profile = await anyio.to_thread.run_sync(artifacts.read_profiles, job.id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="No profile for this job")
+    return PlainTextResponse(profile)
 
 
 # get job list
-@app.get("/jobs")
-async def list_jobs(db: Session = Depends(get_db)):
+@app.get("/jobs", response_model=JobListResponse)
+async def list_jobs(
+    db: AsyncDB,
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+    cursor: str | None = None,
+    status: Annotated[list[str] | None, Query()] = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+):
     """
-    Returns a list of all bug reports in the system.
+    Returns bug reports newest first, one page at a time. Follow `next_cursor`
+    for the next page; filter with ?status= (repeatable) and a created range.
     """
-    jobs = db.query(BugJob).order_by(BugJob.created_at.desc()).all()
-    return [
-        {
-            "id": j.id,
-            "status": j.status,
-            "filename": j.filename,
-            "created_at": j.created_at,
-        }
-        for j in jobs
-    ]
+    try:
+        rows, next_cursor = await job_page_async(
+            db,
+            limit,
+            cursor=cursor,
+            status=status,
+            created_after=created_after,
+            created_before=created_before,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+    return JobListResponse(items=rows, next_cursor=next_cursor)
 
 
 # delete job
 @app.delete("/jobs/{job_id}")
-def delete_job(job_id: str, db: Session = Depends(get_db)):
-    job = db.query(BugJob).filter(BugJob.id == job_id).first()
+async def delete_job(job_id: str, db: AsyncDB):
+    job = await db.get(BugJob, job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    # Delete the actual video file too
-    video_path = UPLOAD_DIR / job.filename
-    if video_path.exists():
-        video_path.unlink()
-
-    db.delete(job)
-    db.commit()
+    # Delete the actual video file too, unless another job (same content)
+    # still uses it
+    shared = await db.scalar(
+        select(BugJob.id)
+        .where(BugJob.file_path == job.file_path, BugJob.id != job.id)
+        .limit(1)
+    )
+    if not shared:
+        await anyio.to_thread.run_sync(Path(job.file_path).unlink, True)
+    await anyio.to_thread.run_sync(artifacts.remove_job_artifacts, job.id)
+
+    await db.delete(job)
+    await db.commit()
+    await publish_progress_async(job_id, "job", status="DELETED")
     return {"message": "Job deleted"}
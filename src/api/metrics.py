@@ -0,0 +1,58 @@
+import time
+
+import anyio
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Histogram, generate_latest
+
+from src.utils.metrics import QueueDepthCollector
+from src.utils.progress import REDIS_URL
+from src.worker.celery_app import celery_app
+
+router = APIRouter()
+
+QUEUES = sorted({route["queue"] for route in celery_app.conf.task_routes.values()})
+REGISTRY.register(QueueDepthCollector(REDIS_URL, QUEUES))
+
+REQUEST_SECONDS = Histogram(
+    "buglens_http_request_seconds",
+    "API request latency",
+    ["method", "route", "status"],
+)
+
+
+class RequestMetrics:
+    """ASGI middleware timing every request, labelled by route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            # The template (/status/{job_id}), not the raw path, keeps the
+            # label set small
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.labels(scope["method"], route, status).observe(
+                time.perf_counter() - started
+            )
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics of the API process, plus the Celery queue depths."""
+    # Queue depths are read from Redis while collecting
+    body = await anyio.to_thread.run_sync(generate_latest, REGISTRY)
+    return Response(body, media_type=CONTENT_TYPE_LATEST)
@@ -1,4 +1,5 @@
-from typing import Any, Optional
+from datetime import datetime
+from typing import Any
 
 from pydantic import BaseModel
 
@@ -8,9 +9,38 @@ class JobStatusResponse(BaseModel):
     filename: str
     status: str
     file_path: str
-    vision_file_path: Optional[str]
-    summary: Optional[Any] = None
-    result: Optional[dict] = None
+    vision_file_path: str | None
+    summary: Any | None = None
+    result: dict | None = None
+    # Per-stage completion (0-1) while the job is running
+    progress: dict | None = None
 
     class Config:
         from_attributes = True
+
+
+class JobSummary(BaseModel):
+    id: str
+    status: str
+    filename: str
+    created_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
+
+
+class JobListResponse(BaseModel):
+    items: list[JobSummary]
+    # Pass as ?cursor= to get the next page; None on the last page
+    next_cursor: str | None = None
+
+
+class UploadInitRequest(BaseModel):
+    filename: str
+    size: int | None = None
+
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    offset: int
+    chunk_size: int
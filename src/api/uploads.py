@@ -0,0 +1,274 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+
+import anyio
+from fastapi import APIRouter, HTTPException, Request
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.schemas import UploadInitRequest, UploadSessionResponse
+from src.database.models import BugJob
+from src.database.session import AsyncDB
+from src.utils.progress import publish_progress_async
+from src.utils.result_cache import file_sha256
+from src.worker import artifacts
+from src.worker.tasks import start_pipeline
+
+UPLOAD_DIR = Path("/app/data/raw")
+SESSION_DIR = UPLOAD_DIR / ".sessions"
+SESSION_DIR.mkdir(parents=True, exist_ok=True)
+CHUNK_SIZE = 8 * 1024 * 1024
+_SHA256 = re.compile(r"[0-9a-f]{64}")
+VIDEO_SUFFIXES = {".mp4", ".mov", ".mkv", ".webm"}
+# Unfinished uploads untouched for this long are deleted
+UPLOAD_SESSION_TTL = float(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24")) * 3600
+# How often new uploads trigger that sweep (seconds)
+SESSION_SWEEP_INTERVAL = 3600
+
+router = APIRouter(prefix="/uploads")
+
+# Running sha256 per upload session, with the number of bytes it has seen.
+# If it falls out of step (API restart, chunks served by another uvicorn
+# worker) finalize rehashes the partial file instead.
+_hashers = {}
+# One lock per session, so concurrent PUTs (or a PUT and finalize) can't both
+# pass the offset check and interleave their writes. Per process, like
+# _hashers: the API runs a single uvicorn worker.
+_locks = {}
+_last_sweep = 0.0
+
+
+class _RunningHash:
+    def __init__(self):
+        self.sha = hashlib.sha256()
+        self.length = 0
+
+    def update(self, chunk: bytes):
+        self.sha.update(chunk)
+        self.length += len(chunk)
+
+
+def _session_path(upload_id: str) -> Path:
+    # upload ids are server-generated uuids; never trust anything else on disk
+    try:
+        uuid.UUID(upload_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail="Upload not found") from e
+    return SESSION_DIR / f"{upload_id}.json"
+
+
+def _part_path(upload_id: str) -> Path:
+    return SESSION_DIR / f"{upload_id}.part"
+
+
+def _lock(upload_id: str) -> asyncio.Lock:
+    return _locks.setdefault(upload_id, asyncio.Lock())
+
+
+def _forget(upload_id: str):
+    _hashers.pop(upload_id, None)
+    _locks.pop(upload_id, None)
+
+
+def expire_sessions(max_age: float = UPLOAD_SESSION_TTL) -> list:
+    """
+    Deletes upload sessions nobody has written to for `max_age` seconds, and
+    the in-memory state of sessions that no longer exist. Returns their ids.
+    """
+    cutoff = time.time() - max_age
+    expired = []
+    for path in SESSION_DIR.glob("*.json"):
+        upload_id = path.stem
+        part = _part_path(upload_id)
+        try:
+            touched = max(path.stat().st_mtime, part.stat().st_mtime)
+        except FileNotFoundError:
+            touched = 0.0
+        if touched < cutoff:
+            path.unlink(missing_ok=True)
+            part.unlink(missing_ok=True)
+            expired.append(upload_id)
+    for upload_id in list(_hashers.keys() | _locks.keys()):
+        if not (SESSION_DIR / f"{upload_id}.json").exists():
+            _forget(upload_id)
+    if expired:
+        logger.info(f"Expired {len(expired)} abandoned upload sessions")
+    return expired
+
+
+async def _load_session(upload_id: str) -> dict:
+    path = anyio.Path(_session_path(upload_id))
+    if not await path.exists():
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return json.loads(await path.read_text())
+
+
+async def _part_size(upload_id: str) -> int:
+    return (await anyio.Path(_part_path(upload_id)).stat()).st_size
+
+
+def store_upload(part_path: Path, content_hash: str, filename: str) -> tuple:
+    """
+    Moves a fully received upload to its content-addressed location.
+    Returns (path, deduplicated); identical recordings share one file on disk.
+    """
+    suffix = Path(filename).suffix.lower()
+    if suffix not in VIDEO_SUFFIXES:
+        suffix = ".mp4"
+    final_path = UPLOAD_DIR / f"{content_hash}{suffix}"
+
+    if final_path.exists():
+        part_path.unlink(missing_ok=True)
+        return final_path, True
+
+    os.replace(part_path, final_path)
+    return final_path, False
+
+
+def stored_hash(file_path: str) -> str | None:
+    """The content hash a stored upload is named after (see store_upload)."""
+    stem = Path(file_path).stem
+    return stem if _SHA256.fullmatch(stem) else None
+
+
+async def queue_job(
+    db: AsyncSession,
+    filename: str,
+    file_path: Path,
+    content_hash: str,
+    profile: bool = False,
+):
+    new_job = BugJob(
+        filename=filename,
+        file_path=str(file_path),
+        status="PENDING",
+    )
+
+    db.add(new_job)
+    await db.commit()
+    if profile:
+        await anyio.to_thread.run_sync(artifacts.enable_profiling, new_job.id)
+
+    # Publishing to the broker is a blocking Redis round trip
+    await anyio.to_thread.run_sync(
+        start_pipeline, new_job.id, str(file_path), content_hash
+    )
+    await publish_progress_async(new_job.id, "job", status="PENDING")
+    logger.info(f"Created Job {new_job.id} for file {filename}")
+    return new_job
+
+
+@router.post("", response_model=UploadSessionResponse)
+async def init_upload(body: UploadInitRequest):
+    """
+    Starts a resumable upload. Send the file with PUT /uploads/{id}?offset=N.
+    """
+    global _last_sweep
+    if time.time() - _last_sweep >= SESSION_SWEEP_INTERVAL:
+        _last_sweep = time.time()
+        await anyio.to_thread.run_sync(expire_sessions)
+
+    upload_id = str(uuid.uuid4())
+    session = {"filename": body.filename, "size": body.size}
+    await anyio.Path(_session_path(upload_id)).write_text(json.dumps(session))
+    await anyio.Path(_part_path(upload_id)).touch()
+    _hashers[upload_id] = _RunningHash()
+
+    return UploadSessionResponse(upload_id=upload_id, offset=0, chunk_size=CHUNK_SIZE)
+
+
+@router.get("/{upload_id}", response_model=UploadSessionResponse)
+async def upload_offset(upload_id: str):
+    """
+    Where to resume: the number of bytes received so far.
+    """
+    await _load_session(upload_id)
+    offset = await _part_size(upload_id)
+    return UploadSessionResponse(
+        upload_id=upload_id, offset=offset, chunk_size=CHUNK_SIZE
+    )
+
+
+@router.put("/{upload_id}", response_model=UploadSessionResponse)
+async def upload_chunk(upload_id: str, offset: int, request: Request):
+    """
+    Appends the raw request body at `offset`. A mismatched offset returns 409
+    with the server's offset so the client can resume from there.
+    """
+    session = await _load_session(upload_id)
+    part_path = _part_path(upload_id)
+    async with _lock(upload_id):
+        # Checked under the lock: a concurrent PUT at the same offset gets 409
+        current = await _part_size(upload_id)
+        if offset != current:
+            raise HTTPException(
+                status_code=409,
+                detail={"message": "Offset mismatch", "offset": current},
+            )
+
+        hasher = _hashers.get(upload_id)
+        if hasher is not None and hasher.length != offset:
+            hasher = None
+
+        written = 0
+        async with await anyio.open_file(part_path, "ab") as f:
+            async for chunk in request.stream():
+                if session["size"] and current + written + len(chunk) > session["size"]:
+                    raise HTTPException(
+                        status_code=413, detail="More data than declared"
+                    )
+                await f.write(chunk)
+                if hasher is not None:
+                    hasher.update(chunk)
+                written += len(chunk)
+
+    return UploadSessionResponse(
+        upload_id=upload_id, offset=current + written, chunk_size=CHUNK_SIZE
+    )
+
+
+@router.post("/{upload_id}/finalize")
+async def finalize_upload(upload_id: str, db: AsyncDB, profile: bool = False):
+    """
+    Completes the upload, deduplicates it by content hash and queues the job.
+    """
+    async with _lock(upload_id):
+        session = await _load_session(upload_id)
+        part_path = _part_path(upload_id)
+        size = await _part_size(upload_id)
+        if session["size"] and size != session["size"]:
+            raise HTTPException(
+                status_code=409,
+                detail={"message": "Upload incomplete", "offset": size},
+            )
+
+        hasher = _hashers.get(upload_id)
+        if hasher is not None and hasher.length == size:
+            content_hash = hasher.sha.hexdigest()
+        else:
+            content_hash = await anyio.to_thread.run_sync(file_sha256, str(part_path))
+
+        file_path, deduplicated = await anyio.to_thread.run_sync(
+            store_upload, part_path, content_hash, session["filename"]
+        )
+        await anyio.Path(_session_path(upload_id)).unlink(missing_ok=True)
+        _forget(upload_id)
+
+    try:
+        job = await queue_job(
+            db, session["filename"], file_path, content_hash, profile=profile
+        )
+    except Exception as e:
+        logger.exception(f"Upload failed: {e}")
+        await db.rollback()
+        raise HTTPException(
+            status_code=500, detail=f"Internal Server Error: {e!s}"
+        ) from e
+
+    return {"job_id": job.id, "status": "QUEUED", "deduplicated": deduplicated}
@@ -0,0 +1,50 @@
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+from src.database.models import Base
+from src.database.session import DATABASE_URL, SYNC_DRIVERS, with_driver
+
+config = context.config
+target_metadata = Base.metadata
+DEFAULT_URL = with_driver(DATABASE_URL, SYNC_DRIVERS).render_as_string(
+    hide_password=False
+)
+
+
+def run_migrations_offline():
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url") or DEFAULT_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    # init_db hands over its own connection; the CLI builds one from DATABASE_URL
+    connection = config.attributes.get("connection")
+    if connection is None:
+        section = config.get_section(config.config_ini_section, {})
+        section.setdefault("sqlalchemy.url", DEFAULT_URL)
+        connectable = engine_from_config(section, poolclass=pool.NullPool)
+        with connectable.connect() as connection:
+            _run(connection)
+    else:
+        _run(connection)
+
+
+def _run(connection):
+    # Batch mode lets ALTERs work on SQLite
+    context.configure(
+        connection=connection, target_metadata=target_metadata, render_as_batch=True
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,37 @@
+"""Baseline bug_jobs table
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created before migrations existed already have the table
+    if sa.inspect(op.get_bind()).has_table("bug_jobs"):
+        return
+    op.create_table(
+        "bug_jobs",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("filename", sa.String(), nullable=False),
+        sa.Column("file_path", sa.String(), nullable=False),
+        sa.Column("vision_file_path", sa.String(), nullable=True),
+        sa.Column("summary", sa.JSON(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("error_message", sa.String(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("bug_jobs")
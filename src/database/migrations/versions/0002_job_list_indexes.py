@@ -0,0 +1,26 @@
+"""Indexes for the paginated /jobs listing
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (created_at, id) is the keyset cursor; status filters use its own index
+    op.create_index("ix_bug_jobs_created_at_id", "bug_jobs", ["created_at", "id"])
+    op.create_index(
+        "ix_bug_jobs_status_created_at", "bug_jobs", ["status", "created_at", "id"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_bug_jobs_status_created_at", table_name="bug_jobs")
+    op.drop_index("ix_bug_jobs_created_at_id", table_name="bug_jobs")
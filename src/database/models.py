@@ -1,7 +1,7 @@
 import uuid
-from datetime import datetime, timezone
+from datetime import UTC, datetime
 
-from sqlalchemy import JSON, Column, DateTime, String
+from sqlalchemy import JSON, Column, DateTime, Index, String
 from sqlalchemy.orm import DeclarativeBase
 
 
@@ -9,8 +9,19 @@ class Base(DeclarativeBase):
     pass
 
 
+def _utcnow():
+    # Naive UTC: the columns are TIMESTAMP WITHOUT TIME ZONE, and asyncpg
+    # refuses aware datetimes for them
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
 class BugJob(Base):
     __tablename__ = "bug_jobs"
+    # Keyset pagination of /jobs walks (created_at, id), optionally per status
+    __table_args__ = (
+        Index("ix_bug_jobs_created_at_id", "created_at", "id"),
+        Index("ix_bug_jobs_status_created_at", "status", "created_at", "id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     filename = Column(String, nullable=False)
@@ -18,11 +29,8 @@ class BugJob(Base):
     vision_file_path = Column(String, nullable=True)
     summary = Column(JSON, nullable=True)
     status = Column(String, default="PENDING")
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
-    updated_at = Column(
-        DateTime,
-        default=datetime.now(timezone.utc),
-        onupdate=datetime.now(timezone.utc),
-    )
+    # Callables, so each row gets its own timestamp (not the import time)
+    created_at = Column(DateTime, default=_utcnow)
+    updated_at = Column(DateTime, default=_utcnow, onupdate=_utcnow)
     result = Column(JSON, nullable=True)
     error_message = Column(String, nullable=True)
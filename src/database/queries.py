@@ -0,0 +1,75 @@
+import base64
+from datetime import UTC, datetime
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.database.models import BugJob
+
+# Only what the job list shows; result/summary blobs are never loaded
+JOB_LIST_COLUMNS = (BugJob.id, BugJob.status, BugJob.filename, BugJob.created_at)
+
+
+def naive_utc(value: datetime | None) -> datetime | None:
+    """`value` as naive UTC, the way timestamps are stored (see models._utcnow)."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(UTC).replace(tzinfo=None)
+
+
+def encode_cursor(created_at: datetime, job_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{job_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor."""
+    created_at, job_id = base64.urlsafe_b64decode(cursor).decode().split("|", 1)
+    return naive_utc(datetime.fromisoformat(created_at)), job_id
+
+
+def job_page_query(
+    limit: int,
+    cursor: str | None = None,
+    status: list | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+):
+    """
+    One page of jobs, newest first. Keyset pagination on (created_at, id):
+    every page is an index range scan, however deep. Selects one extra row to
+    tell whether there is a next page (see split_page).
+    """
+    query = select(*JOB_LIST_COLUMNS)
+    if status:
+        query = query.where(BugJob.status.in_(status))
+    if created_after:
+        query = query.where(BugJob.created_at >= naive_utc(created_after))
+    if created_before:
+        query = query.where(BugJob.created_at < naive_utc(created_before))
+    if cursor:
+        query = query.where(
+            tuple_(BugJob.created_at, BugJob.id) < tuple_(*decode_cursor(cursor))
+        )
+    query = query.order_by(BugJob.created_at.desc(), BugJob.id.desc())
+    return query.limit(limit + 1)
+
+
+def split_page(rows: list, limit: int) -> tuple:
+    """(rows, next_cursor) from the result of job_page_query."""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+
+def job_page(db: Session, limit: int, **filters) -> tuple:
+    rows = db.execute(job_page_query(limit, **filters)).all()
+    return split_page(rows, limit)
+
+
+async def job_page_async(db: AsyncSession, limit: int, **filters) -> tuple:
+    rows = (await db.execute(job_page_query(limit, **filters))).all()
+    return split_page(rows, limit)
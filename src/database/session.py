@@ -1,24 +1,106 @@
 import os
+from pathlib import Path
+from typing import Annotated
 
+from alembic import command
+from alembic.config import Config
+from fastapi import Depends
 from loguru import logger
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-from src.database.models import Base
-
-# SQLite local database file
+# PostgreSQL in production (docker-compose); a SQLite file is fine locally
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:////app/data/buglens.db")
 
-# connect_args={"check_same_thread": False} is required only for SQLite
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Connection pool per process (PostgreSQL). Size it so that
+# (API workers + Celery processes) * (pool size + overflow) < max_connections
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# How long a SQLite writer waits for the lock before "database is locked"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "30000"))
+
+SYNC_DRIVERS = {"postgres": "postgresql+psycopg", "postgresql": "postgresql+psycopg"}
+ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def with_driver(url: str, drivers: dict):
+    """`url` with the driver for its backend, e.g. postgresql:// -> +asyncpg."""
+    url = make_url(url)
+    driver = drivers.get(url.get_backend_name())
+    return url.set(drivername=driver) if driver else url
+
+
+def engine_options(url) -> dict:
+    if url.get_backend_name() == "sqlite":
+        # check_same_thread=False: sessions are used from FastAPI's threadpool
+        return {
+            "connect_args": {
+                "check_same_thread": False,
+                "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+            }
+        }
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,  # drop connections the server closed
+    }
+
+
+def _sqlite_pragmas(dbapi_connection, _record):
+    # WAL lets the API read while a worker writes; NORMAL sync is safe with WAL
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def make_engine(url: str = DATABASE_URL):
+    url = with_driver(url, SYNC_DRIVERS)
+    engine = create_engine(url, **engine_options(url))
+    if url.get_backend_name() == "sqlite":
+        event.listen(engine, "connect", _sqlite_pragmas)
+    return engine
 
+
+def make_async_engine(url: str = DATABASE_URL):
+    url = with_driver(url, ASYNC_DRIVERS)
+    engine = create_async_engine(url, **engine_options(url))
+    if url.get_backend_name() == "sqlite":
+        event.listen(engine.sync_engine, "connect", _sqlite_pragmas)
+    return engine
+
+
+# Sync sessions for Celery workers, async sessions for the FastAPI routes
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = make_async_engine()
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
 
-def init_db():
-    """Create tables if they don't exist."""
+def init_db(bind=engine):
+    """Brings the schema up to date by applying pending Alembic migrations."""
     logger.info("Initializing database tables...")
-    Base.metadata.create_all(bind=engine)
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    with bind.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
 
 
 def get_db():
@@ -28,3 +110,13 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency to provide an async DB session to async FastAPI routes."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Route parameter type: `db: AsyncDB` gets a session per request
+AsyncDB = Annotated[AsyncSession, Depends(get_async_db)]
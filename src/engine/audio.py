@@ -1,47 +1,115 @@
+import os
 from pathlib import Path
 
 import ffmpeg
+import numpy as np
 from faster_whisper import WhisperModel
 from loguru import logger
 
+from src.utils.metrics import StepTimer
+
+BEAM_SIZE = 5
+SAMPLE_RATE = 16000
+# Voice activity detection skips silent stretches before they reach Whisper
+VAD_FILTER = os.getenv("WHISPER_VAD_FILTER", "true").lower() == "true"
+VAD_MIN_SILENCE_MS = int(os.getenv("WHISPER_VAD_MIN_SILENCE_MS", "500"))
+
 
 class BugLensAudio:
-    def __init__(self, model_size: str = "small"):
-        logger.info(f"Initializing Whisper model: {model_size}")
+    def __init__(
+        self,
+        model_size: str = "small",
+        device: str = "cpu",
+        compute_type: str = "int8",
+        cpu_threads: int = 0,
+    ):
+        logger.info(f"Initializing Whisper model: {model_size} ({compute_type})")
+        self.model_size = model_size
+        self.compute_type = compute_type
         # base is fast; 'large-v3' for higher accuracy with cuda
-        self.model = WhisperModel(model_size, device="cpu", compute_type="int8")
+        # cpu_threads=0 lets CTranslate2 pick its default
+        self.model = WhisperModel(
+            model_size,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+        )
 
-    def process_audio(self, video_path: str):
-        """Extracts audio from video and transcribes it."""
-        video_file = Path(video_path)
-        audio_output = video_file.with_suffix(".wav")
+    def cache_params(self) -> dict:
+        """Settings that change the transcript (part of the result cache key)."""
+        return {
+            "model": self.model_size,
+            "compute_type": self.compute_type,
+            "beam_size": BEAM_SIZE,
+            "vad_filter": VAD_FILTER,
+            "vad_min_silence_ms": VAD_MIN_SILENCE_MS,
+        }
 
-        # Extract audio via ffmpeg
+    def decode_audio(self, video_path: str):
+        """
+        Decodes the soundtrack to 16 kHz mono float32 in memory through an
+        ffmpeg stdout pipe (no temporary .wav). Returns None if it can't.
+        """
+        video_file = Path(video_path)
         try:
             logger.info(f"Extracting audio from {video_file.name}...")
-            (
+            pcm, _ = (
                 ffmpeg.input(str(video_file))
-                .output(str(audio_output), ac=1, ar="16k")
-                .run(overwrite_output=True, quiet=True)
+                .output(
+                    "pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=SAMPLE_RATE
+                )
+                .global_args("-loglevel", "error")
+                .run(capture_stdout=True, capture_stderr=True)
             )
-            logger.debug(f"Temporary audio saved to {audio_output}")
-        except Exception as e:
-            logger.error(f"Error processing audio: {e}")
+        except ffmpeg.Error as e:
+            stderr = e.stderr.decode(errors="ignore").strip()
+            logger.error(f"Error processing audio: {stderr}")
+            return None
+
+        audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        audio /= 32768.0
+        logger.debug(f"Decoded {len(audio) / SAMPLE_RATE:.1f}s of audio")
+        return audio
+
+    def iter_segments(self, audio):
+        """
+        Yields transcript segments as Whisper produces them, so consumers can
+        start before transcription finishes. Silence is skipped by the VAD.
+        """
+        segments, _ = self.model.transcribe(
+            audio,
+            beam_size=BEAM_SIZE,
+            vad_filter=VAD_FILTER,
+            vad_parameters={"min_silence_duration_ms": VAD_MIN_SILENCE_MS},
+        )
+        for segment in segments:
+            yield {
+                "start": round(segment.start, 2),
+                "end": round(segment.end, 2),
+                "text": segment.text.strip(),
+            }
+
+    def process_audio(self, video_path: str, on_segment=None):
+        """
+        Extracts audio from video and transcribes it. `on_segment(segments,
+        watermark, duration)` is called as each segment is transcribed.
+        """
+        timer = StepTimer("audio")
+        with timer("decode"):
+            audio = self.decode_audio(video_path)
+        if audio is None:
             return
 
         # Transcribe
         logger.info("Transcribing audio...")
-        segments, info = self.model.transcribe(str(audio_output), beam_size=5)
-
+        duration = len(audio) / SAMPLE_RATE
         transcript_data = []
-        for segment in segments:
-            transcript_data.append(
-                {
-                    "start": round(segment.start, 2),
-                    "end": round(segment.end, 2),
-                    "text": segment.text.strip(),
-                }
-            )
+        with timer("transcription"):
+            for segment in self.iter_segments(audio):
+                transcript_data.append(segment)
+                if on_segment:
+                    on_segment([segment], segment["end"], duration)
+        timer.observe()
         logger.success(
             f"Transcription complete. Found {len(transcript_data)} segments."
         )
@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import numpy as np
+
+
+class FrameDetections:
+    """
+    Compact per-frame box data produced by the vision engine.
+    One row per box (frame index, xyxy, conf, class id) plus the list of frames
+    YOLO actually looked at, so the renderer knows when boxes disappear.
+    """
+
+    def __init__(self, fps: float, width: int, height: int, names: dict):
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.names = names
+        self.sampled_frames = []
+        self._frames = []
+        self._boxes = []
+        self._conf = []
+        self._cls = []
+
+    def add(self, frame_index: int, boxes, conf, cls):
+        """Records one sampled frame; `boxes` is (N, 4) xyxy in source pixels."""
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        self.sampled_frames.append(frame_index)
+        self._frames.append(np.full(len(boxes), frame_index, dtype=np.int32))
+        self._boxes.append(boxes)
+        self._conf.append(np.asarray(conf, dtype=np.float32).ravel())
+        self._cls.append(np.asarray(cls, dtype=np.int16).ravel())
+
+    @staticmethod
+    def _concat(chunks, dtype, shape=(-1,)):
+        if not chunks:
+            return np.empty(0, dtype=dtype).reshape(shape)
+        return np.concatenate(chunks).astype(dtype, copy=False).reshape(shape)
+
+    def save(self, path: str):
+        ids = sorted(self.names)
+        np.savez_compressed(
+            path,
+            fps=np.float32(self.fps),
+            size=np.array([self.width, self.height], dtype=np.int32),
+            names=np.array([self.names[i] for i in ids]),
+            name_ids=np.array(ids, dtype=np.int16),
+            sampled_frames=np.array(self.sampled_frames, dtype=np.int32),
+            frames=self._concat(self._frames, np.int32),
+            boxes=self._concat(self._boxes, np.float32, (-1, 4)),
+            conf=self._concat(self._conf, np.float32),
+            cls=self._concat(self._cls, np.int16),
+        )
+        return path
+
+
+def load_detections(path: str) -> dict:
+    """Loads a detections file written by FrameDetections.save as plain arrays."""
+    if not Path(path).exists():
+        raise FileNotFoundError(f"Detections missing: {path}")
+
+    with np.load(path) as data:
+        arrays = {key: data[key] for key in data.files}
+
+    arrays["names"] = dict(
+        zip(arrays.pop("name_ids").tolist(), arrays["names"].tolist(), strict=True)
+    )
+    return arrays
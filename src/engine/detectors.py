@@ -0,0 +1,230 @@
+"""
+Inference backends for the vision engine. Each takes a batch of BGR frames and
+returns one (xyxy, conf, cls) triple of NumPy arrays per frame, boxes in source
+pixels, so BugLensVision doesn't care which runtime produced them.
+"""
+
+import ast
+import os
+import shutil
+from pathlib import Path
+
+import cv2
+import numpy as np
+from loguru import logger
+
+# "torch" (Ultralytics/PyTorch) or "onnx" (ONNX Runtime on CPU)
+VISION_BACKEND = os.getenv("VISION_BACKEND", "torch")
+# Inference size of the exported model (long side of the letterboxed frame)
+ONNX_IMGSZ = int(os.getenv("ONNX_IMGSZ", "640"))
+# Exported models are cached here, one file per model and input size
+EXPORT_DIR = Path(os.getenv("MODEL_EXPORT_DIR", "/app/data/models"))
+
+# Same defaults as Ultralytics' predict, so both backends agree
+CONF_THRESHOLD = 0.25
+IOU_THRESHOLD = 0.7
+MAX_DETECTIONS = 300
+PAD_VALUE = 114
+STRIDE = 32
+# Per-class NMS runs as one pass with each class shifted this far apart
+CLASS_OFFSET = 7680
+
+
+class TorchDetector:
+    """YOLO through Ultralytics on PyTorch."""
+
+    backend = "torch"
+
+    def __init__(self, model_path: str, cpu_threads: int = 0):
+        import torch
+        from ultralytics import YOLO
+
+        self.model = YOLO(model_path)
+        self.names = self.model.names
+        if cpu_threads:
+            # Leave the remaining cores to Whisper running alongside
+            torch.set_num_threads(cpu_threads)
+
+    def cache_params(self) -> dict:
+        return {}
+
+    def __call__(self, frames) -> list:
+        # verbose=False keeps the logs clean
+        results = self.model(list(frames), verbose=False)
+        return [
+            (
+                result.boxes.xyxy.cpu().numpy(),
+                result.boxes.conf.cpu().numpy(),
+                result.boxes.cls.cpu().numpy().astype(int),
+            )
+            for result in results
+        ]
+
+
+def export_onnx(
+    model_path: str, imgsz: int = ONNX_IMGSZ, export_dir: Path = EXPORT_DIR
+) -> Path:
+    """
+    The ONNX export of a YOLO checkpoint, exported on first use and cached.
+    Batch and spatial dims are dynamic so one export serves every aspect ratio.
+    """
+    target = Path(export_dir) / f"{Path(model_path).stem}-{imgsz}.onnx"
+    if target.exists():
+        return target
+
+    from ultralytics import YOLO
+
+    logger.info(f"Exporting {model_path} to ONNX ({imgsz}px), cached at {target}")
+    exported = YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=True)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    part = target.with_suffix(f".{os.getpid()}.part")
+    shutil.move(exported, part)
+    # Atomic, so a worker exporting at the same time never sees half a file
+    os.replace(part, target)
+    return target
+
+
+def letterbox_geometry(width: int, height: int, imgsz: int) -> tuple:
+    """
+    (new_w, new_h, pad_x, pad_y, in_w, in_h): the frame scaled so its long side
+    is imgsz, padded to a multiple of STRIDE. That is Ultralytics' own "rect"
+    inference, so the input size is fixed for a video and a 16:9 frame isn't
+    padded out to a square.
+    """
+    gain = min(imgsz / width, imgsz / height)
+    new_w, new_h = round(width * gain), round(height * gain)
+    pad_w, pad_h = (imgsz - new_w) % STRIDE, (imgsz - new_h) % STRIDE
+    return new_w, new_h, pad_w // 2, pad_h // 2, new_w + pad_w, new_h + pad_h
+
+
+def letterbox(frames, geometry: tuple, out: np.ndarray) -> np.ndarray:
+    """
+    Resizes BGR frames (same size) into `out`, a padded (N, 3, in_h, in_w)
+    float32 RGB batch in [0, 1], and returns the filled part.
+    """
+    height, width = frames[0].shape[:2]
+    new_w, new_h, pad_x, pad_y, _, _ = geometry
+    batch = out[: len(frames)]
+    batch.fill(PAD_VALUE / 255)
+
+    for i, frame in enumerate(frames):
+        if (new_w, new_h) != (width, height):
+            frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        # HWC BGR uint8 -> CHW RGB float
+        rgb = frame[..., ::-1].transpose(2, 0, 1)
+        np.multiply(
+            rgb,
+            1 / 255,
+            out=batch[i, :, pad_y : pad_y + new_h, pad_x : pad_x + new_w],
+            casting="unsafe",
+        )
+    return batch
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Greedy non-maximum suppression; indices of the kept boxes, best first."""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        best, rest = order[0], order[1:]
+        keep.append(best)
+        w = np.clip(
+            np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest]), 0, None
+        )
+        h = np.clip(
+            np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest]), 0, None
+        )
+        inter = w * h
+        iou = inter / (areas[best] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=int)
+
+
+def postprocess(
+    prediction: np.ndarray,
+    geometry: tuple,
+    width: int,
+    height: int,
+    conf_threshold: float = CONF_THRESHOLD,
+    iou_threshold: float = IOU_THRESHOLD,
+    max_detections: int = MAX_DETECTIONS,
+) -> tuple:
+    """
+    Decodes one YOLOv8 output (4 + classes, anchors) into (xyxy, conf, cls)
+    in source pixels, after per-class NMS.
+    """
+    prediction = prediction.T
+    scores = prediction[:, 4:]
+    cls = scores.argmax(1)
+    conf = scores[np.arange(len(cls)), cls]
+    mask = conf > conf_threshold
+    cx, cy, w, h = prediction[mask, :4].T
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    conf, cls = conf[mask], cls[mask]
+
+    keep = nms(boxes + cls[:, None] * CLASS_OFFSET, conf, iou_threshold)
+    keep = keep[:max_detections]
+    boxes, conf, cls = boxes[keep], conf[keep], cls[keep]
+
+    # Undo the letterbox
+    new_w, new_h, pad_x, pad_y, _, _ = geometry
+    boxes -= (pad_x, pad_y, pad_x, pad_y)
+    boxes /= (new_w / width, new_h / height, new_w / width, new_h / height)
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+    return boxes.astype(np.float32), conf.astype(np.float32), cls.astype(int)
+
+
+class OnnxDetector:
+    """
+    An exported YOLO model on ONNX Runtime (CPU). Starts faster and uses far
+    less memory than PyTorch; preprocessing and NMS are plain NumPy.
+    """
+
+    backend = "onnx"
+
+    def __init__(self, model_path: str, cpu_threads: int = 0, imgsz: int = ONNX_IMGSZ):
+        import onnxruntime as ort
+
+        if Path(model_path).suffix != ".onnx":
+            model_path = export_onnx(model_path, imgsz)
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = cpu_threads
+        self.session = ort.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata["names"])
+        self.imgsz = imgsz
+        self._buffer = None
+
+    def cache_params(self) -> dict:
+        return {"imgsz": self.imgsz}
+
+    def __call__(self, frames) -> list:
+        height, width = frames[0].shape[:2]
+        geometry = letterbox_geometry(width, height, self.imgsz)
+        # One input buffer, reused for every batch of the same video
+        shape = (len(frames), 3, geometry[5], geometry[4])
+        if self._buffer is None or self._buffer[: len(frames)].shape != shape:
+            self._buffer = np.empty(shape, dtype=np.float32)
+        batch = letterbox(frames, geometry, self._buffer)
+        (predictions,) = self.session.run(None, {self.input_name: batch})
+        return [
+            postprocess(prediction, geometry, width, height)
+            for prediction in predictions
+        ]
+
+
+DETECTORS = {"torch": TorchDetector, "onnx": OnnxDetector}
+
+
+def make_detector(model_path: str, backend: str = VISION_BACKEND, cpu_threads: int = 0):
+    if backend not in DETECTORS:
+        raise ValueError(
+            f"Unknown vision backend {backend!r}, use one of {list(DETECTORS)}"
+        )
+    return DETECTORS[backend](model_path, cpu_threads=cpu_threads)
@@ -1,38 +1,217 @@
+import bisect
+import math
+import os
+
+import numpy as np
 from loguru import logger
 
+FUSION_WINDOW = float(os.getenv("FUSION_WINDOW", "3.0"))
+# Where an event sits on the timeline: "speech_start", "speech_end" or "first_visual"
+FUSION_ANCHOR = os.getenv("FUSION_ANCHOR", "speech_start")
+# Merge events whose windows are at most this many seconds apart (unset: no merge)
+FUSION_MERGE_GAP = os.getenv("FUSION_MERGE_GAP")
+
+ANCHORS = ("speech_start", "speech_end", "first_visual")
+
+
+def _visual_end(entry) -> float:
+    # Tracks span [time, end]; older per-frame entries are a single instant
+    return float(entry.get("end", entry["time"]))
+
+
+class VisualIndex:
+    """
+    Visual log entries (tracks) sorted by start time, with the start and end
+    times in NumPy arrays so a window lookup is two binary searches instead of
+    a scan. No entry spans more than `span` seconds, so every entry overlapping
+    a window starts at most that long before it.
+    """
+
+    def __init__(self, ui_data):
+        times = np.fromiter(
+            (float(f["time"]) for f in ui_data), dtype=np.float64, count=len(ui_data)
+        )
+        if len(times) > 1 and np.any(np.diff(times) < 0):
+            order = np.argsort(times, kind="stable")
+            times = times[order]
+            ui_data = [ui_data[i] for i in order]
+        self.times = times
+        self.ends = np.fromiter(
+            (_visual_end(f) for f in ui_data), dtype=np.float64, count=len(ui_data)
+        )
+        self.span = float((self.ends - self.times).max(initial=0.0))
+        self.entries = ui_data
+
+    def __len__(self):
+        return len(self.entries)
+
+    def overlapping(self, starts, ends) -> list:
+        """Indices of the entries overlapping each [start, end] window."""
+        lo = np.searchsorted(self.times, starts - self.span, side="left")
+        hi = np.searchsorted(self.times, ends, side="right")
+        return [
+            a + np.flatnonzero(self.ends[a:b] >= start)
+            for a, b, start in zip(lo, hi, starts, strict=True)
+        ]
+
 
 class BugLensFusion:
-    def __init__(self, window=3.0):
+    def __init__(
+        self,
+        window: float = FUSION_WINDOW,
+        anchor: str = FUSION_ANCHOR,
+        merge_gap: float | None = None,
+    ):
+        if anchor not in ANCHORS:
+            raise ValueError(f"Unknown fusion anchor: {anchor}")
         self.window = window
+        self.anchor = anchor
+        if merge_gap is None and FUSION_MERGE_GAP:
+            merge_gap = float(FUSION_MERGE_GAP)
+        self.merge_gap = merge_gap
+
+    def cache_params(self) -> dict:
+        return {
+            "window": self.window,
+            "anchor": self.anchor,
+            "merge_gap": self.merge_gap,
+        }
 
     def fuse(self, ui_data, audio_data):
         logger.info("Fusing multimodal signals...")
-        report = []
 
         # Check if we have data to fuse
         if not audio_data:
             logger.warning("No audio data found. Returning vision-only report.")
             return {"status": "Complete", "bug_events": []}
 
-        for speech in audio_data:
-            # Create a time window around the speech segment
-            t_start = max(0, speech["start"] - self.window)
-            t_end = speech["end"] + self.window
-
-            # Match visual frames to this speech window
-            relevant_frames = [
-                f for f in ui_data if t_start <= float(f["time"]) <= t_end
-            ]
-
-            if relevant_frames:
-                logger.info(f"Found visual correlation for: '{speech['text'][:30]}...'")
-                report.append(
-                    {
-                        "time": int(speech["start"]),  # Anchor event to start of speech
-                        "voice": speech["text"],
-                        "visuals": relevant_frames,
-                    }
-                )
+        index = VisualIndex(ui_data or [])
+        speech = sorted(audio_data, key=lambda s: s["start"])
+
+        # Create a time window around every speech segment (windows may overlap;
+        # a visual can then belong to several events)
+        starts = np.array([max(0, s["start"] - self.window) for s in speech])
+        ends = np.array([s["end"] + self.window for s in speech])
+        hits = index.overlapping(starts, ends)
+
+        # Only speech with at least one visual in its window becomes an event
+        matched = [
+            {"speech": [s], "indices": hits[i], "window": (starts[i], ends[i])}
+            for i, s in enumerate(speech)
+            if len(hits[i])
+        ]
+
+        if self.merge_gap is not None:
+            matched = self._merge(matched)
+
+        report = [self._event(m, index) for m in matched]
 
         logger.success(f"Fusion complete. Linked {len(report)} voice-to-visual events.")
         return {"status": "Complete", "bug_events": report}
+
+    def _merge(self, matched):
+        """Merges adjacent events whose windows are at most merge_gap apart."""
+        merged = []
+        for m in matched:
+            prev = merged[-1] if merged else None
+            if prev and m["window"][0] - prev["window"][1] <= self.merge_gap:
+                prev["speech"].extend(m["speech"])
+                # A visual in both windows is only listed once
+                prev["indices"] = np.union1d(prev["indices"], m["indices"])
+                prev["window"] = (
+                    prev["window"][0],
+                    max(prev["window"][1], m["window"][1]),
+                )
+            else:
+                merged.append(m)
+        return merged
+
+    def _event(self, match, index):
+        first, last = match["speech"][0], match["speech"][-1]
+        visuals = [index.entries[i] for i in match["indices"]]
+
+        if self.anchor == "speech_end":
+            anchor_time = last["end"]
+        elif self.anchor == "first_visual":
+            anchor_time = index.times[match["indices"][0]]
+        else:
+            anchor_time = first["start"]
+
+        return {
+            "time": int(anchor_time),
+            "voice": " ".join(s["text"] for s in match["speech"]),
+            "visuals": visuals,
+        }
+
+
+class IncrementalFusion:
+    """
+    Builds bug events while vision and audio are still running. Each stream
+    reports a watermark: the video time up to which it has emitted everything.
+    A speech segment becomes an event once the vision watermark has passed the
+    end of its window, so events already in the timeline never change.
+    """
+
+    def __init__(self, window: float = FUSION_WINDOW, anchor: str = FUSION_ANCHOR):
+        # merge_gap is left to the final fuse; partial events stay one per segment
+        self.fusion = BugLensFusion(window=window, anchor=anchor, merge_gap=None)
+        self.times = []
+        self.ends = []
+        self.span = 0.0
+        self.entries = []
+        self.pending = []
+        self.events = []
+        self.vision_watermark = 0.0
+        self.audio_watermark = 0.0
+
+    def add_visuals(self, entries, watermark: float):
+        for entry in entries:
+            t, end = float(entry["time"]), _visual_end(entry)
+            self.span = max(self.span, end - t)
+            # Vision emits mostly in time order; insort only for stragglers
+            i = len(self.times)
+            if self.times and t < self.times[-1]:
+                i = bisect.bisect_right(self.times, t)
+            self.times.insert(i, t)
+            self.ends.insert(i, end)
+            self.entries.insert(i, entry)
+        self.vision_watermark = max(self.vision_watermark, watermark)
+        self._resolve()
+
+    def add_speech(self, segments, watermark: float):
+        self.pending.extend(segments)
+        self.audio_watermark = max(self.audio_watermark, watermark)
+        self._resolve()
+
+    def _resolve(self):
+        window = self.fusion.window
+        ready, waiting = [], []
+        for s in self.pending:
+            done = s["end"] + window <= self.vision_watermark
+            (ready if done else waiting).append(s)
+        if not ready:
+            return
+        self.pending = waiting
+
+        for s in sorted(ready, key=lambda s: s["start"]):
+            start = max(0, s["start"] - window)
+            lo = bisect.bisect_left(self.times, start - self.span)
+            hi = bisect.bisect_right(self.times, s["end"] + window)
+            indices = [i for i in range(lo, hi) if self.ends[i] >= start]
+            if indices:
+                match = {"speech": [s], "indices": indices}
+                self.events.append(self.fusion._event(match, self))
+        self.events.sort(key=lambda e: e["time"])
+
+    @property
+    def watermark(self) -> float:
+        """Video time up to which the partial timeline is final."""
+        return min(self.vision_watermark, self.audio_watermark)
+
+    def snapshot(self) -> dict:
+        watermark = self.watermark
+        return {
+            "status": "Partial",
+            "bug_events": list(self.events),
+            "watermark": None if math.isinf(watermark) else round(watermark, 2),
+        }
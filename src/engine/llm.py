@@ -0,0 +1,156 @@
+import asyncio
+import itertools
+import json
+import os
+import threading
+
+import httpx
+from loguru import logger
+
+# Comma-separated Ollama base URLs; requests are spread round-robin
+OLLAMA_URLS = [
+    url.strip().rstrip("/")
+    for url in os.getenv("OLLAMA_URLS", "http://host.docker.internal:11434").split(",")
+    if url.strip()
+]
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:3b")
+# Concurrent generations per Ollama host (per worker process)
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "2"))
+OLLAMA_MAX_RETRIES = int(os.getenv("OLLAMA_MAX_RETRIES", "3"))
+OLLAMA_RETRY_BACKOFF = float(os.getenv("OLLAMA_RETRY_BACKOFF", "1.0"))
+# Streaming: the read timeout applies between tokens, not to the whole answer
+OLLAMA_READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "60"))
+
+
+class LLMError(Exception):
+    pass
+
+
+class _Retryable(LLMError):
+    pass
+
+
+class BugLensLLM:
+    """
+    Async Ollama client: one pooled httpx client, streamed responses, at most
+    `max_concurrency` generations per host, retries with exponential backoff,
+    each attempt going to the next host round-robin.
+    """
+
+    def __init__(
+        self,
+        urls: list = OLLAMA_URLS,
+        model: str = OLLAMA_MODEL,
+        max_concurrency: int = OLLAMA_MAX_CONCURRENCY,
+        max_retries: int = OLLAMA_MAX_RETRIES,
+        retry_backoff: float = OLLAMA_RETRY_BACKOFF,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        if not urls:
+            raise ValueError("No Ollama URLs configured")
+        self.urls = list(urls)
+        self.model = model
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._hosts = itertools.cycle(self.urls)
+        self._limits = {url: asyncio.Semaphore(max_concurrency) for url in self.urls}
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(OLLAMA_READ_TIMEOUT, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=max_concurrency * len(self.urls),
+                max_keepalive_connections=max_concurrency * len(self.urls),
+            ),
+            transport=transport,
+        )
+
+    async def generate(self, prompt: str, options: dict | None = None) -> str:
+        """Returns the full completion for `prompt`; raises LLMError on failure."""
+        for attempt in range(self.max_retries + 1):
+            url = next(self._hosts)
+            try:
+                async with self._limits[url]:
+                    return await self._stream(url, prompt, options)
+            except (httpx.TransportError, _Retryable) as e:
+                if attempt == self.max_retries:
+                    raise LLMError(f"Ollama unavailable after {attempt + 1} tries: {e}")
+                delay = self.retry_backoff * 2**attempt
+                logger.warning(f"Ollama call to {url} failed ({e}), retry in {delay}s")
+                await asyncio.sleep(delay)
+
+    async def _stream(self, url: str, prompt: str, options: dict | None) -> str:
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": True,
+            "options": options or {},
+        }
+        parts = []
+        async with self.client.stream(
+            "POST", f"{url}/api/generate", json=payload
+        ) as res:
+            if res.status_code >= 500 or res.status_code == 429:
+                raise _Retryable(f"HTTP {res.status_code}")
+            if res.status_code != 200:
+                await res.aread()
+                raise LLMError(f"Ollama returned {res.status_code}: {res.text}")
+
+            # One JSON object per line: {"response": "<tokens>", "done": false}
+            async for line in res.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise _Retryable(chunk["error"])
+                parts.append(chunk.get("response", ""))
+                if chunk.get("done"):
+                    break
+            else:
+                raise _Retryable("stream ended before done")
+        return "".join(parts)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_loop = None
+_loop_pid = None
+_client = None
+_lock = threading.Lock()
+
+
+def _event_loop():
+    # One loop per worker process, running in a background thread; recreated
+    # after a fork since the thread doesn't survive it
+    global _loop, _loop_pid, _client
+    with _lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            _client = None
+            threading.Thread(
+                target=_loop.run_forever, name="llm-loop", daemon=True
+            ).start()
+        return _loop
+
+
+def run(coro):
+    """
+    Runs `coro` on the process's persistent event loop and waits for it.
+    Safe from any thread, so Celery's thread pool shares one client and one
+    set of per-host limits.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _event_loop()).result()
+
+
+def get_llm() -> BugLensLLM:
+    """The process-wide client, created on the persistent loop."""
+    global _client
+    loop = _event_loop()
+    with _lock:
+        if _client is None:
+
+            async def create():
+                return BugLensLLM()
+
+            _client = asyncio.run_coroutine_threadsafe(create(), loop).result()
+        return _client
@@ -0,0 +1,206 @@
+import os
+from collections import defaultdict
+
+# Rough size of the data section; the instructions and the answer need the rest
+# of the model's context window
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1500"))
+CHARS_PER_TOKEN = 4
+# Detections of a label at most this far apart (seconds) form one run
+RUN_GAP = float(os.getenv("PROMPT_RUN_GAP", "1.0"))
+MAX_LABELS_PER_EVENT = 4
+MAX_RUNS_PER_LABEL = 3
+MAX_VOICE_CHARS = 160
+
+TEMPLATE = """
+### ROLE
+You are 'BugLens Advisor', an expert QA Automation Engineer. Your task is to analyze raw metadata from a screen recording and identify discrepancies.
+
+### DATA INPUT
+Seen on screen (YOLO, whole video): {labels}
+
+Speech with what was on screen around it (Whisper + YOLO; label start-end, max confidence, frames):
+{events}
+
+Other speech:
+{speech}
+
+### INSTRUCTIONS
+1. **Compare** the user's intent (Speech) with the system's reality (Detections).
+2. **Identify Anomaly**: Is there a "Mismatch"? (e.g., User says "I'm clicking Login" but YOLO only sees "Error Popup").
+3. **Tone**: Be professional, concise, and technical.
+
+### OUTPUT FORMAT
+Return your response using this EXACT Markdown structure:
+**Executive Summary**: (One sentence)
+**User Intent**: (What the user was trying to do)
+**Visual Evidence**: (What was actually seen on screen)
+**Verdict**: (BUG, ANOMALY, or EXPECTED BEHAVIOR)
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _clock(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+def _clip(text: str, limit: int = MAX_VOICE_CHARS) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+def label_runs(visuals: list) -> dict:
+    """
+    Collapses tracks (or per-frame detections) into runs per label:
+    {label: [(start, end, max_conf, frames), ...]}, one run per stretch of
+    time where the label keeps showing up.
+    """
+    runs = defaultdict(list)
+    for visual in sorted(visuals, key=lambda v: v["time"]):
+        t = float(visual["time"])
+        end = float(visual.get("end", t))
+        seen = visual.get("frames", 1)
+        best = {}
+        for det in visual.get("detections", []):
+            best[det["label"]] = max(best.get(det["label"], 0.0), det["conf"])
+        for label, conf in best.items():
+            spans = runs[label]
+            if spans and t - spans[-1][1] <= RUN_GAP:
+                start, last, top, frames = spans[-1]
+                spans[-1] = (start, max(last, end), max(top, conf), frames + seen)
+            else:
+                spans.append((t, end, conf, seen))
+    return dict(runs)
+
+
+def _evidence(runs: dict) -> str:
+    # Strongest labels first; per label its strongest runs, shown in time order
+    ranked = sorted(runs.items(), key=lambda kv: -max(r[2] for r in kv[1]))
+    parts = []
+    for label, spans in ranked[:MAX_LABELS_PER_EVENT]:
+        top = sorted(spans, key=lambda r: -r[2])[:MAX_RUNS_PER_LABEL]
+        ranges = ", ".join(
+            f"{start:.1f}-{end:.1f}s {conf:.2f} x{frames}"
+            if frames > 1
+            else f"{start:.1f}s {conf:.2f}"
+            for start, end, conf, frames in sorted(top)
+        )
+        parts.append(f"{label} ({ranges})")
+    if len(ranked) > MAX_LABELS_PER_EVENT:
+        parts.append(f"+{len(ranked) - MAX_LABELS_PER_EVENT} more labels")
+    return "; ".join(parts) if parts else "nothing detected"
+
+
+def _label_totals(visuals: list, budget: int) -> str:
+    """
+    Every label YOLO saw, strongest first, within `budget` tokens; the weakest
+    labels are dropped with a count when they don't all fit.
+    """
+    frames, top = defaultdict(int), defaultdict(float)
+    for label, spans in label_runs(visuals).items():
+        frames[label] += sum(r[3] for r in spans)
+        top[label] = max(top[label], max(r[2] for r in spans))
+    if not frames:
+        return "no detections"
+    ranked = sorted(frames, key=lambda label: -top[label])
+    parts, used = [], 0
+    for label in ranked:
+        part = f"{label} (max {top[label]:.2f}, x{frames[label]})"
+        # Room for the separator and the "+N more labels" note
+        cost = estimate_tokens(part + ", ") + 4
+        if used + cost > budget:
+            break
+        parts.append(part)
+        used += cost
+    if len(parts) < len(ranked):
+        parts.append(f"+{len(ranked) - len(parts)} more labels")
+    return ", ".join(parts)
+
+
+def _fit(lines: list, budget: int, what: str) -> list:
+    """
+    Keeps the highest-scoring (score, time, text) lines that fit in `budget`
+    tokens, back in time order, with a note on how many were dropped.
+    """
+    kept, used = [], 0
+    for score, time, text in sorted(lines, key=lambda line: (-line[0], line[1])):
+        cost = estimate_tokens(text)
+        if used + cost > budget:
+            continue
+        kept.append((time, text))
+        used += cost
+    out = [text for _, text in sorted(kept)]
+    if len(kept) < len(lines):
+        out.append(f"... {len(lines) - len(kept)} {what} omitted")
+    return out
+
+
+def build_digest(
+    bug_events: list,
+    transcript: list | None = None,
+    budget=None,
+    visuals: list | None = None,
+) -> dict:
+    """
+    Compact, token-budgeted view of a fusion report: labels deduplicated,
+    per-frame detections collapsed into time ranges, and only the
+    highest-confidence evidence kept when everything doesn't fit.
+    `visuals` is the vision stage's whole timeline, for the label totals;
+    without it they only cover what was seen around speech.
+    """
+    budget = PROMPT_TOKEN_BUDGET if budget is None else budget
+    if visuals is None:
+        visuals = [v for event in bug_events for v in event.get("visuals", [])]
+    labels = _label_totals(visuals, budget // 4)
+
+    event_lines, voiced = [], set()
+    for event in bug_events:
+        runs = label_runs(event.get("visuals", []))
+        score = max((r[2] for rs in runs.values() for r in rs), default=0.0)
+        voice = _clip(event.get("voice", ""))
+        voiced.add(voice)
+        event_lines.append(
+            (
+                score,
+                event["time"],
+                f'- [{_clock(event["time"])}] "{voice}" -> {_evidence(runs)}',
+            )
+        )
+
+    # Speech the events already quote isn't repeated; consecutive repeats collapse
+    speech_lines, last = [], None
+    for segment in transcript or []:
+        text = _clip(segment.get("text", ""))
+        if not text or text in voiced or text == last:
+            continue
+        last = text
+        speech_lines.append(
+            (0.0, segment["start"], f'- [{_clock(segment["start"])}] "{text}"')
+        )
+
+    remaining = budget - estimate_tokens(labels)
+    events = _fit(
+        event_lines, remaining * 2 // 3 if speech_lines else remaining, "events"
+    )
+    remaining -= sum(estimate_tokens(line) for line in events)
+    speech = _fit(speech_lines, remaining, "speech segments")
+    return {
+        "labels": labels,
+        "events": "\n".join(events) or "- none",
+        "speech": "\n".join(speech) or "- none",
+    }
+
+
+def build_prompt(
+    report: dict,
+    transcript: list | None = None,
+    budget=None,
+    visuals: list | None = None,
+) -> str:
+    """The summary prompt for a fusion report (see build_digest)."""
+    return TEMPLATE.format(
+        **build_digest(report.get("bug_events", []), transcript, budget, visuals)
+    )
@@ -0,0 +1,100 @@
+import os
+from pathlib import Path
+
+import cv2
+import numpy as np
+from loguru import logger
+
+from src.engine.detections import load_detections
+from src.engine.video_io import FFmpegReader, FFmpegWriter, probe_video
+from src.utils.metrics import StepTimer
+
+
+def _color(class_id: int):
+    # Stable, well-spread BGR color per class
+    hue = (class_id * 47) % 180
+    hsv = np.uint8([[[hue, 200, 255]]])
+    return tuple(int(c) for c in cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)[0, 0])
+
+
+class BugLensRenderer:
+    """Draws stored detections onto the original video to build the 'AI Vision' clip."""
+
+    def render(self, video_path: str, detections_path: str, output_path: str):
+        """
+        Renders the overlay video straight to browser-ready H.264.
+        Frames between two sampled frames keep the boxes of the earlier one.
+        """
+        det = load_detections(detections_path)
+        names = det["names"]
+        frames, boxes, conf, cls = det["frames"], det["boxes"], det["conf"], det["cls"]
+        sampled = det["sampled_frames"]
+
+        meta = probe_video(video_path)
+        width, height = meta["width"], meta["height"]
+        fps = meta["fps"] or float(det["fps"])
+
+        # Written under a temporary name so a half-rendered file is never
+        # mistaken for a cached one
+        part_path = str(Path(output_path).with_suffix(".part.mp4"))
+
+        logger.info(f"Rendering AI Vision overlay for {video_path}...")
+
+        # Single pass: ffmpeg decode -> overlay in numpy -> ffmpeg libx264 encode
+        timer = StepTimer("render")
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame_count = 0
+        next_sample = 0  # position in `sampled`
+        rows = slice(0, 0)  # boxes currently on screen
+        try:
+            with (
+                timer("transcode"),
+                FFmpegReader(video_path, width, height) as reader,
+                FFmpegWriter(part_path, width, height, fps) as writer,
+            ):
+                while True:
+                    with timer("decode"):
+                        if not reader.read_into(frame):
+                            break
+                    # Advance to the latest sampled frame at or before this one
+                    while (
+                        next_sample < len(sampled)
+                        and sampled[next_sample] <= frame_count
+                    ):
+                        idx = sampled[next_sample]
+                        rows = slice(
+                            np.searchsorted(frames, idx, side="left"),
+                            np.searchsorted(frames, idx, side="right"),
+                        )
+                        next_sample += 1
+
+                    with timer("plot"):
+                        self._draw(frame, boxes[rows], conf[rows], cls[rows], names)
+                    with timer("encode"):
+                        writer.write(frame)
+                    frame_count += 1
+
+            os.replace(part_path, output_path)
+        finally:
+            Path(part_path).unlink(missing_ok=True)
+
+        timer.observe(dict.fromkeys(timer.seconds, frame_count))
+        logger.success(f"AI Vision video rendered: {output_path}")
+        return output_path
+
+    @staticmethod
+    def _draw(frame, boxes, conf, cls, names):
+        for (x1, y1, x2, y2), p, c in zip(boxes, conf, cls, strict=True):
+            color = _color(int(c))
+            p1, p2 = (int(x1), int(y1)), (int(x2), int(y2))
+            cv2.rectangle(frame, p1, p2, color, 2)
+            cv2.putText(
+                frame,
+                f"{names.get(int(c), c)} {p:.2f}",
+                (p1[0], max(p1[1] - 6, 12)),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.5,
+                color,
+                1,
+                cv2.LINE_AA,
+            )
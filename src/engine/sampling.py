@@ -0,0 +1,122 @@
+import os
+
+import cv2
+import numpy as np
+
+# Which frames go through YOLO: "stride", "rate" or "scene"
+SAMPLING_POLICY = os.getenv("VISION_SAMPLING", "rate")
+SAMPLE_STRIDE = int(os.getenv("VISION_SAMPLE_STRIDE", "30"))
+SAMPLES_PER_SECOND = float(os.getenv("VISION_SAMPLES_PER_SECOND", "1"))
+# Mean absolute difference (0-255) of the thumbnails that counts as a new screen
+SCENE_THRESHOLD = float(os.getenv("VISION_SCENE_THRESHOLD", "4.0"))
+# Re-check a static screen at least this often so fusion windows still find visuals
+SCENE_MAX_GAP = float(os.getenv("VISION_SCENE_MAX_GAP", "5.0"))
+
+
+class StrideSampler:
+    """Samples every `stride`-th frame."""
+
+    needs_pixels = False
+
+    def __init__(self, stride: int):
+        self.stride = max(int(stride), 1)
+
+    def should_sample(self, frame_index: int, frame) -> bool:
+        return frame_index % self.stride == 0
+
+    def select_expr(self) -> str:
+        """The same choice as an ffmpeg `select` expression over frame number n."""
+        return f"not(mod(n\\,{self.stride}))"
+
+
+class RateSampler:
+    """Samples `samples_per_second` frames per second of video."""
+
+    needs_pixels = False
+
+    def __init__(self, samples_per_second: float, fps: float):
+        if samples_per_second <= 0:
+            # Would pick frame 0 and never another one
+            raise ValueError(f"Samples per second must be > 0: {samples_per_second}")
+        self.rate = samples_per_second
+        self.fps = fps or 30.0
+        self._last_slot = -1
+
+    def should_sample(self, frame_index: int, frame) -> bool:
+        slot = int(frame_index * self.rate / self.fps)
+        if slot == self._last_slot:
+            return False
+        self._last_slot = slot
+        return True
+
+    def select_expr(self) -> str:
+        """should_sample as an ffmpeg `select` expression (same double math)."""
+
+        def slot(n):
+            return f"floor({n}*{self.rate!r}/{self.fps!r})"
+
+        return f"eq(n\\,0)+gt({slot('n')}\\,{slot('(n-1)')})"
+
+
+class SceneChangeSampler:
+    """
+    Samples a frame only when the screen visibly changed since the last sample.
+    Compares 32x32 grayscale thumbnails, which costs far less than a YOLO pass.
+    """
+
+    needs_pixels = True
+
+    def __init__(
+        self,
+        fps: float,
+        threshold: float = SCENE_THRESHOLD,
+        max_gap: float = SCENE_MAX_GAP,
+    ):
+        self.threshold = threshold
+        self.max_gap_frames = max(int((fps or 30.0) * max_gap), 1)
+        self._last_thumb = None
+        self._last_index = None
+
+    @staticmethod
+    def _thumbnail(frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def should_sample(self, frame_index: int, frame) -> bool:
+        thumb = self._thumbnail(frame)
+
+        if (
+            self._last_thumb is None
+            or frame_index - self._last_index >= self.max_gap_frames
+        ):
+            changed = True
+        else:
+            changed = np.abs(thumb - self._last_thumb).mean() >= self.threshold
+
+        if changed:
+            self._last_thumb = thumb
+            self._last_index = frame_index
+        return changed
+
+
+def sampling_params() -> dict:
+    return {
+        "policy": SAMPLING_POLICY,
+        "stride": SAMPLE_STRIDE,
+        "rate": SAMPLES_PER_SECOND,
+        "scene_threshold": SCENE_THRESHOLD,
+        "scene_max_gap": SCENE_MAX_GAP,
+    }
+
+
+def make_sampler(fps: float, policy: str = SAMPLING_POLICY):
+    """Builds a fresh (stateful) sampler for one video."""
+    if policy == "stride":
+        if SAMPLE_STRIDE < 1:
+            raise ValueError(f"VISION_SAMPLE_STRIDE must be >= 1: {SAMPLE_STRIDE}")
+        return StrideSampler(SAMPLE_STRIDE)
+    if policy == "rate":
+        return RateSampler(SAMPLES_PER_SECOND, fps)
+    if policy == "scene":
+        return SceneChangeSampler(fps)
+    raise ValueError(f"Unknown sampling policy: {policy}")
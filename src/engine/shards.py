@@ -0,0 +1,145 @@
+import csv
+import os
+import subprocess
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+from src.engine.detections import load_detections
+
+# Videos longer than this are split into shards of about this length (seconds)
+# that vision/audio workers process in parallel; 0 disables sharding
+SHARD_SECONDS = float(os.getenv("SHARD_SECONDS", "300"))
+
+
+def split_video(video_path: str, out_dir: str, shard_seconds: float = SHARD_SECONDS):
+    """
+    Splits a video into ~`shard_seconds` shards with ffmpeg's segment muxer.
+    Streams are copied, not re-encoded, so every cut lands on the first
+    keyframe after the requested time. Returns one
+    {"index", "path", "start", "end"} dict per shard, times in seconds of the
+    source video.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    suffix = Path(video_path).suffix or ".mp4"
+    shard_list = out_dir / "shards.csv"
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-v",
+        "error",
+        "-i",
+        video_path,
+        "-map",
+        "0:v:0",
+        "-map",
+        "0:a?",
+        "-c",
+        "copy",
+        # Shifting B-frame timestamps to non-negative would skew the list's
+        # start times by the decoder delay
+        "-avoid_negative_ts",
+        "disabled",
+        "-f",
+        "segment",
+        "-segment_time",
+        f"{shard_seconds:.3f}",
+        "-reset_timestamps",
+        "1",
+        "-segment_list",
+        str(shard_list),
+        "-segment_list_type",
+        "csv",
+        str(out_dir / f"shard%03d{suffix}"),
+    ]
+    subprocess.run(cmd, check=True, capture_output=True)
+
+    # One "name,start,end" row per shard, start/end as cut from the source
+    with open(shard_list, newline="") as f:
+        rows = [row for row in csv.reader(f) if row]
+    shards = [
+        {
+            "index": index,
+            "path": str(out_dir / name),
+            "start": float(start),
+            "end": float(end),
+        }
+        for index, (name, start, end) in enumerate(rows)
+    ]
+    logger.info(f"Split {Path(video_path).name} into {len(shards)} shards")
+    return shards
+
+
+def offset_ui_logs(ui_logs: list, offset: float) -> list:
+    """A shard's vision timeline shifted onto the source video's clock."""
+    shifted = []
+    for log in ui_logs:
+        log = {**log, "time": round(log["time"] + offset, 2)}
+        if "end" in log:
+            log["end"] = round(log["end"] + offset, 2)
+        shifted.append(log)
+    return shifted
+
+
+def merge_ui_logs(parts: list) -> list:
+    """
+    Joins shard vision timelines (already on the source clock). Every shard's
+    tracker numbers its tracks from 0, so each shard's ids are shifted past
+    the ones before it to keep them unique.
+    """
+    merged, next_id = [], 0
+    for part in parts:
+        ids = [log["track"] for log in part if "track" in log]
+        merged.extend(
+            {**log, "track": log["track"] + next_id} if "track" in log else log
+            for log in part
+        )
+        next_id += max(ids, default=-1) + 1
+    return merged
+
+
+def offset_transcript(segments: list | None, offset: float) -> list | None:
+    """A shard's transcript shifted onto the source video's clock."""
+    if segments is None:
+        return None
+    return [
+        {**s, "start": s["start"] + offset, "end": s["end"] + offset} for s in segments
+    ]
+
+
+def merge_detections(parts: list, output_path: str) -> str:
+    """
+    Joins shard detection files (`parts`: [(path, offset_seconds), ...]) into
+    one file for the whole video, frame indices shifted by each shard's start.
+    """
+    loaded = [(load_detections(path), offset) for path, offset in parts]
+    first = loaded[0][0]
+    fps = float(first["fps"])
+
+    names = {}
+    for det, _ in loaded:
+        names.update(det["names"])
+    ids = sorted(names)
+
+    def shifted(key, det, offset):
+        return det[key] + round(float(offset * fps))
+
+    np.savez_compressed(
+        output_path,
+        fps=np.float32(fps),
+        size=first["size"],
+        names=np.array([names[i] for i in ids]),
+        name_ids=np.array(ids, dtype=np.int16),
+        sampled_frames=np.concatenate(
+            [shifted("sampled_frames", d, o) for d, o in loaded]
+        ).astype(np.int32),
+        frames=np.concatenate([shifted("frames", d, o) for d, o in loaded]).astype(
+            np.int32
+        ),
+        boxes=np.concatenate([d["boxes"] for d, _ in loaded]).reshape(-1, 4),
+        conf=np.concatenate([d["conf"] for d, _ in loaded]),
+        cls=np.concatenate([d["cls"] for d, _ in loaded]),
+    )
+    return output_path
@@ -0,0 +1,139 @@
+"""
+Links the vision engine's per-frame detections into tracks, so the timeline
+holds one entry per object on screen (when it appeared, when it was last seen,
+its peak confidence and a representative box) instead of one per sampled frame.
+"""
+
+import os
+
+import numpy as np
+
+# A detection continues a track of the same label when its box overlaps the
+# track's last box at least this much
+TRACK_IOU = float(os.getenv("TRACK_IOU", "0.3"))
+# Seconds a track survives without being seen (missed samples, flicker)
+TRACK_MAX_GAP = float(os.getenv("TRACK_MAX_GAP", "2.5"))
+# Longer tracks are cut into pieces of at most this many seconds, which bounds
+# how far behind the partial timeline can run and how far back fusion looks
+TRACK_MAX_SECONDS = float(os.getenv("TRACK_MAX_SECONDS", "30"))
+
+
+def tracking_params() -> dict:
+    return {
+        "iou": TRACK_IOU,
+        "max_gap": TRACK_MAX_GAP,
+        "max_seconds": TRACK_MAX_SECONDS,
+    }
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU of every box in `a` (N, 4) with every box in `b` (M, 4), xyxy."""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+class IoUTracker:
+    """
+    Greedy IoU tracker over sampled frames. `update` takes one frame's
+    detections and returns the tracks that ended before it; `flush` ends the
+    rest. A finished track is a timeline entry:
+    {"time": first seen, "end": last seen, "track": id, "frames": n,
+     "detections": [{"label", "conf": peak, "box": box at the peak}]}.
+    """
+
+    def __init__(
+        self,
+        iou_threshold: float = TRACK_IOU,
+        max_gap: float = TRACK_MAX_GAP,
+        max_seconds: float = TRACK_MAX_SECONDS,
+    ):
+        self.iou_threshold = iou_threshold
+        self.max_gap = max_gap
+        self.max_seconds = max_seconds
+        self.tracks = []  # open tracks
+        self._next_id = 0
+
+    @property
+    def open_since(self) -> float | None:
+        """Start of the oldest open track; earlier tracks are all finished."""
+        return min((t["start"] for t in self.tracks), default=None)
+
+    def update(self, time: float, boxes, conf, labels) -> list:
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        finished, still_open = [], []
+        for t in self.tracks:
+            ended = (
+                time - t["last"] > self.max_gap or time - t["start"] >= self.max_seconds
+            )
+            (finished if ended else still_open).append(t)
+        self.tracks = still_open
+
+        unmatched = set(range(len(boxes)))
+        if self.tracks and len(boxes):
+            iou = box_iou(np.array([t["box"] for t in self.tracks]), boxes)
+            track_labels = np.array([t["label"] for t in self.tracks])
+            iou[track_labels[:, None] != np.array(labels)[None, :]] = 0.0
+            # Best overlaps first, each track and detection used once
+            taken = set()
+            for flat in np.argsort(-iou, axis=None):
+                i, j = divmod(int(flat), len(boxes))
+                if iou[i, j] < self.iou_threshold:
+                    break
+                if i in taken or j not in unmatched:
+                    continue
+                taken.add(i)
+                unmatched.discard(j)
+                self._extend(self.tracks[i], time, boxes[j], float(conf[j]))
+
+        for j in sorted(unmatched):
+            self.tracks.append(
+                {
+                    "id": self._next_id,
+                    "label": labels[j],
+                    "start": time,
+                    "last": time,
+                    "frames": 1,
+                    "box": boxes[j],
+                    "peak": float(conf[j]),
+                    "peak_box": boxes[j],
+                }
+            )
+            self._next_id += 1
+        return self._entries(finished)
+
+    def flush(self) -> list:
+        finished, self.tracks = self.tracks, []
+        return self._entries(finished)
+
+    @staticmethod
+    def _extend(track: dict, time: float, box, conf: float):
+        track["last"] = time
+        track["frames"] += 1
+        track["box"] = box
+        if conf > track["peak"]:
+            track["peak"], track["peak_box"] = conf, box
+
+    @staticmethod
+    def _entries(tracks: list) -> list:
+        return [
+            {
+                "time": round(t["start"], 2),
+                "end": round(t["last"], 2),
+                "track": t["id"],
+                "frames": t["frames"],
+                "detections": [
+                    {
+                        "label": t["label"],
+                        "conf": round(t["peak"], 2),
+                        "box": [round(float(v)) for v in t["peak_box"]],
+                    }
+                ],
+            }
+            for t in sorted(tracks, key=lambda t: (t["start"], t["id"]))
+        ]
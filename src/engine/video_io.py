@@ -0,0 +1,209 @@
+import subprocess
+from fractions import Fraction
+
+import ffmpeg
+import numpy as np
+
+
+def _rate(value: str | None) -> float:
+    # ffprobe reports "0/0" when it doesn't know
+    num, _, den = (value or "0/0").partition("/")
+    return float(Fraction(int(num), int(den))) if den and int(den) else 0.0
+
+
+def probe_video(video_path: str) -> dict:
+    """Width, height, fps and duration of the first video stream."""
+    info = ffmpeg.probe(video_path)
+    stream = next(s for s in info["streams"] if s["codec_type"] == "video")
+    return {
+        "width": int(stream["width"]),
+        "height": int(stream["height"]),
+        "fps": _rate(stream.get("avg_frame_rate"))
+        or _rate(stream.get("r_frame_rate"))
+        or 30.0,
+        "duration": float(info["format"].get("duration", 0.0)),
+    }
+
+
+def parse_roi(value: str | None) -> tuple | None:
+    """Parses "x,y,w,h" (source pixels); empty means the whole frame."""
+    if not value:
+        return None
+    x, y, w, h = (int(v) for v in value.split(","))
+    if w <= 0 or h <= 0:
+        raise ValueError(f"Empty region of interest: {value!r}")
+    return x, y, w, h
+
+
+class DecodeGeometry:
+    """
+    The region of a video we decode (a crop, then a downscale so the long side
+    is at most `max_side`) and the mapping from those pixels back to source
+    pixels. Cropping and scaling run inside ffmpeg, so a 4K recording never
+    reaches Python at full size.
+    """
+
+    def __init__(
+        self, width: int, height: int, roi: tuple | None = None, max_side: int = 0
+    ):
+        self.width, self.height = width, height
+        x, y, w, h = roi or (0, 0, width, height)
+        # Clamp the region to the frame, so one ROI works for several sizes
+        self.x, self.y = min(max(x, 0), width - 1), min(max(y, 0), height - 1)
+        self.crop_w = min(w, width - self.x)
+        self.crop_h = min(h, height - self.y)
+
+        scale = min(max_side / max(self.crop_w, self.crop_h), 1.0) if max_side else 1.0
+        self.out_w = max(round(self.crop_w * scale), 1)
+        self.out_h = max(round(self.crop_h * scale), 1)
+
+    @property
+    def identity(self) -> bool:
+        return (self.out_w, self.out_h) == (self.width, self.height)
+
+    def filters(self) -> list:
+        filters = []
+        if (self.crop_w, self.crop_h) != (self.width, self.height):
+            filters.append(f"crop={self.crop_w}:{self.crop_h}:{self.x}:{self.y}")
+        if (self.out_w, self.out_h) != (self.crop_w, self.crop_h):
+            filters.append(f"scale={self.out_w}:{self.out_h}:flags=bilinear")
+        return filters
+
+    def to_source(self, boxes: np.ndarray) -> np.ndarray:
+        """Maps (N, 4) xyxy boxes in decoded pixels to source pixels."""
+        sx, sy = self.crop_w / self.out_w, self.crop_h / self.out_h
+        return boxes * (sx, sy, sx, sy) + (self.x, self.y, self.x, self.y)
+
+
+class FFmpegReader:
+    """
+    Decodes a video into raw BGR frames through an ffmpeg stdout pipe.
+    `filters` (e.g. crop/scale) run in ffmpeg; width and height are the size
+    of the frames that come out. Frames are passed through as decoded, not
+    resampled to a constant rate, so a `select` filter really drops frames and
+    frame numbers match OpenCV's, variable frame rate recordings included.
+    """
+
+    def __init__(
+        self, video_path: str, width: int, height: int, filters: list | None = None
+    ):
+        self.frame_bytes = width * height * 3
+        self.shape = (height, width, 3)
+        cmd = ["ffmpeg", "-v", "error", "-i", video_path]
+        if filters:
+            cmd += ["-vf", ",".join(filters)]
+        cmd += ["-fps_mode", "passthrough", "-f", "rawvideo", "-pix_fmt", "bgr24", "-"]
+        self.proc = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, bufsize=self.frame_bytes
+        )
+
+    def read_into(self, frame: np.ndarray) -> bool:
+        """Fills `frame` (a contiguous HxWx3 uint8 array) in place."""
+        view = memoryview(frame).cast("B")
+        filled = 0
+        while filled < self.frame_bytes:
+            n = self.proc.stdout.readinto(view[filled:])
+            if not n:
+                return False
+            filled += n
+        return True
+
+    def close(self):
+        self.proc.stdout.close()
+        if self.proc.wait() != 0:
+            raise subprocess.CalledProcessError(self.proc.returncode, "ffmpeg")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            # Stopped reading early: ffmpeg's exit code says nothing useful
+            self.proc.kill()
+            self.proc.stdout.close()
+            self.proc.wait()
+
+
+class CaptureReader:
+    """FFmpegReader's interface over an OpenCV capture, for full-size decoding."""
+
+    def __init__(self, cap):
+        self.cap = cap
+
+    def read_into(self, frame: np.ndarray) -> bool:
+        ret, decoded = self.cap.read(frame)
+        if ret and not np.shares_memory(decoded, frame):
+            np.copyto(frame, decoded)
+        return ret
+
+    def grab(self) -> bool:
+        # Decodes without the BGR conversion
+        return self.cap.grab()
+
+    def close(self):
+        self.cap.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FFmpegWriter:
+    """Encodes raw BGR frames piped over stdin straight to web-ready H.264."""
+
+    def __init__(self, output_path: str, width: int, height: int, fps: float):
+        cmd = [
+            "ffmpeg",
+            "-y",
+            "-v",
+            "error",
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "bgr24",
+            "-s",
+            f"{width}x{height}",
+            "-r",
+            f"{fps:.3f}",
+            "-i",
+            "-",
+            # yuv420p needs even dimensions
+            "-vf",
+            "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            "-c:v",
+            "libx264",
+            "-pix_fmt",
+            "yuv420p",
+            "-preset",
+            "ultrafast",
+            "-crf",
+            "28",
+            "-movflags",
+            "+faststart",
+            output_path,
+        ]
+        self.output_path = output_path
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+
+    def write(self, frame: np.ndarray):
+        self.proc.stdin.write(memoryview(np.ascontiguousarray(frame)).cast("B"))
+
+    def close(self):
+        self.proc.stdin.close()
+        if self.proc.wait() != 0:
+            raise subprocess.CalledProcessError(self.proc.returncode, "ffmpeg")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            # Don't let a half-written file look finished
+            self.proc.kill()
+            self.proc.wait()
@@ -1,24 +1,78 @@
+import math
 import os
 
 import cv2
+import numpy as np
 from loguru import logger
-from ultralytics import YOLO
 
+from src.engine.detections import FrameDetections
+from src.engine.detectors import VISION_BACKEND, make_detector
+from src.engine.sampling import make_sampler, sampling_params
+from src.engine.tracking import IoUTracker, tracking_params
+from src.engine.video_io import CaptureReader, DecodeGeometry, FFmpegReader, parse_roi
+from src.utils.metrics import StepTimer
+
+# Frames per YOLO call; larger batches keep all CPU cores busy
+BATCH_SIZE = int(os.getenv("YOLO_BATCH_SIZE", "8"))
+# Frames are downscaled while decoding so their long side is at most this
+# (0 keeps the source size); YOLO itself runs at 640
+VISION_MAX_SIDE = int(os.getenv("VISION_MAX_SIDE", "1280"))
+# Only detect inside this "x,y,w,h" region (source pixels), e.g. the app window
+VISION_ROI = os.getenv("VISION_ROI", "")
+# Only detections above this confidence make it into the timeline
+LOG_CONFIDENCE = 0.4
 
-class BugLensVision:
-    def __init__(self, model_path: str = "yolov8n.pt"):
-        logger.info(f"Loading YOLO model: {model_path}")
-        self.model = YOLO(model_path)
 
-    def process_and_annotate(self, video_path: str, job_id: str):
+class BugLensVision:
+    def __init__(
+        self,
+        model_path: str = "yolov8n.pt",
+        batch_size: int = BATCH_SIZE,
+        cpu_threads: int = 0,
+        backend: str = VISION_BACKEND,
+        max_side: int = VISION_MAX_SIDE,
+        roi: str = VISION_ROI,
+    ):
+        logger.info(f"Loading YOLO model: {model_path} ({backend})")
+        self.model = make_detector(model_path, backend, cpu_threads=cpu_threads)
+        self.model_path = model_path
+        self.batch_size = batch_size
+        self.max_side = max_side
+        self.roi = parse_roi(roi)
+
+    def cache_params(self) -> dict:
+        """Settings that change the detections (part of the result cache key)."""
+        return {
+            "model": self.model_path,
+            "backend": self.model.backend,
+            **self.model.cache_params(),
+            "max_side": self.max_side,
+            "roi": self.roi,
+            "sampling": sampling_params(),
+            "tracking": tracking_params(),
+        }
+
+    def detect(
+        self,
+        video_path: str,
+        detections_path: str,
+        batch_size: int | None = None,
+        sampler=None,
+        on_batch=None,
+    ):
         """
-        Detects UI elements AND creates the 'AI Vision' video.
-        Replaces extract_frames and detect_ui.
+        Detects UI elements and stores the per-frame boxes at `detections_path`;
+        returns the timeline, one entry per track (see IoUTracker).
+        The 'AI Vision' overlay is rendered separately (see BugLensRenderer).
+        Only frames picked by `sampler` (default: the configured VISION_SAMPLING
+        policy) go through YOLO; they are decoded into a preallocated ring and
+        inferred `batch_size` at a time.
+        `on_batch(logs, watermark, duration, frames)` is called after every
+        batch with the tracks it finished, the video time (s) up to which every
+        track is finished and the number of frames inferred.
         """
+        batch_size = batch_size or self.batch_size
         abs_video_path = os.path.abspath(video_path)
-        output_dir = os.path.dirname(abs_video_path)
-        # The new video will be saved as jobid_vision.mp4
-        vision_video_path = os.path.join(output_dir, f"{job_id}_vision.mp4")
 
         logger.info(f"Starting Vision Engine: {abs_video_path}")
 
@@ -30,62 +84,147 @@ class BugLensVision:
         # Get Video Properties
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        fps = cap.get(cv2.CAP_PROP_FPS)
-
-        # Setup Video Writer for the 'Pro' Annotated Video
-        # Using 'mp4v' codec for broad compatibility
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-        out = cv2.VideoWriter(vision_video_path, fourcc, fps, (width, height))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        duration = cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps or None
+
+        sampler = sampler or make_sampler(fps)
+        geometry = DecodeGeometry(width, height, self.roi, self.max_side)
+        # For the stats when ffmpeg drops frames we never see, and to bound the
+        # sampler replay below (unknown: unbounded, EOF ends the loop)
+        frame_total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        frame_limit = frame_total if frame_total > 0 else math.inf
+        # With an index-only sampler ffmpeg drops unsampled frames before
+        # cropping, scaling and converting them
+        prefiltered = not geometry.identity and not sampler.needs_pixels
+        if geometry.identity:
+            # Full-size frames: OpenCV decodes them and can skip the BGR
+            # conversion of frames YOLO never sees
+            reader = CaptureReader(cap)
+        else:
+            cap.release()
+            filters = geometry.filters()
+            if prefiltered:
+                filters.insert(0, f"select={sampler.select_expr()}")
+            reader = FFmpegReader(
+                abs_video_path, geometry.out_w, geometry.out_h, filters
+            )
+            logger.info(f"Decoding at {geometry.out_w}x{geometry.out_h}: {filters}")
 
         ui_logs = []
-        frame_count = 0
-
-        logger.info("Processing frames and drawing AI Vision overlay...")
-
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            # Run YOLO Inference on the current frame
-            # verbose=False keeps the logs clean
-            results = self.model(frame, verbose=False)
-            result = results[0]
+        tracker = IoUTracker()
+        # Boxes are stored in source pixels, whatever size YOLO saw
+        detections = FrameDetections(fps, width, height, self.model.names)
 
-            # Create the annotated frame and write to video
-            annotated_frame = result.plot()
-            out.write(annotated_frame)
-
-            # Record detections for the JSON timeline
-            # log detections once per second of video
-            if frame_count % int(fps) == 0:
-                seconds = frame_count // int(fps)
-                frame_detections = []
-
-                for box in result.boxes:
-                    conf = float(box.conf)
-                    if conf > 0.4:  # Your confidence threshold
-                        frame_detections.append(
-                            {
-                                "label": self.model.names[int(box.cls)],
-                                "conf": round(conf, 2),
-                            }
-                        )
-
-                if frame_detections:
-                    ui_logs.append({"time": seconds, "detections": frame_detections})
-
-            frame_count += 1
+        # Fixed-size ring of decode buffers, reused for every batch
+        ring = np.empty((batch_size, geometry.out_h, geometry.out_w, 3), dtype=np.uint8)
+        pending = []  # frame indices currently held in the ring
+        frame_count = 0
+        timer = StepTimer("vision")
+
+        def infer(frame_indices):
+            first_new = len(ui_logs)
+            with timer("inference"):
+                self._infer_batch(
+                    ring, frame_indices, geometry, detections, tracker, ui_logs
+                )
+            if on_batch:
+                # Open tracks may still grow: nothing after the oldest is final
+                watermark = frame_indices[-1] / fps
+                if tracker.open_since is not None:
+                    watermark = min(watermark, tracker.open_since)
+                on_batch(
+                    ui_logs[first_new:],
+                    watermark,
+                    duration,
+                    len(detections.sampled_frames),
+                )
+
+        logger.info(f"Processing frames (batch={batch_size})...")
+
+        with reader:
+            while True:
+                if prefiltered:
+                    # The pipe only holds sampled frames; replaying the
+                    # sampler gives the index of the next one
+                    while frame_count < frame_limit and not sampler.should_sample(
+                        frame_count, None
+                    ):
+                        frame_count += 1
+                # Samplers that only look at the frame index let us skip the
+                # BGR conversion of frames YOLO will never see
+                elif not sampler.needs_pixels and not sampler.should_sample(
+                    frame_count, None
+                ):
+                    with timer("decode"):
+                        grabbed = reader.grab()
+                    if not grabbed:
+                        break
+                    frame_count += 1
+                    continue
+
+                slot = ring[len(pending)]
+                with timer("decode"):
+                    if not reader.read_into(slot):
+                        break
+
+                if not sampler.needs_pixels or sampler.should_sample(frame_count, slot):
+                    pending.append(frame_count)
+                    if len(pending) == batch_size:
+                        infer(pending)
+                        pending = []
+
+                frame_count += 1
+
+            if pending:
+                infer(pending)
+
+        remaining = tracker.flush()
+        ui_logs.extend(remaining)
+        if on_batch and remaining:
+            on_batch(
+                remaining, frame_count / fps, duration, len(detections.sampled_frames)
+            )
+        # Tracks finish in the order they were last seen
+        ui_logs.sort(key=lambda log: (log["time"], log["track"]))
+
+        if prefiltered:
+            frame_count = max(frame_count, frame_total)
+        detections.save(detections_path)
+        timer.observe(
+            {"decode": frame_count, "inference": len(detections.sampled_frames)}
+        )
+
+        logger.success(
+            f"Vision Complete. {len(detections.sampled_frames)}/{frame_count} frames "
+            f"inferred, {len(ui_logs)} tracks, boxes saved: {detections_path}"
+        )
+        return ui_logs, detections_path
+
+    def _infer_batch(self, ring, frame_indices, geometry, detections, tracker, ui_logs):
+        """
+        Runs YOLO on the filled part of the ring and records results in order;
+        tracks that ended are appended to `ui_logs`.
+        """
+        results = self.model(ring[: len(frame_indices)])
 
-        cap.release()
-        out.release()
+        for frame_index, (boxes, conf, cls) in zip(frame_indices, results, strict=True):
+            boxes = geometry.to_source(boxes)
+            detections.add(frame_index, boxes, conf, cls)
 
-        logger.success(f"Vision Complete. Annotated video saved: {vision_video_path}")
-        return ui_logs, vision_video_path
+            # Confident detections are linked into tracks for the JSON timeline
+            keep = conf > LOG_CONFIDENCE
+            ui_logs.extend(
+                tracker.update(
+                    frame_index / detections.fps,
+                    boxes[keep],
+                    conf[keep],
+                    [self.model.names[c] for c in cls[keep]],
+                )
+            )
 
 
 # Example Usage
 if __name__ == "__main__":
     engine = BugLensVision()
-    logs, vid = engine.process_and_annotate("data/raw/test.mp4", "test")
-    print(f"Found {len(logs)} events. Video at {vid}")
+    logs, boxes = engine.detect("data/raw/test.mp4", "data/raw/test_detections.npz")
+    print(f"Found {len(logs)} tracks. Boxes at {boxes}")
@@ -1,11 +1,13 @@
 import json
+import sys
+from pathlib import Path
 
 from loguru import logger
 
-from engine.audio import BugLensAudio
-from engine.fusion import BugLensFusion
-from engine.vision import BugLensVision
-from utils.logging_config import setup_logging
+from src.engine.audio import BugLensAudio
+from src.engine.fusion import BugLensFusion
+from src.engine.vision import BugLensVision
+from src.utils.logging_config import setup_logging
 
 
 @logger.catch  # Automatically catch and log any crash in the entire pipeline
@@ -17,9 +19,9 @@ def run_pipeline(video_path):
     audio = BugLensAudio()
     fuser = BugLensFusion()
 
-    # Process
-    frames = vision.extract_frames(video_path)
-    ui_logs = vision.detect_ui(frames)
+    # Process; the boxes are stored next to the video
+    detections_path = str(Path(video_path).with_suffix(".detections.npz"))
+    ui_logs, _ = vision.detect(video_path, detections_path)
     transcript = audio.process_audio(video_path)
 
     # Fuse and Output
@@ -28,5 +30,6 @@ def run_pipeline(video_path):
     print(json.dumps(final_report, indent=2))
 
 
+# Usage: python -m src.main [video_path]
 if __name__ == "__main__":
-    run_pipeline("data/raw/test.mp4")
+    run_pipeline(sys.argv[1] if len(sys.argv) > 1 else "data/raw/test.mp4")
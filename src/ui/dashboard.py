@@ -1,5 +1,8 @@
+import json
+import threading
 import time
 from pathlib import Path
+from urllib.parse import urlencode
 
 import httpx
 import pandas as pd
@@ -7,6 +10,10 @@ import streamlit as st
 
 # CONFIGURATION
 API_URL = "http://api:8000"
+# Refresh interval when the progress feed is down
+FALLBACK_POLL_SECONDS = 30
+JOB_PAGE_SIZE = 50
+JOB_STATUSES = ["PENDING", "PROCESSING", "COMPLETED", "FAILED"]
 
 st.set_page_config(page_title="BugLens AI Dashboard", layout="wide")
 
@@ -30,9 +37,61 @@ st.markdown(
 )
 
 
-# Cache for only 2 seconds to keep it "live" but deduplicated
-@st.cache_data(ttl=2)
-def fetch_api_data(endpoint):
+class ProgressFeed:
+    """
+    Follows the API's /events stream in one background thread shared by all
+    sessions and counts events per job. Views refetch only when the count for
+    what they show has changed. The last overlay render status per job is kept
+    too, so a failed render can be shown.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.job_versions = {}
+        self.renders = {}
+        self.connected = False
+        self._lock = threading.Lock()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        timeout = httpx.Timeout(5.0, read=60.0)  # the API sends keepalives
+        while True:
+            try:
+                with httpx.stream("GET", f"{API_URL}/events", timeout=timeout) as res:
+                    self.connected = res.status_code == 200
+                    for line in res.iter_lines():
+                        if line.startswith("data:"):
+                            self._bump(json.loads(line[5:]))
+            except (httpx.HTTPError, ValueError):
+                pass
+            self.connected = False
+            time.sleep(3)
+
+    def _bump(self, event):
+        job_id = event["job_id"]
+        with self._lock:
+            self.version += 1
+            self.job_versions[job_id] = self.job_versions.get(job_id, 0) + 1
+            if event.get("stage") == "render":
+                self.renders[job_id] = event.get("status")
+
+
+@st.cache_resource
+def progress_feed():
+    return ProgressFeed()
+
+
+def data_version(job_id=None):
+    """Cache key for API data: changes on every progress event."""
+    feed = progress_feed()
+    if not feed.connected:
+        return f"poll-{int(time.time() // FALLBACK_POLL_SECONDS)}"
+    return feed.job_versions.get(job_id, 0) if job_id else feed.version
+
+
+# Cached per data version, so every session shares one fetch per change
+@st.cache_data(ttl=300, max_entries=500)
+def fetch_api_data(endpoint, version=None):
     try:
         response = httpx.get(f"{API_URL}{endpoint}")
         if response.status_code == 200:
@@ -45,12 +104,103 @@ def fetch_api_data(endpoint):
         return None
 
 
-# REFRESH FRAGMENT
-@st.fragment(run_every="30s")
+def upload_in_chunks(uploaded_file):
+    """
+    Streams the file to the resumable upload API chunk by chunk instead of
+    building one multipart body. An interrupted upload resumes from the
+    server's offset the next time it is submitted.
+    """
+    session_key = f"upload_{uploaded_file.name}_{uploaded_file.size}"
+    with httpx.Client(base_url=API_URL, timeout=60.0) as client:
+        upload_id = st.session_state.get(session_key)
+        res = client.get(f"/uploads/{upload_id}") if upload_id else None
+        if res is None or res.status_code != 200:
+            res = client.post(
+                "/uploads",
+                json={"filename": uploaded_file.name, "size": uploaded_file.size},
+            )
+            res.raise_for_status()
+        session = res.json()
+        upload_id, offset = session["upload_id"], session["offset"]
+        st.session_state[session_key] = upload_id
+
+        progress = st.progress(0.0, text="Uploading...")
+        uploaded_file.seek(offset)
+        while chunk := uploaded_file.read(session["chunk_size"]):
+            res = client.put(
+                f"/uploads/{upload_id}", params={"offset": offset}, content=chunk
+            )
+            if res.status_code == 409:
+                # Server has a different offset; continue from there
+                offset = res.json()["detail"]["offset"]
+                uploaded_file.seek(offset)
+                continue
+            res.raise_for_status()
+            offset = res.json()["offset"]
+            progress.progress(min(offset / max(uploaded_file.size, 1), 1.0))
+
+        res = client.post(f"/uploads/{upload_id}/finalize")
+        if res.status_code == 200:
+            del st.session_state[session_key]
+        return res
+
+
+def flatten_events(events):
+    """Nested fusion events (partial timelines, older jobs) as store rows."""
+    rows = []
+    for event in events:
+        visuals = event.get("visuals", [])
+        first_det = visuals[0].get("detections", []) if visuals else []
+        if first_det:
+            rows.append(
+                {
+                    "time": event.get("time", 0),
+                    "top_label": first_det[0].get("label", "Unknown"),
+                    "top_conf": first_det[0].get("conf", 0),
+                }
+            )
+    return rows
+
+
+def render_timeline(job_id, events):
+    """`events` are rows of the job's events table (time, top_label, ...)."""
+    st.write("Click to jump to visual detection:")
+    for event in events:
+        t, label = event["time"], event["top_label"]
+        if label is None:
+            continue
+        if st.button(
+            f"{t}s: {label} ({event['top_conf']:.2f})",
+            key=f"t_{job_id}_{t}_{label}",
+        ):
+            st.session_state.video_start_time = t
+            st.rerun()
+
+
+# REFRESH FRAGMENT: cheap reruns, the API is only hit when the feed moved
+@st.fragment(run_every="3s")
 def render_job_table():
-    response = fetch_api_data("/jobs")
+    statuses = st.multiselect("Filter by status", JOB_STATUSES, key="status_filter")
+    params = {"limit": JOB_PAGE_SIZE, "status": statuses}
+    cursor = st.session_state.get("job_cursor")
+    if cursor:
+        params["cursor"] = cursor
+
+    endpoint = f"/jobs?{urlencode(params, doseq=True)}"
+    response = fetch_api_data(endpoint, data_version())
     if response and response.status_code == 200:
-        jobs = response.json()
+        page = response.json()
+        jobs = page["items"]
+
+        # Keyset pages: "older" follows the API's cursor, "newest" starts over
+        nav_newer, nav_older = st.columns(2)
+        if cursor and nav_newer.button("Newest reports"):
+            st.session_state.job_cursor = None
+            st.rerun()
+        if page["next_cursor"] and nav_older.button("Older reports"):
+            st.session_state.job_cursor = page["next_cursor"]
+            st.rerun()
+
         if jobs:
             df = pd.DataFrame(jobs)
             processing = df[df["status"] == "PROCESSING"]
@@ -63,12 +213,12 @@ def render_job_table():
     return []
 
 
-@st.fragment(run_every="30s")  # Speed up refresh for active investigation
+@st.fragment(run_every="3s")
 def render_job_details(job_id):
     if not job_id:
         return
 
-    response = fetch_api_data(f"/status/{job_id}")
+    response = fetch_api_data(f"/status/{job_id}", data_version(job_id))
     if not response or response.status_code != 200:
         st.warning("Connecting to job data...")
         return
@@ -90,6 +240,30 @@ def render_job_details(job_id):
     raw_path = detail.get("file_path")
     vision_path = detail.get("vision_file_path")
 
+    # The overlay is rendered on demand the first time the toggle is used
+    if show_vision and not vision_path and status == "COMPLETED":
+        render_key = f"vision_requested_{job_id}"
+        feed = progress_feed()
+        if not st.session_state.get(render_key):
+            try:
+                res = httpx.post(f"{API_URL}/jobs/{job_id}/vision")
+                if res.status_code == 200:
+                    st.session_state[render_key] = True
+                    feed.renders.pop(job_id, None)  # a new attempt
+                    vision_path = res.json().get("vision_file_path")
+                else:
+                    st.error(f"API Error {res.status_code}: {res.text}")
+            except (httpx.HTTPError, ValueError) as e:
+                st.error(f"Connection Error: {e}")
+        if not vision_path and feed.renders.get(job_id) == "failed":
+            st.error("Rendering the AI Vision overlay failed.")
+            if st.button("Retry rendering", key=f"render_retry_{job_id}"):
+                feed.renders.pop(job_id, None)
+                st.session_state.pop(render_key, None)
+                st.rerun()
+        elif not vision_path:
+            st.info("Rendering AI Vision overlay... showing the original for now.")
+
     # Determine which file to actually show
     video_to_play = vision_path if (show_vision and vision_path) else raw_path
 
@@ -123,8 +297,11 @@ def render_job_details(job_id):
                 "Export to Markdown", report_md, file_name=f"bug_{job_id[:8]}.md"
             )
         elif status == "PROCESSING":
-            st.warning("Vision engine running... (Auto-updating)")
-            st.progress(65)
+            st.warning("Analysis running... (Auto-updating)")
+            progress = detail.get("progress") or {}
+            for stage in ("vision", "audio"):
+                done = progress.get(stage, 0.0)
+                st.progress(done, text=f"{stage.title()}: {done:.0%}")
         else:
             st.info(f"Status: {status}")
 
@@ -134,27 +311,24 @@ def render_job_details(job_id):
         result_data = detail.get("result")
 
         if status == "COMPLETED" and isinstance(result_data, dict):
-            events = result_data.get("bug_events", [])
+            if "bug_events" in result_data:  # jobs from before the event store
+                events = flatten_events(result_data["bug_events"])
+            else:
+                res = fetch_api_data(f"/jobs/{job_id}/events", data_version(job_id))
+                events = res.json() if res else []
 
             if events:
-                st.write("Click to jump to visual detection:")
-                for event in events:
-                    t = event.get("time", 0)
-                    visuals = event.get("visuals", [])
-                    if visuals:
-                        first_det = visuals[0].get("detections", [])
-                        if first_det:
-                            label = first_det[0].get("label", "Unknown")
-                            conf = first_det[0].get("conf", 0)
-                            if st.button(
-                                f"{t}s: {label} ({conf:.2f})",
-                                key=f"t_{job_id}_{t}_{label}",
-                            ):
-                                st.session_state.video_start_time = t
-                                st.rerun()
+                render_timeline(job_id, events)
             else:
                 st.write("No specific events detected.")
 
+        elif status == "PROCESSING" and isinstance(result_data, dict):
+            # Partial timeline: events up to the watermark are final
+            watermark = result_data.get("watermark")
+            if watermark is not None:
+                st.caption(f"Analyzed up to {watermark:.0f}s, more events may follow.")
+            render_timeline(job_id, flatten_events(result_data.get("bug_events", [])))
+
         elif status == "PROCESSING":
             st.info("Timeline is being generated...")
             st.spinner("Analyzing frames...")
@@ -166,10 +340,10 @@ def render_job_details(job_id):
 st.title("BugLens AI Dashboard")
 
 # Metrics
-res_metrics = fetch_api_data("/jobs")
-initial_jobs = res_metrics.json() if res_metrics else []
+res_metrics = fetch_api_data(f"/jobs?limit={JOB_PAGE_SIZE}", data_version())
+initial_jobs = res_metrics.json()["items"] if res_metrics else []
 m1, m2, m3 = st.columns(3)
-m1.metric("Total Reports", len(initial_jobs))
+m1.metric("Recent Reports", len(initial_jobs))
 m2.metric("System Status", "Online" if res_metrics else "Offline")
 m3.metric("AI Engine", "Llama 3.2 (Ollama)")
 
@@ -181,13 +355,17 @@ with st.sidebar:
     uploaded_file = st.file_uploader("Drop bug recording here...", type=["mp4", "mov"])
     if st.button("Submit to Pipeline", width="content") and uploaded_file:
         with st.spinner("Uploading..."):
-            files = {"file": (uploaded_file.name, uploaded_file.getvalue())}
-            res = httpx.post(f"{API_URL}/upload", files=files)
-            if res.status_code == 200:
-                st.cache_data.clear()
-                st.success(f"Job Queued: {res.json()['job_id'][:8]}")
-                time.sleep(0.5)
-                st.rerun()
+            try:
+                res = upload_in_chunks(uploaded_file)
+                if res.status_code == 200:
+                    st.cache_data.clear()
+                    st.success(f"Job Queued: {res.json()['job_id'][:8]}")
+                    time.sleep(0.5)
+                    st.rerun()
+                else:
+                    st.error(f"API Error {res.status_code}: {res.text}")
+            except httpx.HTTPError as e:
+                st.error(f"Upload interrupted, submit again to resume: {e}")
 
     st.divider()
     st.info(
@@ -205,15 +383,13 @@ if jobs_list:
     )
 
     if selected_id:
-        # Action Bar
-        detail = fetch_api_data(f"/status/{selected_id}").json()
-
         # Action Bar: Delete & Export
         if st.button("Delete Job", type="primary"):
             with st.spinner("Deleting..."):
                 try:
                     response = httpx.delete(f"{API_URL}/jobs/{selected_id}")
                     if response.status_code == 200:
+                        st.cache_data.clear()
                         st.success("Job deleted successfully!")
                         time.sleep(1)
                         st.rerun()
@@ -0,0 +1,187 @@
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+import psutil
+import redis
+from loguru import logger
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+# Celery prefork children write their metrics to files in this directory and
+# the worker's exporter aggregates them; unset, a process keeps its own
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+# Port of the worker exporter (0 disables it)
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9100"))
+# How often the stage memory monitor samples RSS (seconds)
+RSS_SAMPLE_INTERVAL = float(os.getenv("RSS_SAMPLE_INTERVAL", "0.2"))
+
+SECONDS_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+RSS_BUCKETS = tuple(2**n for n in range(27, 36))  # 128 MB .. 32 GB
+
+STEP_SECONDS = Histogram(
+    "buglens_step_seconds",
+    "Time a job spent in one processing step (decode, inference, plot, "
+    "encode, transcode, transcription, fusion, llm)",
+    ["stage", "step"],
+    buckets=SECONDS_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "buglens_stage_seconds",
+    "Wall time of a pipeline stage",
+    ["stage"],
+    buckets=SECONDS_BUCKETS,
+)
+STAGE_PEAK_RSS = Histogram(
+    "buglens_stage_peak_rss_bytes",
+    "Peak resident memory of the worker process while a stage ran",
+    ["stage"],
+    buckets=RSS_BUCKETS,
+)
+FRAMES_PER_SECOND = Gauge(
+    "buglens_frames_per_second",
+    "Frames per second of the last job, per stage and step",
+    ["stage", "step"],
+    multiprocess_mode="mostrecent",
+)
+CACHE_LOOKUPS = Counter(
+    "buglens_cache_lookups",
+    "Result cache lookups per stage, by result (hit or miss)",
+    ["stage", "result"],
+)
+CACHE_EVICTIONS = Counter(
+    "buglens_cache_evictions",
+    "Result cache entries evicted to stay under CACHE_MAX_MB",
+)
+MODEL_LOAD_SECONDS = Gauge(
+    "buglens_model_load_seconds",
+    "Time to load each model in a worker process",
+    ["model"],
+    multiprocess_mode="max",
+)
+
+
+class StepTimer:
+    """
+    Adds up the time spent in each step of one stage run, e.g. decode vs
+    inference interleaved frame by frame, and reports the totals once.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.seconds = {}
+
+    @contextmanager
+    def __call__(self, step: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.seconds[step] = self.seconds.get(step, 0.0) + elapsed
+
+    def observe(self, frames: dict | None = None):
+        """Records the step totals; `frames` {step: count} sets the fps gauges."""
+        for step, seconds in self.seconds.items():
+            STEP_SECONDS.labels(self.stage, step).observe(seconds)
+        for step, count in (frames or {}).items():
+            if self.seconds.get(step):
+                fps = count / self.seconds[step]
+                FRAMES_PER_SECOND.labels(self.stage, step).set(fps)
+
+
+@contextmanager
+def timed(stage: str, step: str):
+    timer = StepTimer(stage)
+    with timer(step):
+        yield
+    timer.observe()
+
+
+class PeakMemory:
+    """Samples this process's RSS in a background thread while in the block."""
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = 0
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+
+    def _sample(self):
+        self.peak = max(self.peak, self._process.memory_info().rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+class QueueDepthCollector:
+    """Length of each Celery queue (a Redis list), read at scrape time."""
+
+    def __init__(self, redis_url: str, queues):
+        self.queues = list(queues)
+        self._client = redis.Redis.from_url(
+            redis_url, socket_connect_timeout=1, socket_timeout=1
+        )
+
+    def collect(self):
+        family = GaugeMetricFamily(
+            "buglens_queue_depth",
+            "Tasks waiting in each Celery queue",
+            labels=["queue"],
+        )
+        try:
+            with self._client.pipeline() as pipe:
+                for queue in self.queues:
+                    pipe.llen(queue)
+                depths = pipe.execute()
+        except redis.RedisError as e:
+            logger.debug(f"Queue depth unavailable: {e}")
+            return
+        for queue, depth in zip(self.queues, depths, strict=True):
+            family.add_metric([queue], depth)
+        yield family
+
+
+def start_worker_exporter(port: int = WORKER_METRICS_PORT):
+    """
+    Serves /metrics for a Celery worker. With PROMETHEUS_MULTIPROC_DIR set the
+    prefork children's metrics are aggregated; stale files from an earlier run
+    are cleared first.
+    """
+    if not port:
+        return
+    registry = REGISTRY
+    if MULTIPROC_DIR:
+        shutil.rmtree(MULTIPROC_DIR, ignore_errors=True)
+        os.makedirs(MULTIPROC_DIR, exist_ok=True)
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    start_http_server(port, registry=registry)
+    logger.info(f"Worker metrics on :{port}/metrics")
+
+
+def mark_process_dead(pid: int):
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,42 @@
+import functools
+import json
+import os
+import time
+
+import anyio
+import redis
+from loguru import logger
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+PROGRESS_CHANNEL = "buglens:progress"
+
+_client = None
+
+
+def _redis():
+    global _client
+    if _client is None:
+        # Short timeouts: a slow Redis must not stall a stage or a request
+        _client = redis.Redis.from_url(
+            REDIS_URL, socket_connect_timeout=1, socket_timeout=1
+        )
+    return _client
+
+
+def publish_progress(job_id: str, stage: str, **fields):
+    """
+    Publishes a job progress event (stage, percent, frames, status, ...) on
+    Redis pub/sub. Best effort: a lost event never fails the job.
+    """
+    event = {"job_id": job_id, "stage": stage, "time": time.time(), **fields}
+    try:
+        _redis().publish(PROGRESS_CHANNEL, json.dumps(event))
+    except redis.RedisError as e:
+        logger.debug(f"Progress event for Job {job_id} not published: {e}")
+
+
+async def publish_progress_async(job_id: str, stage: str, **fields):
+    """publish_progress for the API's event loop; Redis is called in a thread."""
+    await anyio.to_thread.run_sync(
+        functools.partial(publish_progress, job_id, stage, **fields)
+    )
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from loguru import logger
+
+from src.utils.metrics import CACHE_EVICTIONS, CACHE_LOOKUPS
+
+CACHE_DIR = Path(os.getenv("CACHE_DIR", "/app/data/cache"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_MB", "4096")) * 2**20
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def fingerprint(*parts) -> str:
+    """Stable hash of JSON-serializable parts (content hash, model config, ...)."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def file_sha256(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed, size-bounded on-disk cache of stage outputs.
+    Each entry is a directory of files under <root>/<key[:2]>/<key>. An entry's
+    mtime is bumped on every hit, and the least recently used entries are
+    evicted once the cache grows past `max_bytes`.
+    """
+
+    def __init__(self, root: Path = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str, stage: str = "other") -> Path | None:
+        """
+        Returns the entry directory for `key`, or None on a miss. The lookup is
+        counted per `stage` in buglens_cache_lookups_total.
+        """
+        entry = self._entry(key)
+        with self._lock:
+            if entry.is_dir():
+                self.hits += 1
+                CACHE_LOOKUPS.labels(stage, "hit").inc()
+                now = time.time()
+                os.utime(entry, (now, now))
+                return entry
+            self.misses += 1
+            CACHE_LOOKUPS.labels(stage, "miss").inc()
+            return None
+
+    def put(self, key: str, files: dict) -> Path:
+        """Stores {name: source_path} as the entry for `key`."""
+        entry = self._entry(key)
+        tmp = self.root / "tmp" / uuid.uuid4().hex
+        tmp.mkdir(parents=True)
+        try:
+            for name, src in files.items():
+                shutil.copyfile(src, tmp / name)
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.replace(tmp, entry)
+            except OSError:
+                # Another worker stored the same key first; keep theirs
+                pass
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        self.evict()
+        return entry
+
+    def evict(self):
+        """Drops least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for entry in self.root.glob("??/*"):
+            try:
+                size = sum(f.stat().st_size for f in entry.iterdir())
+                entries.append((entry.stat().st_mtime, size, entry))
+            except FileNotFoundError:
+                continue  # evicted concurrently
+            total += size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, entry in sorted(entries):
+            shutil.rmtree(entry, ignore_errors=True)
+            CACHE_EVICTIONS.inc()
+            total -= size
+            logger.debug(f"Evicted cache entry {entry.name}")
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,79 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+# Per-job stage outputs. Celery messages only carry paths into this directory.
+ARTIFACT_DIR = Path(os.getenv("ARTIFACT_DIR", "/app/data/jobs"))
+
+
+def job_dir(job_id: str) -> Path:
+    # Lookups don't create anything, so reads can't resurrect a deleted job
+    return ARTIFACT_DIR / job_id
+
+
+def create_job_dir(job_id: str) -> Path:
+    """The job's artifact dir, created for a stage that writes into it."""
+    path = job_dir(job_id)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def artifact_path(job_id: str, name: str) -> Path:
+    return job_dir(job_id) / name
+
+
+def detections_path(job_id: str) -> Path:
+    return artifact_path(job_id, "detections.npz")
+
+
+def shard_dir(job_id: str) -> Path:
+    """Where a long video's shards are cut to; removed once they're merged."""
+    return artifact_path(job_id, "shards")
+
+
+def vision_video_path(job_id: str) -> Path:
+    return artifact_path(job_id, "vision_web.mp4")
+
+
+def profile_marker_path(job_id: str) -> Path:
+    return artifact_path(job_id, "profile.enabled")
+
+
+def enable_profiling(job_id: str):
+    """Stages of this job that run from now on are profiled (see SamplingProfiler)."""
+    create_job_dir(job_id)
+    profile_marker_path(job_id).touch()
+
+
+def profiling_enabled(job_id: str) -> bool:
+    return profile_marker_path(job_id).exists()
+
+
+def profile_path(job_id: str, stage: str) -> Path:
+    return artifact_path(job_id, f"profile.{stage}.folded")
+
+
+def read_profiles(job_id: str) -> str | None:
+    """All of the job's stage profiles as one folded-stacks text (or None)."""
+    paths = sorted(job_dir(job_id).glob("profile.*.folded"))
+    if not paths:
+        return None
+    return "".join(path.read_text() for path in paths)
+
+
+def write_json(path: Path, data) -> str:
+    """Writes atomically so a crashed stage never leaves a half-written artifact."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(json.dumps(data))
+    os.replace(tmp_path, path)
+    return str(path)
+
+
+def read_json(path: str):
+    return json.loads(Path(path).read_text())
+
+
+def remove_job_artifacts(job_id: str):
+    shutil.rmtree(ARTIFACT_DIR / job_id, ignore_errors=True)
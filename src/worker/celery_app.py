@@ -3,6 +3,8 @@ import os
 from celery import Celery
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Size this from the model load times/RSS logged by src.worker.model_pool
+MAX_TASKS_PER_CHILD = int(os.getenv("WORKER_MAX_TASKS_PER_CHILD", "10"))
 # Create the Celery instance
 celery_app = Celery(
     "buglens",
@@ -17,7 +19,20 @@ celery_app.conf.update(
     task_serializer="json",
     result_persistent=True,
     worker_prefetch_multiplier=1,  # only take 1 at a time
-    worker_max_tasks_per_child=10,  # Restart worker occasionally to clear GPU/RAM memory leaks
+    worker_max_tasks_per_child=MAX_TASKS_PER_CHILD,  # Restart worker occasionally to clear GPU/RAM memory leaks
+    task_acks_late=True,  # a crashed worker's stage goes back to the queue
+    # Each stage has its own queue so every pool can be scaled on its own
+    task_routes={
+        "vision_stage": {"queue": "vision"},
+        "audio_stage": {"queue": "audio"},
+        "vision_shard": {"queue": "vision"},
+        "audio_shard": {"queue": "audio"},
+        "split_stage": {"queue": "transcode"},
+        "render_vision_video": {"queue": "transcode"},
+        "merge_shards": {"queue": "llm"},
+        "fuse_stage": {"queue": "llm"},
+        "summary_stage": {"queue": "llm"},
+    },
 )
 
 if __name__ == "__main__":
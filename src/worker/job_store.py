@@ -0,0 +1,156 @@
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.engine.detections import load_detections
+
+from . import artifacts
+
+# Rows are written in time order, so row group min/max stats let a time-range
+# read skip most of a long recording
+ROW_GROUP_SIZE = 64 * 1024
+
+DETECTIONS_SCHEMA = pa.schema(
+    [
+        ("time", pa.float32()),
+        ("frame", pa.int32()),
+        ("label", pa.string()),
+        ("conf", pa.float32()),
+        ("x1", pa.float32()),
+        ("y1", pa.float32()),
+        ("x2", pa.float32()),
+        ("y2", pa.float32()),
+    ]
+)
+TRANSCRIPT_SCHEMA = pa.schema(
+    [("start", pa.float32()), ("end", pa.float32()), ("text", pa.string())]
+)
+EVENTS_SCHEMA = pa.schema(
+    [
+        ("time", pa.int32()),
+        ("voice", pa.string()),
+        ("visual_start", pa.float32()),
+        ("visual_end", pa.float32()),
+        ("visual_count", pa.int32()),
+        ("labels", pa.list_(pa.string())),
+        ("top_label", pa.string()),
+        ("top_conf", pa.float32()),
+    ]
+)
+SCHEMAS = {
+    "detections": DETECTIONS_SCHEMA,
+    "transcript": TRANSCRIPT_SCHEMA,
+    "events": EVENTS_SCHEMA,
+}
+TABLE_FILES = tuple(f"{name}.parquet" for name in SCHEMAS)
+
+
+def table_path(job_id: str, name: str) -> Path:
+    return artifacts.artifact_path(job_id, f"{name}.parquet")
+
+
+def _write(table: pa.Table, path: Path):
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE, compression="zstd")
+    tmp_path.replace(path)
+
+
+def _detections_table(detections_path: Path) -> pa.Table:
+    if not detections_path.exists():
+        return DETECTIONS_SCHEMA.empty_table()
+
+    det = load_detections(str(detections_path))
+    order = np.argsort(det["frames"], kind="stable")
+    frames = det["frames"][order]
+    boxes = det["boxes"][order]
+    names = det["names"]
+    return pa.table(
+        {
+            "time": (frames / det["fps"]).astype(np.float32),
+            "frame": frames,
+            "label": [names.get(int(c), str(c)) for c in det["cls"][order]],
+            "conf": det["conf"][order],
+            "x1": boxes[:, 0],
+            "y1": boxes[:, 1],
+            "x2": boxes[:, 2],
+            "y2": boxes[:, 3],
+        },
+        schema=DETECTIONS_SCHEMA,
+    )
+
+
+def _events_rows(bug_events: list) -> list:
+    rows = []
+    for event in bug_events:
+        visuals = event.get("visuals", [])
+        dets = [d for v in visuals for d in v.get("detections", [])]
+        first = (
+            visuals[0]["detections"][0]
+            if visuals and visuals[0].get("detections")
+            else {}
+        )
+        rows.append(
+            {
+                "time": event["time"],
+                "voice": event["voice"],
+                "visual_start": min((float(v["time"]) for v in visuals), default=None),
+                "visual_end": max(
+                    (float(v.get("end", v["time"])) for v in visuals), default=None
+                ),
+                "visual_count": len(visuals),
+                "labels": sorted({d["label"] for d in dets}),
+                "top_label": first.get("label"),
+                "top_conf": first.get("conf"),
+            }
+        )
+    return rows
+
+
+def write_job_store(job_id: str, transcript: list | None, report: dict) -> dict:
+    """
+    Writes the job's detections, transcript and fused events as Parquet
+    tables next to its other artifacts. Returns the row count per table.
+    """
+    tables = {
+        "detections": _detections_table(artifacts.detections_path(job_id)),
+        "transcript": pa.Table.from_pylist(transcript or [], schema=TRANSCRIPT_SCHEMA),
+        "events": pa.Table.from_pylist(
+            _events_rows(report.get("bug_events", [])), schema=EVENTS_SCHEMA
+        ),
+    }
+    for name, table in tables.items():
+        _write(table, table_path(job_id, name))
+    return {name: table.num_rows for name, table in tables.items()}
+
+
+def read_table(
+    job_id: str,
+    name: str,
+    time_column: str = "time",
+    start: float | None = None,
+    end: float | None = None,
+    filters: list | None = None,
+    columns: list | None = None,
+    limit: int | None = None,
+) -> list:
+    """
+    Reads rows of one job table, pushing the [start, end] time range and any
+    extra (column, op, value) `filters` down to the Parquet reader.
+    Raises FileNotFoundError if the job has no store yet.
+    """
+    path = table_path(job_id, name)
+    if not path.exists():
+        raise FileNotFoundError(f"No {name} table for Job {job_id}")
+
+    filters = list(filters or [])
+    if start is not None:
+        filters.append((time_column, ">=", start))
+    if end is not None:
+        filters.append((time_column, "<=", end))
+
+    table = pq.read_table(path, columns=columns, filters=filters or None)
+    if limit is not None:
+        table = table.slice(0, limit)
+    return table.to_pylist()
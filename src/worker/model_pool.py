@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+
+import psutil
+from loguru import logger
+
+from src.engine.audio import BugLensAudio
+from src.engine.detectors import VISION_BACKEND
+from src.engine.vision import BugLensVision
+from src.utils.metrics import MODEL_LOAD_SECONDS
+
+YOLO_MODEL_PATH = os.getenv("YOLO_MODEL_PATH", "yolov8n.pt")
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "small")
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+# Threads per model; 0 gives it every core this process may use. Vision and
+# audio run on separate queues (worker-vision, worker-audio), so each gets the
+# whole worker by default. A worker consuming both queues should split the
+# cores, e.g. VISION_CPU_THREADS=4 AUDIO_CPU_THREADS=4 on 8 cores
+VISION_CPU_THREADS = int(os.getenv("VISION_CPU_THREADS", "0"))
+AUDIO_CPU_THREADS = int(os.getenv("AUDIO_CPU_THREADS", "0"))
+
+# One instance per model config, shared by every task in this worker process
+_models = {}
+_stats = {}
+_lock = threading.Lock()
+
+
+def _load(key: tuple, factory):
+    """Returns the cached model for `key`, loading it on first use."""
+    with _lock:
+        if key in _models:
+            return _models[key]
+
+        process = psutil.Process()
+        rss_before = process.memory_info().rss
+        started = time.perf_counter()
+
+        model = factory()
+
+        load_seconds = time.perf_counter() - started
+        rss_mb = (process.memory_info().rss - rss_before) / 2**20
+
+        _models[key] = model
+        MODEL_LOAD_SECONDS.labels(":".join(map(str, key))).set(load_seconds)
+        _stats[key] = {
+            "load_seconds": round(load_seconds, 2),
+            "rss_mb": round(rss_mb, 1),
+        }
+        logger.info(
+            f"Loaded model {key} in {load_seconds:.2f}s (+{rss_mb:.1f} MB resident)"
+        )
+        return model
+
+
+def cpu_threads(configured: int = 0) -> int:
+    """`configured`, or the cores available to this process (cpuset aware)."""
+    if configured > 0:
+        return configured
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not on Linux
+        return os.cpu_count() or 1
+
+
+def get_vision(
+    model_path: str = YOLO_MODEL_PATH, backend: str = VISION_BACKEND
+) -> BugLensVision:
+    threads = cpu_threads(VISION_CPU_THREADS)
+    return _load(
+        ("vision", model_path, backend),
+        lambda: BugLensVision(model_path, cpu_threads=threads, backend=backend),
+    )
+
+
+def get_audio(
+    model_size: str = WHISPER_MODEL_SIZE,
+    device: str = WHISPER_DEVICE,
+    compute_type: str = WHISPER_COMPUTE_TYPE,
+) -> BugLensAudio:
+    threads = cpu_threads(AUDIO_CPU_THREADS)
+    return _load(
+        ("audio", model_size, device, compute_type),
+        lambda: BugLensAudio(
+            model_size, device=device, compute_type=compute_type, cpu_threads=threads
+        ),
+    )
+
+
+def preload(kinds=("vision", "audio")):
+    """Loads the default models so the first task doesn't pay for it."""
+    if "vision" in kinds:
+        get_vision()
+    if "audio" in kinds:
+        get_audio()
+
+
+def model_stats() -> dict:
+    """Load time and resident memory per model, plus the current process RSS."""
+    return {
+        "process_rss_mb": round(psutil.Process().memory_info().rss / 2**20, 1),
+        "models": [{"key": list(key), **stats} for key, stats in _stats.items()],
+    }
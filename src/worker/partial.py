@@ -0,0 +1,202 @@
+import json
+import math
+import os
+import time
+import uuid
+
+from loguru import logger
+
+from src.engine.fusion import IncrementalFusion
+from src.utils.progress import publish_progress
+
+from . import artifacts
+
+# Seconds between persisted partial timelines
+PARTIAL_INTERVAL = float(os.getenv("PARTIAL_RESULT_INTERVAL", "5"))
+
+STAGES = ("vision", "audio")
+
+
+def events_path(job_id: str, stage: str):
+    return artifacts.artifact_path(job_id, f"{stage}.events.jsonl")
+
+
+def partial_path(job_id: str, stage: str):
+    return artifacts.artifact_path(job_id, f"partial.{stage}.json")
+
+
+class PartialTimeline:
+    """
+    Streams one stage's events while it runs. Every batch is appended to
+    <stage>.events.jsonl; the other stage's file is tailed, both are fed to an
+    IncrementalFusion and the partial timeline is written to
+    partial.<stage>.json at most every PARTIAL_INTERVAL seconds.
+    Each attempt of a stage starts its stream over with a header line naming
+    the attempt, so the reader notices a retry and drops the failed attempt's
+    events.
+    """
+
+    def __init__(self, job_id: str, stage: str):
+        self.job_id = job_id
+        self.stage = stage
+        self.other = next(s for s in STAGES if s != stage)
+        self.fusion = IncrementalFusion()
+        self.progress = dict.fromkeys(STAGES, 0.0)
+        self.processed = 0  # frames inferred / segments transcribed
+        self._offset = 0  # bytes of the other stage's stream consumed so far
+        self._other_attempt = None  # header line of the stream being tailed
+        self._other_done = False
+        self._last_persist = 0.0
+
+        # A retried stage starts its stream over
+        artifacts.create_job_dir(job_id)
+        self._path = events_path(job_id, stage)
+        self._path.write_text(json.dumps({"attempt": uuid.uuid4().hex}) + "\n")
+
+    def emit(
+        self,
+        items,
+        watermark: float,
+        duration: float | None = None,
+        processed: int | None = None,
+    ):
+        """Records `items` and marks the stream complete up to `watermark` s."""
+        if processed is None:
+            processed = self.processed + len(items)
+        self.processed = processed
+        self._append({"items": items, "watermark": watermark, "duration": duration})
+
+        if time.time() - self._last_persist >= PARTIAL_INTERVAL:
+            self.persist()
+
+    def close(self):
+        """Marks this stage finished and writes a last partial timeline."""
+        self._append({"items": [], "watermark": math.inf})
+        self.persist()
+
+    def _append(self, line: dict):
+        with open(self._path, "a") as f:
+            f.write(json.dumps(line) + "\n")
+        self._feed(self.stage, line)
+
+    def persist(self):
+        self._tail_other()
+        snapshot = self.fusion.snapshot()
+        snapshot["progress"] = {k: round(v, 3) for k, v in self.progress.items()}
+        snapshot["updated"] = time.time()
+        artifacts.write_json(partial_path(self.job_id, self.stage), snapshot)
+        self._last_persist = snapshot["updated"]
+        publish_progress(
+            self.job_id,
+            self.stage,
+            percent=round(self.progress[self.stage] * 100, 1),
+            frames=self.processed,
+            events=len(snapshot["bug_events"]),
+        )
+
+    def _feed(self, stage: str, line: dict):
+        watermark = line["watermark"]
+        if stage == "vision":
+            self.fusion.add_visuals(line["items"], watermark)
+        else:
+            self.fusion.add_speech(line["items"], watermark)
+
+        if math.isinf(watermark):
+            self.progress[stage] = 1.0
+        elif line.get("duration"):
+            self.progress[stage] = min(watermark / line["duration"], 1.0)
+
+    def _tail_other(self):
+        if self._other_done:
+            return
+
+        # Checked before tailing so no line written before it finished is missed
+        final = artifacts.artifact_path(self.job_id, f"{self.other}.json")
+        finished = final.exists()
+
+        path = events_path(self.job_id, self.other)
+        if path.exists():
+            self._read_other(path)
+
+        if finished:
+            # Finished stage: its stream is complete, or, when it was served
+            # from the result cache, there is no stream and the output is used
+            items = [] if path.exists() else artifacts.read_json(final)["output"]
+            self._feed(self.other, {"items": items or [], "watermark": math.inf})
+            self._other_done = True
+
+    def _read_other(self, path):
+        with open(path, "rb") as f:
+            header = f.readline()
+            if not header.endswith(b"\n"):
+                return  # just (re)created
+            if header != self._other_attempt:
+                if self._other_attempt is not None:
+                    self._restart_other()
+                self._other_attempt = header
+            self._offset = max(self._offset, len(header))
+            f.seek(self._offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # still being written; pick it up next time
+                self._offset += len(raw)
+                try:
+                    line = json.loads(raw)
+                except ValueError:
+                    logger.warning(f"Skipping malformed {self.other} event line")
+                    continue
+                self._feed(self.other, line)
+
+    def _restart_other(self):
+        """The other stage was retried: start over without its failed attempt."""
+        logger.info(f"{self.other} restarted; rebuilding the partial timeline")
+        self.fusion = IncrementalFusion()
+        self.progress[self.other] = 0.0
+        self._offset = 0
+        with open(self._path, "rb") as f:
+            f.readline()  # our own header
+            for raw in f:
+                self._feed(self.stage, json.loads(raw))
+
+
+def shard_progress(job_id: str, stage: str, total: int):
+    """
+    Progress of a sharded stage: the share of its shards finished so far.
+    Shards don't stream a partial timeline, only this progress.
+    """
+    done = len(list(artifacts.job_dir(job_id).glob(f"{stage}.shard*.json")))
+    fraction = min(done / total, 1.0)
+    snapshot = {
+        "status": "Partial",
+        "bug_events": [],
+        "watermark": 0.0,
+        "progress": {stage: round(fraction, 3)},
+        "updated": time.time(),
+    }
+    artifacts.write_json(partial_path(job_id, stage), snapshot)
+    publish_progress(job_id, stage, percent=round(fraction * 100, 1), shards=done)
+
+
+def load_partial(job_id: str) -> dict | None:
+    """
+    The freshest partial timeline of a running job. Each stage's worker writes
+    its own view; the one with more finalized events wins and progress is the
+    best known for each stage.
+    """
+    snapshots = []
+    for stage in STAGES:
+        path = partial_path(job_id, stage)
+        try:
+            snapshots.append(artifacts.read_json(path))
+        except FileNotFoundError:
+            continue
+        except ValueError as e:
+            logger.warning(f"Unreadable partial timeline {path}: {e}")
+    if not snapshots:
+        return None
+
+    best = max(snapshots, key=lambda s: (len(s["bug_events"]), s["updated"]))
+    progress = {
+        stage: max(s["progress"].get(stage, 0.0) for s in snapshots) for stage in STAGES
+    }
+    return {**best, "progress": progress}
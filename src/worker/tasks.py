@@ -1,134 +1,524 @@
+import os
 import shutil
-import subprocess
-from pathlib import Path
+import time
+from contextlib import contextmanager
+from typing import ClassVar
 
-import httpx
+import ffmpeg
+from celery import chain, chord, group
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown
 from loguru import logger
 
 from src.database.models import BugJob
 from src.database.session import SessionLocal
-from src.engine.audio import BugLensAudio
+from src.engine import llm, shards
 from src.engine.fusion import BugLensFusion
-from src.engine.vision import BugLensVision
+from src.engine.prompt import build_prompt
+from src.engine.render import BugLensRenderer
+from src.engine.video_io import probe_video
+from src.utils import metrics
+from src.utils.profiling import SamplingProfiler
+from src.utils.progress import publish_progress
+from src.utils.result_cache import ResultCache, file_sha256, fingerprint
 
+from . import artifacts, job_store, model_pool
 from .celery_app import celery_app
+from .partial import PartialTimeline, shard_progress
 
+# Models this worker needs; LLM/transcode workers don't have to hold YOLO/Whisper
+PRELOAD_MODELS = [
+    m.strip()
+    for m in os.getenv("PRELOAD_MODELS", "vision,audio").split(",")
+    if m.strip()
+]
 
-@celery_app.task(name="process_bug_video")
-def process_bug_video(job_id: str, file_path: str):
-    logger.info(f"Processing task for job {job_id}")
-    db = SessionLocal()
-    try:
-        job = db.query(BugJob).filter(BugJob.id == job_id).first()
-        if not job:
-            return "Job not found"
+SUMMARY_OPTIONS = {"temperature": 0.3}
 
-        job.status = "PROCESSING"
-        db.commit()
+# Stage outputs keyed by video content hash + model/parameter fingerprint
+result_cache = ResultCache()
 
-        vision = BugLensVision()
-        audio = BugLensAudio()
-        fuser = BugLensFusion()
-
-        # Vision Engine (Creates the job_id_vision.mp4)
-        ui_logs, annotated_video_path = vision.process_and_annotate(file_path, job_id)
-
-        # Web transcoding
-        logger.info("Starting web-ready transcoding for browser compatibility...")
-        web_path = str(annotated_video_path).replace(".mp4", "_web.mp4")
-
-        cmd = [
-            "ffmpeg",
-            "-y",
-            "-i",
-            str(annotated_video_path),
-            "-c:v",
-            "libx264",
-            "-pix_fmt",
-            "yuv420p",
-            "-preset",
-            "ultrafast",
-            "-crf",
-            "28",
-            web_path,
-        ]
 
-        subprocess.run(cmd, check=True)
-        logger.success(f"Transcoding complete: {web_path}")
+@worker_process_init.connect
+def preload_models(**kwargs):
+    # Load YOLO/Whisper once per worker process instead of once per job
+    model_pool.preload(PRELOAD_MODELS)
+    logger.info(f"Worker models ready: {model_pool.model_stats()}")
 
-        # Audio Engine
-        transcript = audio.process_audio(file_path)
 
-        # Fuse Results
-        final_report = fuser.fuse(ui_logs, transcript)
+@worker_process_shutdown.connect
+def report_models(pid=None, **kwargs):
+    logger.info(f"Worker process exiting: {model_pool.model_stats()}")
+    metrics.mark_process_dead(pid or os.getpid())
 
-        # Generate LLM Summary
-        logger.info("Generating AI Summary ...")
-        human_summary = generate_llm_summary(final_report)
 
-        # Save Results
-        job.result = final_report
-        job.vision_file_path = web_path
-        job.summary = human_summary
-        job.status = "COMPLETED"
-        db.commit()
+@worker_init.connect
+def start_metrics(**kwargs):
+    metrics.start_worker_exporter()
 
-        logger.success(f"Worker finished Job: {job_id}")
 
-    except Exception as e:
-        logger.error(f"Worker failed on Job {job_id}: {str(e)}")
+class StageTask(celery_app.Task):
+    """
+    Base class for pipeline stages. Failed stages are retried with backoff;
+    once retries are exhausted the job is marked FAILED. Completed stages leave
+    an artifact behind, so re-running the pipeline only redoes what failed.
+    """
+
+    autoretry_for = (Exception,)
+    retry_backoff = True
+    retry_kwargs: ClassVar[dict] = {"max_retries": 3}
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        job_id = kwargs.get("job_id")
+        logger.error(f"Stage {self.name} failed on Job {job_id}: {exc!s}")
+        _update_job(job_id, status="FAILED", error_message=str(exc))
+
+
+def _update_job(job_id: str, **fields):
+    db = SessionLocal()
+    try:
+        job = db.query(BugJob).filter(BugJob.id == job_id).first()
         if job:
-            job.status = "FAILED"
-            job.error_message = str(e)
+            for key, value in fields.items():
+                setattr(job, key, value)
             db.commit()
     finally:
-        # Cleanup frames to save disk space
-        temp_path = Path("data/temp_frames")
-        if temp_path.exists():
-            shutil.rmtree(temp_path)
-            logger.debug("Cleaned up temporary frames.")
         db.close()
+    if "status" in fields:
+        publish_progress(job_id, "job", status=fields["status"])
 
 
-def generate_llm_summary(fusion_data: dict):
-    """
-    Sends the JSON fusion data to Ollama to generate a human-readable report.
+@contextmanager
+def _job_profile(job_id: str, stage: str):
+    # Opt-in per job (POST /jobs/{id}/profile or upload with ?profile=true)
+    if not artifacts.profiling_enabled(job_id):
+        yield
+        return
+    profiler = SamplingProfiler(root=stage)
+    try:
+        with profiler:
+            yield
+    finally:
+        profiler.write(artifacts.profile_path(job_id, stage))
+        logger.info(f"Job {job_id}: {stage} profile saved")
+
+
+def _run_stage(
+    job_id: str, stage: str, fn, *args, cache_key: str | None = None, extra_files=()
+) -> str:
     """
-    # 'host.docker.internal' is the URL to talk to  Mac from Docker
-    ollama_url = "http://host.docker.internal:11434/api/generate"
-
-    prompt = f"""
-    ### ROLE
-    You are 'BugLens Advisor', an expert QA Automation Engineer. Your task is to analyze raw metadata from a screen recording and identify discrepancies.
-
-    ### DATA INPUT
-    - User Speech (Whisper): "{fusion_data.get("transcript", "No audio detected")}"
-    - Visual Detections (YOLO): {fusion_data.get("ui_logs", "No visual logs")}
-
-    ### INSTRUCTIONS
-    1. **Compare** the user's intent (Speech) with the system's reality (Detections).
-    2. **Identify Anomaly**: Is there a "Mismatch"? (e.g., User says "I'm clicking Login" but YOLO only sees "Error Popup").
-    3. **Tone**: Be professional, concise, and technical.
-
-    ### OUTPUT FORMAT
-    Return your response using this EXACT Markdown structure:
-    **Executive Summary**: (One sentence)
-    **User Intent**: (What the user was trying to do)
-    **Visual Evidence**: (What was actually seen on screen)
-    **Verdict**: (BUG, ANOMALY, or EXPECTED BEHAVIOR)
+    Runs one stage and stores its output as <stage>.json in the job's artifact
+    dir. Returns the artifact path; an existing artifact is reused as-is.
+    With a `cache_key`, the output (plus any `extra_files` the stage wrote to
+    the artifact dir) is served from / stored in the result cache.
     """
+    path = artifacts.artifact_path(job_id, f"{stage}.json")
+    if path.exists():
+        logger.info(f"Job {job_id}: reusing {stage} output")
+        return str(path)
+    artifacts.create_job_dir(job_id)
+
+    kind = stage.split(".")[0]  # shards count as their stage
+    entry = result_cache.get(cache_key, kind) if cache_key else None
+    if entry:
+        logger.info(f"Job {job_id}: {stage} cache hit {result_cache.stats()}")
+        for name in extra_files:
+            shutil.copyfile(entry / name, artifacts.artifact_path(job_id, name))
+        cached = artifacts.read_json(entry / f"{stage}.json")
+        now = time.time()
+        ref = artifacts.write_json(
+            path, {**cached, "started": now, "finished": now, "cached": True}
+        )
+        publish_progress(job_id, stage, percent=100.0, status="done", cached=True)
+        return ref
 
+    started = time.time()
+    with metrics.PeakMemory() as memory, _job_profile(job_id, stage):
+        output = fn(*args)
+    finished = time.time()
+    peak_rss_mb = round(memory.peak / 2**20, 1)
+    logger.info(
+        f"Job {job_id}: {stage} took {finished - started:.2f}s "
+        f"(peak RSS {peak_rss_mb} MB)"
+    )
+    metrics.STAGE_SECONDS.labels(kind).observe(finished - started)
+    metrics.STAGE_PEAK_RSS.labels(kind).observe(memory.peak)
+    publish_progress(job_id, stage, percent=100.0, status="done")
+
+    ref = artifacts.write_json(
+        path,
+        {
+            "output": output,
+            "started": started,
+            "finished": finished,
+            "cache_key": cache_key,
+            "peak_rss_mb": peak_rss_mb,
+        },
+    )
+    # Failed extractions come back as None; don't pin them in the cache
+    if cache_key and output is not None:
+        files = {f"{stage}.json": path}
+        files.update({n: artifacts.artifact_path(job_id, n) for n in extra_files})
+        result_cache.put(cache_key, files)
+    return ref
+
+
+def _should_shard(file_path: str) -> bool:
+    if not shards.SHARD_SECONDS:
+        return False
     try:
-        response = httpx.post(
-            ollama_url,
-            json={
-                "model": "llama3.2:3b",
-                "prompt": prompt,
-                "stream": False,
-                "options": {"temperature": 0.3},
-            },
-            timeout=45.0,
+        duration = probe_video(file_path)["duration"]
+    except (ffmpeg.Error, OSError, KeyError, StopIteration, ValueError) as e:
+        logger.warning(f"Could not probe {file_path}, processing it whole: {e}")
+        return False
+    return duration > shards.SHARD_SECONDS
+
+
+def start_pipeline(job_id: str, file_path: str, content_hash: str | None = None):
+    """
+    Queues the per-stage pipeline for a job:
+    (vision | audio) -> fusion -> LLM summary.
+    Vision and audio run in parallel on their own queues. Videos longer than
+    SHARD_SECONDS are split first and every shard goes through vision and
+    audio on whichever worker is free (see split_stage). `content_hash` (the
+    video's sha256) keys the result cache; it is computed by the stages if
+    missing.
+    """
+    stage_kwargs = {
+        "job_id": job_id,
+        "file_path": file_path,
+        "content_hash": content_hash,
+    }
+    if _should_shard(file_path):
+        pipeline = chain(
+            split_stage.si(**stage_kwargs),
+            fuse_stage.s(job_id=job_id),
+            summary_stage.s(job_id=job_id),
+        )
+        return pipeline.apply_async()
+
+    pipeline = chain(
+        chord(
+            group(
+                vision_stage.si(**stage_kwargs),
+                audio_stage.si(**stage_kwargs),
+            ),
+            fuse_stage.s(job_id=job_id),
+        ),
+        summary_stage.s(job_id=job_id),
+    )
+    return pipeline.apply_async()
+
+
+@celery_app.task(name="vision_stage", base=StageTask)
+def vision_stage(job_id: str, file_path: str, content_hash: str | None = None):
+    _update_job(job_id, status="PROCESSING")
+    vision = model_pool.get_vision()
+    cache_key = fingerprint(
+        content_hash or file_sha256(file_path), "vision", vision.cache_params()
+    )
+
+    def detect():
+        # Stores per-frame boxes; the overlay video is rendered on demand
+        # by render_vision_video
+        timeline = PartialTimeline(job_id, "vision")
+        ui_logs, _ = vision.detect(
+            file_path,
+            str(artifacts.detections_path(job_id)),
+            on_batch=timeline.emit,
+        )
+        timeline.close()
+        return ui_logs
+
+    return _run_stage(
+        job_id,
+        "vision",
+        detect,
+        cache_key=cache_key,
+        extra_files=(artifacts.detections_path(job_id).name,),
+    )
+
+
+@celery_app.task(name="audio_stage", base=StageTask)
+def audio_stage(job_id: str, file_path: str, content_hash: str | None = None):
+    _update_job(job_id, status="PROCESSING")
+    audio = model_pool.get_audio()
+    cache_key = fingerprint(
+        content_hash or file_sha256(file_path), "audio", audio.cache_params()
+    )
+
+    def transcribe():
+        timeline = PartialTimeline(job_id, "audio")
+        transcript = audio.process_audio(file_path, on_segment=timeline.emit)
+        timeline.close()
+        return transcript
+
+    return _run_stage(job_id, "audio", transcribe, cache_key=cache_key)
+
+
+def _shard_name(stage: str, index: int) -> str:
+    return f"{stage}.shard{index:03d}"
+
+
+def _shard_detections_path(job_id: str, index: int):
+    return artifacts.artifact_path(job_id, f"detections.shard{index:03d}.npz")
+
+
+@celery_app.task(name="split_stage", base=StageTask, bind=True)
+def split_stage(self, job_id: str, file_path: str, content_hash: str | None = None):
+    """
+    Cuts a long video into keyframe-aligned shards (stream copy, no
+    re-encode) and replaces itself with the per-shard vision and audio tasks,
+    merged by merge_shards before the pipeline continues with fusion.
+    """
+    _update_job(job_id, status="PROCESSING")
+    content_hash = content_hash or file_sha256(file_path)
+    split_ref = _run_stage(
+        job_id,
+        "split",
+        shards.split_video,
+        file_path,
+        str(artifacts.shard_dir(job_id)),
+    )
+    shard_list = artifacts.read_json(split_ref)["output"]
+
+    shard_kwargs = {
+        "job_id": job_id,
+        "content_hash": content_hash,
+        "total": len(shard_list),
+    }
+    return self.replace(
+        chord(
+            group(
+                *(vision_shard.si(shard=shard, **shard_kwargs) for shard in shard_list),
+                *(audio_shard.si(shard=shard, **shard_kwargs) for shard in shard_list),
+            ),
+            merge_shards.si(job_id=job_id),
         )
-        return response.json().get("response", "Analysis unavailable.")
+    )
+
+
+@celery_app.task(name="vision_shard", base=StageTask)
+def vision_shard(job_id: str, shard: dict, content_hash: str, total: int):
+    vision = model_pool.get_vision()
+    detections_path = _shard_detections_path(job_id, shard["index"])
+    cache_key = fingerprint(
+        content_hash, "vision", vision.cache_params(), shard["start"], shard["end"]
+    )
+
+    def detect():
+        ui_logs, _ = vision.detect(shard["path"], str(detections_path))
+        return shards.offset_ui_logs(ui_logs, shard["start"])
+
+    ref = _run_stage(
+        job_id,
+        _shard_name("vision", shard["index"]),
+        detect,
+        cache_key=cache_key,
+        extra_files=(detections_path.name,),
+    )
+    shard_progress(job_id, "vision", total)
+    return ref
+
+
+@celery_app.task(name="audio_shard", base=StageTask)
+def audio_shard(job_id: str, shard: dict, content_hash: str, total: int):
+    audio = model_pool.get_audio()
+    cache_key = fingerprint(
+        content_hash, "audio", audio.cache_params(), shard["start"], shard["end"]
+    )
+
+    def transcribe():
+        transcript = audio.process_audio(shard["path"])
+        return shards.offset_transcript(transcript, shard["start"])
+
+    ref = _run_stage(
+        job_id,
+        _shard_name("audio", shard["index"]),
+        transcribe,
+        cache_key=cache_key,
+    )
+    shard_progress(job_id, "audio", total)
+    return ref
+
+
+def _merge_stage(job_id: str, stage: str, outs: list, merge) -> str:
+    # Written like a regular stage output, spanning the shards' run time
+    path = artifacts.artifact_path(job_id, f"{stage}.json")
+    if path.exists():
+        return str(path)
+    return artifacts.write_json(
+        path,
+        {
+            "output": merge([out["output"] for out in outs]),
+            "started": min(out["started"] for out in outs),
+            "finished": max(out["finished"] for out in outs),
+            "cache_key": fingerprint(*(out["cache_key"] for out in outs)),
+            "shards": len(outs),
+        },
+    )
+
+
+@celery_app.task(name="merge_shards", base=StageTask)
+def merge_shards(job_id: str):
+    """
+    Joins the shard outputs (already on the source video's clock) into the
+    vision.json/audio.json and detections file fusion expects.
+    """
+    shard_list = artifacts.read_json(artifacts.artifact_path(job_id, "split.json"))[
+        "output"
+    ]
+
+    def outputs(stage):
+        return [
+            artifacts.read_json(
+                artifacts.artifact_path(
+                    job_id, f"{_shard_name(stage, s['index'])}.json"
+                )
+            )
+            for s in shard_list
+        ]
+
+    def merge_vision(parts):
+        shards.merge_detections(
+            [
+                (str(_shard_detections_path(job_id, s["index"])), s["start"])
+                for s in shard_list
+            ],
+            str(artifacts.detections_path(job_id)),
+        )
+        return shards.merge_ui_logs(parts)
+
+    def merge_audio(parts):
+        # Shards without a soundtrack come back as None
+        if all(part is None for part in parts):
+            return None
+        return [segment for part in parts for segment in part or []]
+
+    vision_ref = _merge_stage(job_id, "vision", outputs("vision"), merge_vision)
+    audio_ref = _merge_stage(job_id, "audio", outputs("audio"), merge_audio)
+    shutil.rmtree(artifacts.shard_dir(job_id), ignore_errors=True)
+    logger.info(f"Job {job_id}: merged {len(shard_list)} shards")
+    return [vision_ref, audio_ref]
+
+
+@celery_app.task(name="fuse_stage", base=StageTask)
+def fuse_stage(stage_refs: list, job_id: str):
+    vision_ref, audio_ref = stage_refs
+    vision_out = artifacts.read_json(vision_ref)
+    audio_out = artifacts.read_json(audio_ref)
+    fuser = BugLensFusion()
+    cache_key = fingerprint(
+        vision_out.get("cache_key"),
+        audio_out.get("cache_key"),
+        "fusion",
+        fuser.cache_params(),
+        job_store.TABLE_FILES,
+    )
+
+    def fuse():
+        with metrics.timed("fusion", "fusion"):
+            report = fuser.fuse(vision_out["output"], audio_out["output"])
+        report["timings"] = {
+            "vision": round(vision_out["finished"] - vision_out["started"], 2),
+            "audio": round(audio_out["finished"] - audio_out["started"], 2),
+        }
+        # Columnar copies served by the /jobs/{id}/... data endpoints
+        report["counts"] = job_store.write_job_store(
+            job_id, audio_out["output"], report
+        )
+        return report
+
+    return _run_stage(
+        job_id,
+        "fusion",
+        fuse,
+        cache_key=cache_key,
+        extra_files=job_store.TABLE_FILES,
+    )
+
+
+@celery_app.task(name="summary_stage", base=StageTask)
+def summary_stage(fusion_ref: str, job_id: str):
+    fusion_out = artifacts.read_json(fusion_ref)
+    final_report = fusion_out["output"]
+    vision_out = artifacts.read_json(artifacts.artifact_path(job_id, "vision.json"))
+    audio_out = artifacts.read_json(artifacts.artifact_path(job_id, "audio.json"))
+
+    # Keyed by the prompt itself: identical digests never reach Ollama twice
+    prompt = build_prompt(
+        final_report, audio_out["output"], visuals=vision_out["output"]
+    )
+    logger.info("Generating AI Summary ...")
+    summary_ref = _run_stage(
+        job_id,
+        "summary",
+        generate_llm_summary,
+        prompt,
+        cache_key=fingerprint("summary", llm.OLLAMA_MODEL, SUMMARY_OPTIONS, prompt),
+    )
+    summary_out = artifacts.read_json(summary_ref)
+
+    # Stage timings; total spans from the first stage start to the summary
+    timings = final_report.setdefault("timings", {})
+    timings["fusion"] = round(fusion_out["finished"] - fusion_out["started"], 2)
+    timings["summary"] = round(summary_out["finished"] - summary_out["started"], 2)
+    timings["total"] = round(
+        summary_out["finished"] - min(vision_out["started"], audio_out["started"]), 2
+    )
+    logger.info(f"Stage timings for Job {job_id}: {timings}")
+
+    # Save Results; the events themselves live in the job's Parquet store
+    metadata = {k: v for k, v in final_report.items() if k != "bug_events"}
+    _update_job(
+        job_id,
+        result=metadata,
+        summary=summary_out["output"],
+        status="COMPLETED",
+        error_message=None,
+    )
+    logger.success(f"Worker finished Job: {job_id}")
+    logger.debug(f"Worker memory after job: {model_pool.model_stats()}")
+    return summary_ref
+
+
+@celery_app.task(name="render_vision_video")
+def render_vision_video(job_id: str):
+    """Renders (or reuses) the cached 'AI Vision' overlay video for a finished job."""
+    db = SessionLocal()
+    try:
+        job = db.query(BugJob).filter(BugJob.id == job_id).first()
+        if not job:
+            return "Job not found"
+
+        output_path = artifacts.vision_video_path(job_id)
+        if not output_path.exists():
+            artifacts.create_job_dir(job_id)
+            with _job_profile(job_id, "render"):
+                BugLensRenderer().render(
+                    job.file_path,
+                    str(artifacts.detections_path(job_id)),
+                    str(output_path),
+                )
+
+        job.vision_file_path = str(output_path)
+        db.commit()
+        # Views waiting for the overlay refetch the job on this event
+        publish_progress(job_id, "render", percent=100.0, status="done")
+        return str(output_path)
     except Exception as e:
-        return f"Summarizer error: {str(e)}"
+        logger.error(f"Overlay rendering failed for Job {job_id}: {e!s}")
+        publish_progress(job_id, "render", status="failed", error=str(e))
+        raise
+    finally:
+        db.close()
+
+
+def generate_llm_summary(prompt: str):
+    """
+    Sends the compact fusion digest (see src.engine.prompt) to Ollama to
+    generate a human-readable report. Raises llm.LLMError once the client's
+    retries are spent, so the stage retries (or fails the job) instead of
+    caching an error as the summary.
+    """
+    with metrics.timed("summary", "llm"):
+        return llm.run(llm.get_llm().generate(prompt, options=SUMMARY_OPTIONS))
@@ -0,0 +1,46 @@
+import numpy as np
+
+from src.engine.detectors import letterbox, letterbox_geometry, postprocess
+
+
+def test_letterbox_pads_to_stride_not_square():
+    geometry = letterbox_geometry(1280, 720, 640)
+    assert geometry == (640, 360, 0, 12, 640, 384)
+
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    frame[..., 2] = 255  # pure red in BGR
+    out = np.empty((2, 3, 384, 640), dtype=np.float32)
+    batch = letterbox([frame], geometry, out)
+
+    assert batch.shape == (1, 3, 384, 640)
+    # Channels are RGB, the bands above and below are padding
+    assert batch[0, 0, 12:372].min() == 1.0
+    assert batch[0, 2, 12:372].max() == 0.0
+    assert np.allclose(batch[0, :, :12], 114 / 255)
+
+
+def _prediction(rows, classes=3):
+    """YOLOv8 output (4 + classes, anchors) from (cx, cy, w, h, cls, conf) rows."""
+    prediction = np.zeros((4 + classes, len(rows)), dtype=np.float32)
+    for i, (cx, cy, w, h, cls, conf) in enumerate(rows):
+        prediction[:4, i] = cx, cy, w, h
+        prediction[4 + cls, i] = conf
+    return prediction
+
+
+def test_postprocess_nms_and_source_coordinates():
+    geometry = letterbox_geometry(1280, 720, 640)
+    prediction = _prediction(
+        [
+            (100, 112, 40, 40, 0, 0.9),
+            (102, 112, 40, 40, 0, 0.8),  # overlaps the first, same class
+            (102, 112, 40, 40, 1, 0.7),  # same place, other class: kept
+            (300, 200, 20, 20, 2, 0.1),  # below the threshold
+        ]
+    )
+    boxes, conf, cls = postprocess(prediction, geometry, 1280, 720)
+
+    assert cls.tolist() == [0, 1]
+    assert np.allclose(conf, [0.9, 0.7])
+    # Letterbox padding (12 px) removed and scaled back up 2x
+    assert np.allclose(boxes[0], [160, 160, 240, 240])
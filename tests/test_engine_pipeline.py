@@ -1,31 +1,59 @@
-from src.engine.audio import BugLensAudio
-from src.engine.fusion import BugLensFusion
-from src.engine.vision import BugLensVision
+import shutil
+import subprocess
 
+import pytest
 
-def test_full_pipeline_logic():
-    # Use a small, 2-second sample video for testing
-    test_video = "data/raw/test.mp4"
+from benchmarks.fixtures import FPS, make_synthetic_clip
+
+pytestmark = pytest.mark.skipif(not shutil.which("ffmpeg"), reason="needs ffmpeg")
+
+
+@pytest.fixture(scope="module")
+def clip(tmp_path_factory):
+    # Small synthetic recording: UI frames plus a beeping tone
+    path = tmp_path_factory.mktemp("clip") / "clip.mp4"
+    make_synthetic_clip(path, seconds=4, width=320, height=240)
+    return path
+
+
+def _decode(path, *output_args):
+    return subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", str(path), *output_args, "-"],
+        capture_output=True,
+        check=True,
+    ).stdout
+
+
+def test_fixture_is_deterministic(clip, tmp_path):
+    again = tmp_path / "again.mp4"
+    make_synthetic_clip(again, seconds=4, width=320, height=240)
+
+    frames = _decode(clip, "-f", "rawvideo", "-pix_fmt", "bgr24")
+    assert len(frames) == 4 * FPS * 320 * 240 * 3
+    assert frames == _decode(again, "-f", "rawvideo", "-pix_fmt", "bgr24")
+
+    pcm = _decode(clip, "-f", "s16le", "-ac", "1", "-ar", "16000")
+    assert len(pcm) == pytest.approx(4 * 16000 * 2, rel=0.05)
+    assert pcm == _decode(again, "-f", "s16le", "-ac", "1", "-ar", "16000")
+
+
+def test_full_pipeline_logic(clip, tmp_path):
+    pytest.importorskip("ultralytics")
+    pytest.importorskip("faster_whisper")
+    from src.engine.audio import BugLensAudio
+    from src.engine.fusion import BugLensFusion
+    from src.engine.vision import BugLensVision
 
     vision = BugLensVision()
-    audio = BugLensAudio()
+    audio = BugLensAudio(model_size="tiny")
     fuser = BugLensFusion()
 
-    # Test individual components
-    frames = vision.extract_frames(test_video)
-    assert len(frames) > 0
-
-    ui_logs = vision.detect_ui(frames)
-    transcript = audio.process_audio(test_video)
+    ui_logs, _detections_path = vision.detect(str(clip), str(tmp_path / "det.npz"))
+    assert (tmp_path / "det.npz").exists()
+    transcript = audio.process_audio(str(clip))
+    assert isinstance(transcript, list)
 
-    # Test fusion
     report = fuser.fuse(ui_logs, transcript)
 
-    assert "status" in report
-    assert "bug_events" in report
     assert report["status"] == "Complete"
-
-    # CLEANUP: Senior engineers always clean up test artifacts
-    import shutil
-
-    shutil.rmtree("data/temp_frames", ignore_errors=True)
+    assert "bug_events" in report
@@ -0,0 +1,106 @@
+import math
+
+from src.engine.fusion import BugLensFusion, IncrementalFusion
+
+
+def _visual(t):
+    return {"time": t, "detections": [{"label": "popup", "conf": 0.9}]}
+
+
+def test_matches_visuals_inside_window():
+    ui_data = [_visual(t) for t in (12.0, 0.5, 4.0, 9.0, 30.0)]
+    audio_data = [
+        {"start": 5.0, "end": 6.0, "text": "crash"},
+        {"start": 20.0, "end": 21.0, "text": "nothing here"},
+    ]
+
+    report = BugLensFusion(window=3.0).fuse(ui_data, audio_data)
+
+    assert report["bug_events"] == [
+        {"time": 5, "voice": "crash", "visuals": [_visual(4.0), _visual(9.0)]}
+    ]
+
+
+def test_overlapping_windows_share_visuals():
+    ui_data = [_visual(4.0)]
+    audio_data = [
+        {"start": 2.0, "end": 3.0, "text": "a"},
+        {"start": 5.0, "end": 6.0, "text": "b"},
+    ]
+
+    events = BugLensFusion(window=2.0).fuse(ui_data, audio_data)["bug_events"]
+
+    assert [e["visuals"] for e in events] == [[_visual(4.0)], [_visual(4.0)]]
+
+
+def test_merge_and_anchor():
+    ui_data = [_visual(t) for t in (1.0, 4.5, 11.0)]
+    audio_data = [
+        {"start": 2.0, "end": 3.0, "text": "the button"},
+        {"start": 5.0, "end": 6.0, "text": "does nothing"},
+        {"start": 11.0, "end": 12.0, "text": "later"},
+    ]
+
+    fusion = BugLensFusion(window=1.0, anchor="first_visual", merge_gap=0.0)
+    events = fusion.fuse(ui_data, audio_data)["bug_events"]
+
+    assert [(e["time"], e["voice"]) for e in events] == [
+        (1, "the button does nothing"),
+        (11, "later"),
+    ]
+    assert events[0]["visuals"] == [_visual(1.0), _visual(4.5)]
+
+
+def _track(start, end, label="menu"):
+    return {
+        "time": start,
+        "end": end,
+        "frames": int(end - start) + 1,
+        "detections": [{"label": label, "conf": 0.9}],
+    }
+
+
+def test_tracks_match_every_window_they_overlap():
+    ui_data = [_track(0.0, 25.0), _track(4.0, 4.0, "popup"), _track(7.0, 8.0)]
+    audio_data = [
+        {"start": 5.0, "end": 6.0, "text": "crash"},
+        {"start": 20.0, "end": 21.0, "text": "menu still open"},
+        {"start": 40.0, "end": 41.0, "text": "nothing on screen"},
+    ]
+
+    events = BugLensFusion(window=1.0).fuse(ui_data, audio_data)["bug_events"]
+
+    assert [(e["voice"], e["visuals"]) for e in events] == [
+        ("crash", [_track(0.0, 25.0), _track(4.0, 4.0, "popup"), _track(7.0, 8.0)]),
+        ("menu still open", [_track(0.0, 25.0)]),
+    ]
+
+    # Same result when the tracks arrive one by one
+    fusion = IncrementalFusion(window=1.0)
+    fusion.add_speech(audio_data, watermark=math.inf)
+    for track in reversed(ui_data):
+        fusion.add_visuals([track], watermark=0.0)
+    fusion.add_visuals([], watermark=math.inf)
+    assert fusion.snapshot()["bug_events"] == events
+
+
+def test_incremental_fusion_waits_for_vision_watermark():
+    visuals = [_visual(t) for t in (1.0, 4.0, 9.0, 25.0)]
+    speech = [
+        {"start": 2.0, "end": 3.0, "text": "early"},
+        {"start": 24.0, "end": 26.0, "text": "late"},
+    ]
+    fusion = IncrementalFusion(window=3.0)
+
+    fusion.add_speech(speech, watermark=26.0)
+    fusion.add_visuals(visuals[:2], watermark=5.0)
+    assert fusion.snapshot()["bug_events"] == []
+
+    # The first window (up to 6s) is now fully covered by vision
+    fusion.add_visuals(visuals[2:3], watermark=10.0)
+    assert [e["voice"] for e in fusion.snapshot()["bug_events"]] == ["early"]
+    assert fusion.snapshot()["watermark"] == 10.0
+
+    fusion.add_visuals(visuals[3:], watermark=math.inf)
+    expected = BugLensFusion(window=3.0).fuse(visuals, speech)["bug_events"]
+    assert fusion.snapshot()["bug_events"] == expected
@@ -0,0 +1,100 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+
+from src.database.models import Base, BugJob
+from src.database.queries import job_page, job_page_async
+from src.database.session import AsyncSessionLocal, init_db, make_async_engine
+
+T0 = datetime(2026, 1, 1)
+
+
+def _session(tmp_path, jobs):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    init_db(engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all(jobs)
+    db.commit()
+    return db
+
+
+def _job(i, status="COMPLETED", minutes=None):
+    return BugJob(
+        id=f"job-{i:03d}",
+        filename=f"{i}.mp4",
+        file_path=f"/data/{i}.mp4",
+        status=status,
+        created_at=T0 + timedelta(minutes=i if minutes is None else minutes),
+    )
+
+
+def test_keyset_pages_cover_every_job_once(tmp_path):
+    # Jobs 10-19 share a timestamp, so the id tie-breaker matters
+    jobs = [_job(i, minutes=10 if 10 <= i < 20 else i) for i in range(25)]
+    db = _session(tmp_path, jobs)
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = job_page(db, limit=7, cursor=cursor)
+        seen += [r.id for r in rows]
+        if cursor is None:
+            break
+
+    expected = sorted(jobs, key=lambda j: (j.created_at, j.id), reverse=True)
+    assert seen == [j.id for j in expected]
+
+
+def test_filters_by_status_and_date(tmp_path):
+    db = _session(
+        tmp_path, [_job(i, "FAILED" if i % 2 else "COMPLETED") for i in range(10)]
+    )
+
+    rows, cursor = job_page(
+        db,
+        limit=50,
+        status=["FAILED"],
+        created_after=T0 + timedelta(minutes=3),
+        created_before=T0 + timedelta(minutes=8),
+    )
+
+    assert [r.id for r in rows] == ["job-007", "job-005", "job-003"]
+    assert cursor is None
+
+
+def test_migrations_adopt_existing_database(tmp_path):
+    # A database created before migrations existed
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    Base.metadata.tables["bug_jobs"].create(engine)
+    for index in list(Base.metadata.tables["bug_jobs"].indexes):
+        index.drop(engine)
+
+    init_db(engine)
+
+    indexes = {i["name"] for i in inspect(engine).get_indexes("bug_jobs")}
+    assert "ix_bug_jobs_created_at_id" in indexes
+
+
+def test_async_writes_store_naive_utc(tmp_path):
+    url = f"sqlite:///{tmp_path / 'jobs.db'}"
+    init_db(create_engine(url))
+    engine = make_async_engine(url)
+
+    async def go():
+        async with AsyncSessionLocal(bind=engine) as db:
+            db.add(BugJob(id="job-1", filename="a.mp4", file_path="/data/a.mp4"))
+            await db.commit()
+            job = await db.get(BugJob, "job-1")
+            # An aware filter is compared as UTC, like the stored timestamps
+            since = datetime.now(UTC) - timedelta(minutes=1)
+            rows, _ = await job_page_async(db, limit=10, created_after=since)
+        await engine.dispose()
+        return job, rows
+
+    job, rows = asyncio.run(go())
+    assert [r.id for r in rows] == [job.id]
+    # TIMESTAMP WITHOUT TIME ZONE: asyncpg only binds naive datetimes to it
+    for column in (BugJob.created_at, BugJob.updated_at):
+        assert column.default.arg(None).tzinfo is None
+    assert job.created_at.tzinfo is None
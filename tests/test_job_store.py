@@ -0,0 +1,51 @@
+import numpy as np
+
+from src.engine.detections import FrameDetections
+from src.worker import artifacts, job_store
+
+
+def test_store_round_trip_with_filters(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACT_DIR", tmp_path)
+    job_id = "job-1"
+
+    detections = FrameDetections(10.0, 640, 480, {0: "button", 1: "error_popup"})
+    for frame in range(0, 100, 10):
+        detections.add(frame, [[0, 0, 10, 10], [5, 5, 50, 50]], [0.9, 0.3], [0, 1])
+    artifacts.create_job_dir(job_id)
+    detections.save(str(artifacts.detections_path(job_id)))
+
+    transcript = [
+        {"start": 1.0, "end": 2.5, "text": "click login"},
+        {"start": 6.0, "end": 7.0, "text": "it crashed"},
+    ]
+    report = {
+        "bug_events": [
+            {
+                "time": 6,
+                "voice": "it crashed",
+                "visuals": [
+                    {"time": 6.0, "detections": [{"label": "error_popup", "conf": 0.8}]}
+                ],
+            }
+        ]
+    }
+
+    counts = job_store.write_job_store(job_id, transcript, report)
+    assert counts == {"detections": 20, "transcript": 2, "events": 1}
+
+    popups = job_store.read_table(
+        job_id,
+        "detections",
+        start=2.0,
+        end=4.0,
+        filters=[("label", "in", ["error_popup"])],
+    )
+    assert [r["frame"] for r in popups] == [20, 30, 40]
+
+    segments = job_store.read_table(job_id, "transcript", filters=[("end", ">=", 5.0)])
+    assert [s["text"] for s in segments] == ["it crashed"]
+
+    (event,) = job_store.read_table(job_id, "events")
+    assert event["labels"] == ["error_popup"]
+    assert event["top_label"] == "error_popup"
+    assert np.isclose(event["top_conf"], 0.8)
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from src.engine.llm import BugLensLLM, LLMError
+
+HOSTS = ["http://ollama-a:11434", "http://ollama-b:11434"]
+
+
+def _stream(*tokens):
+    lines = [json.dumps({"response": t, "done": False}) for t in tokens]
+    lines.append(json.dumps({"response": "", "done": True}))
+    return httpx.Response(200, content="\n".join(lines).encode())
+
+
+def _generate(transport, prompt="p", **kwargs):
+    async def go():
+        client = BugLensLLM(urls=HOSTS, transport=transport, retry_backoff=0, **kwargs)
+        try:
+            return await client.generate(prompt)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(go())
+
+
+def test_joins_streamed_tokens():
+    seen = []
+
+    def handler(request):
+        seen.append(json.loads(request.content))
+        return _stream("Login ", "button ", "missing")
+
+    assert _generate(httpx.MockTransport(handler)) == "Login button missing"
+    assert seen[0]["stream"] is True
+
+
+def test_retries_on_next_host():
+    hosts = []
+
+    def handler(request):
+        hosts.append(request.url.host)
+        if request.url.host == "ollama-a":
+            return httpx.Response(503)
+        return _stream("ok")
+
+    assert _generate(httpx.MockTransport(handler)) == "ok"
+    assert hosts == ["ollama-a", "ollama-b"]
+
+    with pytest.raises(LLMError):
+        _generate(httpx.MockTransport(lambda r: httpx.Response(503)), max_retries=2)
+
+
+def test_limits_concurrency_per_host():
+    active = {"ollama-a": 0, "ollama-b": 0}
+    peak = dict(active)
+
+    async def handler(request):
+        host = request.url.host
+        active[host] += 1
+        peak[host] = max(peak[host], active[host])
+        await asyncio.sleep(0.01)
+        active[host] -= 1
+        return _stream("x")
+
+    async def go():
+        client = BugLensLLM(
+            urls=HOSTS, max_concurrency=2, transport=httpx.MockTransport(handler)
+        )
+        results = await asyncio.gather(*(client.generate("p") for _ in range(12)))
+        await client.aclose()
+        return results
+
+    assert asyncio.run(go()) == ["x"] * 12
+    assert peak == {"ollama-a": 2, "ollama-b": 2}
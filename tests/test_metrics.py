@@ -0,0 +1,48 @@
+import time
+from pathlib import Path
+
+from prometheus_client import REGISTRY
+
+from src.utils.metrics import StepTimer
+from src.utils.profiling import SamplingProfiler
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_step_timer_accumulates_steps():
+    before = _sample("buglens_step_seconds_count", stage="test", step="decode")
+    timer = StepTimer("test")
+    for _ in range(3):
+        with timer("decode"):
+            time.sleep(0.01)
+        with timer("inference"):
+            pass
+    timer.observe({"decode": 30})
+
+    assert timer.seconds["decode"] >= 0.03
+    # One observation per stage run, not per block
+    after = _sample("buglens_step_seconds_count", stage="test", step="decode")
+    assert after == before + 1
+    fps = _sample("buglens_frames_per_second", stage="test", step="decode")
+    assert 0 < fps <= 1000
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_sampling_profiler_writes_folded_stacks(tmp_path):
+    with SamplingProfiler("job", interval=0.005) as profiler:
+        _busy(0.2)
+
+    path = profiler.write(tmp_path / "profile.folded")
+    lines = Path(path).read_text().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert stack.startswith("job;")
+    assert "_busy (test_metrics.py" in stack
+    assert int(count) > 0
@@ -0,0 +1,39 @@
+import math
+
+from src.worker import artifacts, partial
+from src.worker.partial import PartialTimeline
+
+
+def _visual(t):
+    return {"time": t, "detections": [{"label": "popup", "conf": 0.9}]}
+
+
+def test_retried_stage_replaces_its_stream(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACT_DIR", tmp_path)
+    monkeypatch.setattr(partial, "publish_progress", lambda *a, **k: None)
+
+    audio = PartialTimeline("job", "audio")
+    vision = PartialTimeline("job", "vision")
+    vision.emit([_visual(1.0), _visual(2.0)], watermark=20.0)
+    audio.emit([{"start": 1.0, "end": 2.0, "text": "first"}], watermark=30.0)
+    audio.persist()
+    assert len(audio.fusion.snapshot()["bug_events"]) == 1
+
+    # Vision fails and is retried: its new, longer stream sees nothing at 1-2s
+    vision = PartialTimeline("job", "vision")
+    vision.emit([_visual(25.0)] * 5, watermark=math.inf)
+    audio.emit([{"start": 24.0, "end": 25.0, "text": "second"}], watermark=30.0)
+    audio.persist()
+
+    events = audio.fusion.snapshot()["bug_events"]
+    assert [e["voice"] for e in events] == ["second"]
+    assert events[0]["visuals"] == [_visual(25.0)] * 5
+
+
+def test_lookups_leave_deleted_jobs_deleted(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACT_DIR", tmp_path)
+
+    assert partial.load_partial("gone") is None
+    assert artifacts.read_profiles("gone") is None
+    assert not artifacts.detections_path("gone").exists()
+    assert not (tmp_path / "gone").exists()
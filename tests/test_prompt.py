@@ -0,0 +1,54 @@
+from src.engine.prompt import build_digest, build_prompt, estimate_tokens
+
+
+def _visual(t, *dets):
+    return {
+        "time": t,
+        "detections": [{"label": label, "conf": conf} for label, conf in dets],
+    }
+
+
+def test_collapses_runs_and_dedupes_labels():
+    visuals = [_visual(10.0 + i * 0.5, ("popup", 0.5 + i / 100)) for i in range(8)]
+    visuals.append(_visual(20.0, ("popup", 0.6), ("button", 0.45)))
+    events = [{"time": 11, "voice": "login fails", "visuals": visuals}]
+    transcript = [
+        {"start": 11.0, "end": 12.0, "text": "login fails"},
+        {"start": 30.0, "end": 31.0, "text": "trying again"},
+        {"start": 31.0, "end": 32.0, "text": "trying again"},
+    ]
+
+    digest = build_digest(events, transcript)
+
+    assert digest["labels"] == "popup (max 0.60, x9), button (max 0.45, x1)"
+    assert digest["events"] == (
+        '- [00:11] "login fails" -> popup (10.0-13.5s 0.57 x8, 20.0s 0.60); '
+        "button (20.0s 0.45)"
+    )
+    assert digest["speech"] == '- [00:30] "trying again"'
+
+
+def test_budget_keeps_highest_confidence_events():
+    events = [
+        {"time": t, "voice": f"step {t}", "visuals": [_visual(t, ("popup", t / 100))]}
+        for t in range(60)
+    ]
+
+    digest = build_digest(events, budget=120)
+
+    lines = digest["events"].splitlines()
+    assert lines[-1].endswith("events omitted")
+    kept = [int(line.split('"step ')[1].split('"')[0]) for line in lines[:-1]]
+    assert kept == sorted(kept) and min(kept) > 40
+    assert estimate_tokens(build_prompt({"bug_events": events}, budget=120)) < 500
+
+
+def test_label_totals_cover_the_whole_video():
+    # Nothing near speech, but YOLO saw plenty
+    visuals = [_visual(t, (f"label{t}", 0.3 + t / 100)) for t in range(50)]
+
+    digest = build_digest([], visuals=visuals, budget=120)
+
+    assert digest["labels"].startswith("label49 (max 0.79, x1), label48")
+    assert digest["labels"].endswith("more labels")
+    assert estimate_tokens(digest["labels"]) <= 120 // 4
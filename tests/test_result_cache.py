@@ -0,0 +1,53 @@
+import os
+
+from prometheus_client import REGISTRY
+
+from src.utils.result_cache import ResultCache, fingerprint
+
+
+def _file(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(b"x" * size)
+    return path
+
+
+def _lookups(result):
+    labels = {"stage": "test", "result": result}
+    return REGISTRY.get_sample_value("buglens_cache_lookups_total", labels) or 0.0
+
+
+def test_put_get_counts_hits_and_misses(tmp_path):
+    cache = ResultCache(tmp_path / "cache", max_bytes=10_000)
+    key = fingerprint("sha256-of-video", "vision", {"model": "yolov8n.pt"})
+    hits, misses = _lookups("hit"), _lookups("miss")
+
+    assert cache.get(key, "test") is None
+    cache.put(key, {"vision.json": _file(tmp_path, "out.json", 10)})
+
+    entry = cache.get(key, "test")
+    assert (entry / "vision.json").read_bytes() == b"x" * 10
+    assert cache.stats() == {"hits": 1, "misses": 1}
+    assert (_lookups("hit") - hits, _lookups("miss") - misses) == (1, 1)
+
+
+def test_fingerprint_changes_with_model_config():
+    assert fingerprint("abc", {"model": "small"}) != fingerprint(
+        "abc", {"model": "base"}
+    )
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(tmp_path / "cache", max_bytes=250)
+    keys = [fingerprint(i) for i in range(3)]
+
+    for i, key in enumerate(keys[:2]):
+        cache.put(key, {"out": _file(tmp_path, f"{i}.bin", 100)})
+        os.utime(cache.get(key), (1000 + i, 1000 + i))
+    # Touch the oldest entry so the second one becomes least recently used
+    cache.get(keys[0])
+
+    cache.put(keys[2], {"out": _file(tmp_path, "2.bin", 100)})
+
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is not None
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from src.engine import sampling
+from src.engine.sampling import RateSampler, SceneChangeSampler, StrideSampler
+
+
+def _frame(value):
+    return np.full((72, 128, 3), value, dtype=np.uint8)
+
+
+def test_rate_sampler_matches_once_per_second():
+    sampler = RateSampler(1, fps=30)
+    picked = [i for i in range(90) if sampler.should_sample(i, None)]
+    assert picked == [0, 30, 60]
+
+
+def test_rejects_samplers_that_never_fire(monkeypatch):
+    with pytest.raises(ValueError):
+        RateSampler(0.0, fps=30)
+    monkeypatch.setattr(sampling, "SAMPLE_STRIDE", 0)
+    with pytest.raises(ValueError):
+        sampling.make_sampler(30, "stride")
+
+
+def test_stride_sampler():
+    sampler = StrideSampler(4)
+    assert [i for i in range(10) if sampler.should_sample(i, None)] == [0, 4, 8]
+
+
+def test_scene_sampler_skips_static_screen():
+    sampler = SceneChangeSampler(fps=30, threshold=4.0, max_gap=5.0)
+    static = _frame(200)
+    changed = _frame(50)
+
+    picked = [i for i in range(60) if sampler.should_sample(i, static)]
+    assert picked == [0]
+
+    # A real change is picked up immediately
+    assert sampler.should_sample(60, changed)
+    # A static screen is still re-checked after max_gap seconds
+    assert sampler.should_sample(60 + 150, changed)
@@ -0,0 +1,83 @@
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from src.engine.detections import FrameDetections, load_detections
+from src.engine.shards import (
+    merge_detections,
+    merge_ui_logs,
+    offset_transcript,
+    offset_ui_logs,
+    split_video,
+)
+
+
+@pytest.mark.skipif(not shutil.which("ffmpeg"), reason="needs ffmpeg")
+def test_split_cuts_on_keyframes(tmp_path):
+    video = tmp_path / "long.mp4"
+    # 12 s at 10 fps with a keyframe every 2 s; B-frames on (x264 default)
+    subprocess.run(
+        [
+            "ffmpeg", "-v", "error", "-y",
+            "-f", "lavfi", "-i", "testsrc=size=160x120:rate=10",
+            "-f", "lavfi", "-i", "sine=sample_rate=16000",
+            "-t", "12", "-g", "20", "-c:v", "libx264", "-c:a", "aac",
+            "-pix_fmt", "yuv420p", str(video),
+        ],
+        check=True,
+    )  # fmt: skip
+
+    shards = split_video(str(video), str(tmp_path / "shards"), shard_seconds=5)
+
+    # Cuts at 5 s and 10 s move to the next keyframe: 6 s and 10 s
+    assert [(s["start"], s["end"]) for s in shards] == [(0, 6), (6, 10), (10, 12)]
+    for shard in shards:
+        first = subprocess.run(
+            ["ffmpeg", "-v", "error", "-i", shard["path"], "-frames:v", "1",
+             "-f", "rawvideo", "-"],
+            capture_output=True, check=True,
+        ).stdout  # fmt: skip
+        source = subprocess.run(
+            ["ffmpeg", "-v", "error", "-i", str(video), "-vf",
+             f"select=eq(n\\,{int(shard['start'] * 10)})", "-frames:v", "1",
+             "-f", "rawvideo", "-"],
+            capture_output=True, check=True,
+        ).stdout  # fmt: skip
+        assert first == source
+
+
+def test_merge_puts_shards_on_source_clock(tmp_path):
+    parts = []
+    for index, offset in enumerate((0.0, 6.0)):
+        det = FrameDetections(10.0, 160, 120, {0: "button", index + 1: f"l{index}"})
+        det.add(0, [[0, 0, 5, 5]], [0.9], [index + 1])
+        det.add(5, [], [], [])
+        path = str(tmp_path / f"d{index}.npz")
+        parts.append((det.save(path), offset))
+
+    merged = load_detections(merge_detections(parts, str(tmp_path / "all.npz")))
+
+    assert merged["frames"].tolist() == [0, 60]
+    assert merged["sampled_frames"].tolist() == [0, 5, 60, 65]
+    assert merged["names"] == {0: "button", 1: "l0", 2: "l1"}
+    assert np.array_equal(merged["cls"], [1, 2])
+
+    logs = [{"time": 1.5, "end": 2.5, "detections": []}]
+    assert offset_ui_logs(logs, 6.0) == [{"time": 7.5, "end": 8.5, "detections": []}]
+    segments = [{"start": 0.5, "end": 1.0, "text": "hi"}]
+    assert offset_transcript(segments, 6.0) == [
+        {"start": 6.5, "end": 7.0, "text": "hi"}
+    ]
+    assert offset_transcript(None, 6.0) is None
+
+
+def test_merged_track_ids_stay_unique():
+    first = [{"time": 0.0, "track": 0}, {"time": 1.0, "track": 2}]
+    second = [{"time": 6.0, "track": 0}, {"time": 7.0, "track": 1}]
+
+    merged = merge_ui_logs([first, [], second])
+
+    assert [log["track"] for log in merged] == [0, 2, 3, 4]
+    assert first[0]["track"] == 0  # shard outputs are left alone
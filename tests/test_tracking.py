@@ -0,0 +1,44 @@
+from src.engine.tracking import IoUTracker
+
+
+def test_links_detections_into_tracks():
+    tracker = IoUTracker(iou_threshold=0.3, max_gap=2.0, max_seconds=30)
+    popup, button = [100, 100, 200, 200], [0, 0, 50, 20]
+    finished = []
+    for t in range(5):
+        boxes = [[v + t for v in popup], button]
+        labels, conf = ["popup", "button"], [0.5 + t / 10, 0.8]
+        if t == 2:
+            # Missed in one sample: the popup track survives the gap
+            boxes, labels, conf = [button], ["button"], [0.8]
+        if t == 4:
+            # Same place, other label: a new track, the popup one ends
+            labels = ["error", "button"]
+        finished += tracker.update(float(t), boxes, conf, labels)
+    finished += tracker.flush()
+
+    assert [(e["time"], e["end"], e["frames"]) for e in finished] == [
+        (0.0, 3.0, 3),
+        (0.0, 4.0, 5),
+        (4.0, 4.0, 1),
+    ]
+    popup_track = finished[0]["detections"][0]
+    # Peak confidence and the box it was seen with
+    assert popup_track == {"label": "popup", "conf": 0.8, "box": [103, 103, 203, 203]}
+    assert [e["detections"][0]["label"] for e in finished] == [
+        "popup",
+        "button",
+        "error",
+    ]
+
+
+def test_long_tracks_are_cut_and_bound_the_watermark():
+    tracker = IoUTracker(max_gap=1.5, max_seconds=10)
+    finished = []
+    for t in range(25):
+        finished += tracker.update(float(t), [[0, 0, 10, 10]], [0.9], ["menu"])
+        assert tracker.open_since >= t - 10
+
+    assert [(e["time"], e["end"]) for e in finished] == [(0.0, 9.0), (10.0, 19.0)]
+    assert [(e["time"], e["end"]) for e in tracker.flush()] == [(20.0, 24.0)]
+    assert tracker.open_since is None
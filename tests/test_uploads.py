@@ -0,0 +1,68 @@
+import asyncio
+import os
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+# The API imports the worker tasks and with them the ML stack
+pytest.importorskip("faster_whisper")
+
+from src.api import uploads
+
+
+def _app(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "SESSION_DIR", tmp_path)
+    app = FastAPI()
+    app.include_router(uploads.router)
+    return app
+
+
+def test_concurrent_chunks_at_one_offset(tmp_path, monkeypatch):
+    app = _app(tmp_path, monkeypatch)
+
+    async def body(data):
+        for byte in data:
+            await asyncio.sleep(0.01)
+            yield bytes([byte])
+
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            upload = await c.post("/uploads", json={"filename": "a.mp4", "size": 8})
+            url = f"/uploads/{upload.json()['upload_id']}?offset=0"
+            first, second = await asyncio.gather(
+                c.put(url, content=body(b"aaaa")), c.put(url, content=body(b"bbbb"))
+            )
+        return first, second
+
+    first, second = asyncio.run(go())
+
+    assert sorted([first.status_code, second.status_code]) == [200, 409]
+    (part,) = tmp_path.glob("*.part")
+    assert part.read_bytes() in (b"aaaa", b"bbbb")
+
+
+def test_abandoned_sessions_expire(tmp_path, monkeypatch):
+    _app(tmp_path, monkeypatch)
+    for name in ("old", "new"):
+        (tmp_path / f"{name}.json").write_text("{}")
+        (tmp_path / f"{name}.part").write_bytes(b"x")
+        uploads._hashers[name] = uploads._RunningHash()
+    for path in tmp_path.glob("old.*"):
+        os.utime(path, (0, 0))
+
+    assert uploads.expire_sessions(max_age=3600) == ["old"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["new.json", "new.part"]
+    assert "old" not in uploads._hashers and "new" in uploads._hashers
+    uploads._hashers.pop("new")
+
+
+def test_stored_hash_comes_from_the_file_name(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", tmp_path)
+    (tmp_path / "part").write_bytes(b"video")
+    digest = "ab" * 32
+    path, _ = uploads.store_upload(tmp_path / "part", digest, "Rec.MOV")
+
+    assert uploads.stored_hash(str(path)) == digest
+    assert uploads.stored_hash("/app/data/raw/old_recording.mp4") is None
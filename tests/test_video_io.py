@@ -0,0 +1,99 @@
+import shutil
+import subprocess
+
+import cv2
+import numpy as np
+import pytest
+
+from src.engine.sampling import RateSampler, StrideSampler
+from src.engine.video_io import DecodeGeometry, FFmpegReader
+
+
+def test_geometry_crops_scales_and_maps_back():
+    geometry = DecodeGeometry(3840, 2160, roi=(100, 50, 1920, 1080), max_side=960)
+
+    assert (geometry.out_w, geometry.out_h) == (960, 540)
+    assert geometry.filters() == [
+        "crop=1920:1080:100:50",
+        "scale=960:540:flags=bilinear",
+    ]
+    boxes = geometry.to_source(np.array([[0, 0, 960, 540], [10, 20, 30, 40]]))
+    assert boxes.tolist() == [[100, 50, 2020, 1130], [120, 90, 160, 130]]
+
+    # Small enough already: decoded as is
+    assert DecodeGeometry(1280, 720, max_side=1280).identity
+    # A region sticking out of the frame is clamped to it
+    clamped = DecodeGeometry(1280, 720, roi=(1000, 600, 800, 800))
+    assert (clamped.crop_w, clamped.crop_h) == (280, 120)
+
+
+def _frames(reader):
+    frames = []
+    while True:
+        frame = np.empty(reader.shape, dtype=np.uint8)
+        if not reader.read_into(frame):
+            return frames
+        frames.append(frame)
+
+
+@pytest.mark.skipif(not shutil.which("ffmpeg"), reason="needs ffmpeg")
+@pytest.mark.parametrize(
+    "sampler", [StrideSampler(7), RateSampler(3, 25.0)], ids=["stride", "rate"]
+)
+def test_select_filter_matches_sampler(tmp_path, sampler):
+    video = tmp_path / "clip.mp4"
+    subprocess.run(
+        [
+            "ffmpeg", "-v", "error", "-y",
+            "-f", "lavfi", "-i", "testsrc=size=160x120:rate=25",
+            "-t", "2", "-c:v", "libx264", "-pix_fmt", "yuv420p", str(video),
+        ],
+        check=True,
+    )  # fmt: skip
+    with FFmpegReader(str(video), 160, 120) as reader:
+        every = _frames(reader)
+    picked = [i for i in range(len(every)) if sampler.should_sample(i, None)]
+
+    geometry = DecodeGeometry(160, 120, roi=(40, 30, 80, 60))
+    filters = [f"select={sampler.select_expr()}", *geometry.filters()]
+    with FFmpegReader(str(video), 80, 60, filters) as reader:
+        selected = _frames(reader)
+
+    # Exactly the sampled frames, cropped
+    assert len(selected) == len(picked)
+    for index, frame in zip(picked, selected, strict=True):
+        assert np.array_equal(frame, every[index][30:90, 40:120])
+
+
+@pytest.mark.skipif(not shutil.which("ffmpeg"), reason="needs ffmpeg")
+def test_variable_frame_rate_is_not_resampled(tmp_path):
+    video = tmp_path / "vfr.mp4"
+    # 30 fps for a second, then 10 fps
+    subprocess.run(
+        [
+            "ffmpeg", "-v", "error", "-y",
+            "-f", "lavfi", "-i", "testsrc=size=160x120:rate=30", "-t", "2",
+            "-vf", "setpts='if(lt(N,30),N/30,1+(N-30)/10)/TB'", "-fps_mode", "vfr",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p", str(video),
+        ],
+        check=True,
+    )  # fmt: skip
+    cap = cv2.VideoCapture(str(video))
+    expected = 0
+    while cap.grab():
+        expected += 1
+    cap.release()
+
+    with FFmpegReader(str(video), 160, 120) as reader:
+        assert len(_frames(reader)) == expected
+
+
+@pytest.mark.skipif(not shutil.which("ffmpeg"), reason="needs ffmpeg")
+def test_failed_decode_raises(tmp_path):
+    video = tmp_path / "broken.mp4"
+    video.write_bytes(b"not a video")
+    with (
+        pytest.raises(subprocess.CalledProcessError),
+        FFmpegReader(str(video), 160, 120) as reader,
+    ):
+        _frames(reader)